@@ -1,8 +1,27 @@
+import json
 import logging
 import os
+import time
+import allure
 import pytest
 from playwright.sync_api import sync_playwright
 
+from pages import locator_cache
+from utils import browser_server, page_helpers
+from utils.budget import TimeBudget
+from utils.capture import PageCapture
+from utils.html_report import StreamingReport
+from utils.memory_watchdog import MemoryWatchdog
+from utils.prefetch import PrefetchPipeline
+from utils.run_history import DEFAULT_DB, HistoryRecorder, RunHistory
+from utils.sampling import RotatingSampler
+from utils.screencast import TransitionRecorder
+from utils.target_map import parse_verify
+from utils.perf_probe import ClickProbe, parse_budget, rank_interactions
+from utils.tracing import FailureTracer, TraceRetention
+from utils.viewports import (RESULTS_ENV, MatrixResults, ViewportMatrix, ViewportProfile, append_report,
+                             parse_viewports)
+
 # Default target
 DEFAULT_BASE_URL = os.getenv("BASE_URL", "https://effective-mobile.ru")
 
@@ -38,6 +57,373 @@ def pytest_addoption(parser):
     except ValueError:
         pass
 
+    try:
+        parser.addoption(
+            "--viewports",
+            action="store",
+            default=os.getenv("VIEWPORTS", ""),
+            help="Viewport matrix, e.g. 1280x800,768x1024,375x812@3 (overrides --viewport-width/--viewport-height)"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--trace-failures",
+            action="store",
+            default=os.getenv("TRACE_FAILURES", "0"),
+            help="Record a Playwright trace chunk per step and keep only failing ones: 1 or 0"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption("--trace-dir", action="store", default=os.getenv("TRACE_DIR", "traces"))
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--trace-retention-mb",
+            action="store",
+            default=os.getenv("TRACE_RETENTION_MB", "200"),
+            help="Max total size of kept failure traces; oldest are deleted first"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--click-budget",
+            action="store",
+            default=os.getenv("CLICK_BUDGET", ""),
+            help="Per-click budget, e.g. long_task_ms=200,script_ms=300,layout_count=40,cls=0.1"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption("--vitals-iterations", action="store", default=os.getenv("VITALS_ITERATIONS", "5"))
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--vitals-budget",
+            action="store",
+            default=os.getenv("VITALS_BUDGET", "config/web_vitals_budget.json"),
+            help="JSON file with median/p95 budgets per web vitals metric"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--vitals-output",
+            action="store",
+            default=os.getenv("VITALS_OUTPUT", "reports/web-vitals.json"),
+            help="Where to write web vitals results; runs are also appended to <name>-history.jsonl"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--capture-mode",
+            action="store",
+            default=os.getenv("CAPTURE_MODE", "element"),
+            help="element: screenshot every target; crop: one full-page capture per page state, targets cropped locally"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--screencast",
+            action="store",
+            default=os.getenv("SCREENCAST", "off"),
+            help="Record click transitions with CDP screencast: off, strip (JPEG strip) or gif"
+        )
+        parser.addoption(
+            "--transition-max-ms",
+            action="store",
+            default=os.getenv("TRANSITION_MAX_MS", "0"),
+            help="Fail CTA / anchor steps whose recorded scroll or animation transition is longer (0 = off)"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--time-budget",
+            action="store",
+            default=os.getenv("TIME_BUDGET", "0"),
+            help="Wall-clock budget per test in seconds (0 = unlimited); elements over budget are skipped"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--browser-server",
+            action="store",
+            default=os.getenv("BROWSER_SERVER", "auto"),
+            help="auto: connect to `python -m utils.browser_server` if it is running; off; or a CDP endpoint URL"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--history-db",
+            action="store",
+            default=DEFAULT_DB,
+            help="SQLite run history (per-element durations and outcomes); 'off' disables it"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--html-report",
+            action="store",
+            default=os.getenv("HTML_REPORT", "reports/html"),
+            help="Directory of the streaming static HTML report (no Java needed); 'off' disables it"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--page-helpers",
+            action="store",
+            default=os.getenv("PAGE_HELPERS", "on"),
+            help="on: in-page helper library installed once per context; off: ship helper sources on every evaluate"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--memory-rss-mb",
+            action="store",
+            default=os.getenv("MEMORY_RSS_MB", "0"),
+            help="Recycle the page when browser RSS exceeds this many MB at a step boundary (0 = off)"
+        )
+        parser.addoption(
+            "--memory-heap-mb",
+            action="store",
+            default=os.getenv("MEMORY_HEAP_MB", "0"),
+            help="Recycle the page when the page JS heap exceeds this many MB (0 = off)"
+        )
+        parser.addoption(
+            "--recycle-every",
+            action="store",
+            default=os.getenv("RECYCLE_EVERY", "0"),
+            help="Recycle the page every N element checks (0 = off)"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--element",
+            action="store",
+            default=os.getenv("ELEMENT", ""),
+            help='Check only these anchors/CTAs: index ("12", "3,7"), "text:<substring>" or "css:<selector>"'
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--prefetch",
+            action="store",
+            default=os.getenv("PREFETCH", "0"),
+            help="Popup link destinations loaded ahead in background pages while earlier links are checked (0 = off)"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--cta-verify",
+            action="store",
+            default=os.getenv("CTA_VERIFY", "0.2"),
+            help="CTAs with a statically resolved target are not clicked, except this sample: "
+                 "fraction (0.2), count (5) or 'all' to click every CTA"
+        )
+        parser.addoption(
+            "--anchor-verify",
+            action="store",
+            default=os.getenv("ANCHOR_VERIFY", "0.2"),
+            help="#id anchors are verified in bulk; clicked are those with JS handlers plus this sample: "
+                 "fraction (0.2), count (5) or 'all' to click every anchor"
+        )
+    except ValueError:
+        pass
+
+    try:
+        parser.addoption(
+            "--sample",
+            action="store",
+            default=os.getenv("SAMPLE", "0"),
+            help="Check about K anchors/CTAs per run (stratified, rotating); 0 = check everything"
+        )
+        parser.addoption(
+            "--sample-cycle",
+            action="store",
+            default=os.getenv("SAMPLE_CYCLE", "0"),
+            help="Runs needed to cover every element (default: ceil(elements / K))"
+        )
+        parser.addoption(
+            "--sample-seed",
+            action="store",
+            default=os.getenv("SAMPLE_SEED", ""),
+            help="Seed of the per-stratum order; change it to reshuffle the rotation"
+        )
+        parser.addoption(
+            "--sample-run",
+            action="store",
+            default=os.getenv("SAMPLE_RUN", ""),
+            help="Rotation position (default: number of runs in the history db, or a run counter in the pytest cache)"
+        )
+    except ValueError:
+        pass
+
+
+_matrix_results = None
+_browser_startup = []
+_budget_reports = []
+_trace_summaries = []
+_click_probes = []
+_html_report = None
+_memory_reports = []
+_sampling_reports = []
+
+
+def pytest_configure(config):
+    global _matrix_results, _html_report
+    profiles = parse_viewports(config.getoption("--viewports", default=""))
+    config._viewport_profiles = profiles
+    if len(profiles) > 1:
+        # the profiles run in their own processes (pytest_runtestloop), this one only collects the results
+        _matrix_results = MatrixResults(profiles)
+    page_helpers.ENABLED = config.getoption("--page-helpers", default="on") != "off"
+    report_dir = config.getoption("--html-report", default="off")
+    if report_dir and report_dir != "off" and _matrix_results is None:
+        _html_report = StreamingReport(str(config.rootpath / report_dir)).register()
+
+
+def pytest_unconfigure(config):
+    if _html_report is not None:
+        _html_report.close()
+        _html_report.unregister()
+
+
+def pytest_runtest_logstart(nodeid, location):
+    if _html_report is not None:
+        _html_report.begin_test(nodeid)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    if _matrix_results is None or session.config.option.collectonly:
+        return None
+    reporter = session.config.pluginmanager.get_plugin("terminalreporter")
+    matrix = ViewportMatrix(session.config._viewport_profiles, list(session.config.invocation_params.args),
+                            str(session.config.rootpath))
+
+    def done(profile, code, seconds):
+        if reporter is not None:
+            reporter.write_line(f"viewport {profile.id}: exit code {code} after {seconds:.1f}s "
+                                f"(log: {matrix.log_path(profile)})")
+
+    try:
+        matrix.run(done)
+        for rep in matrix.reports():
+            _matrix_results.add(rep["nodeid"], rep["outcome"], rep["duration"])
+            if rep["outcome"] == "failed":
+                session.testsfailed += 1
+        # a profile process that broke without reporting a failure (crash, usage error) fails the run too
+        if any(code not in (0, 5) for code in matrix.exit_codes.values()) and not session.testsfailed:
+            session.testsfailed = 1
+    finally:
+        matrix.close()
+    return True
+
+
+def pytest_generate_tests(metafunc):
+    profiles = getattr(metafunc.config, "_viewport_profiles", None)
+    if profiles and "viewport" in metafunc.fixturenames:
+        metafunc.parametrize("viewport", profiles, ids=[p.id for p in profiles], indirect=True)
+
+
+def pytest_runtest_logreport(report):
+    if os.getenv(RESULTS_ENV):
+        append_report(os.environ[RESULTS_ENV], report.nodeid, report.when, report.outcome, report.duration)
+    if _matrix_results is not None:
+        _matrix_results.add(report.nodeid, report.outcome, report.duration)
+    if _html_report is not None and (report.when == 'call' or report.outcome != 'passed'):
+        _html_report.end_test(report.nodeid, report.outcome, report.duration,
+                              report.longreprtext if report.outcome == 'failed' else None)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _browser_startup:
+        terminalreporter.section("browser startup")
+        for mode, seconds in _browser_startup:
+            terminalreporter.write_line(f"{mode}: {seconds * 1000:.0f} ms")
+    if _budget_reports:
+        terminalreporter.section("time budget")
+        for name, rep in _budget_reports:
+            terminalreporter.write_line(
+                f"{name}: spent {rep['spent_s']}s of {rep['budget_s']}s, "
+                f"{len(rep['skipped'])} skipped, {len(rep['truncated'])} truncated"
+            )
+    if _sampling_reports:
+        terminalreporter.section("sampling")
+        for name, rep in _sampling_reports:
+            terminalreporter.write_line(
+                f"{name}: {rep['selected']} of {rep['elements']} elements ({rep['coverage_this_run_pct']}%), "
+                f"slot {rep['slot'] + 1}/{rep['cycle']}, {rep['prioritized']} prioritized, "
+                f"cycle coverage {rep['coverage_cycle_pct']}%"
+            )
+    if _memory_reports:
+        terminalreporter.section("memory")
+        for name, rep in _memory_reports:
+            terminalreporter.write_line(
+                f"{name}: {rep['steps']} steps, peak RSS {rep['peak_rss_mb']} MB, "
+                f"peak JS heap {rep['peak_heap_mb']} MB, {len(rep['recycles'])} recycles"
+            )
+    if _click_probes:
+        results = [r for probe in _click_probes for r in probe.results]
+        terminalreporter.section("most expensive interactions")
+        for line in rank_interactions(results):
+            terminalreporter.write_line(line)
+    if _trace_summaries:
+        steps = sum(t["steps"] for t in _trace_summaries)
+        overhead = sum(t["overhead_ms_total"] for t in _trace_summaries)
+        terminalreporter.section("failure tracing")
+        terminalreporter.write_line(
+            f"{steps} steps traced, {sum(t['kept'] for t in _trace_summaries)} failing chunks kept, "
+            f"overhead {overhead:.0f} ms total ({overhead / steps if steps else 0:.1f} ms/step), "
+            f"{_trace_summaries[-1]['retained_bytes'] / 1e6:.1f} MB retained, "
+            f"{_trace_summaries[-1]['evicted']} evicted"
+        )
+    if locator_cache.STATS.hits or locator_cache.STATS.verified or locator_cache.STATS.misses:
+        terminalreporter.section("locator cache")
+        for line in locator_cache.STATS.lines():
+            terminalreporter.write_line(line)
+    if page_helpers.STATS.calls:
+        terminalreporter.section("page helpers")
+        for line in page_helpers.STATS.lines():
+            terminalreporter.write_line(line)
+    if _matrix_results is not None and _matrix_results.rows:
+        terminalreporter.section("viewport matrix")
+        for line in _matrix_results.lines():
+            terminalreporter.write_line(line)
+
 
 def _suppress_verbose_logs():
     logging.getLogger('playwright').setLevel(logging.WARNING)
@@ -51,17 +437,93 @@ def playwright_instance():
         yield p
 
 
+@pytest.fixture(scope='session')
+def launch_browser(browser_type_launch_args, browser_type, connect_options, request):
+    """
+    Connects to the persistent browser server when it is available and matches the
+    launch flags, otherwise launches a browser; connect_options (pytest-playwright)
+    take precedence over both.
+    """
+    def launch(**kwargs):
+        t0 = time.perf_counter()
+        launch_options = {**browser_type_launch_args, **kwargs}
+        if connect_options:
+            browser = browser_type.connect(**{
+                **connect_options,
+                "headers": {
+                    "x-playwright-launch-options": json.dumps(launch_options),
+                    **(connect_options.get("headers") or {}),
+                },
+            })
+            _browser_startup.append((f"connect {connect_options.get('ws_endpoint')}", time.perf_counter() - t0))
+            return browser
+        endpoint = None
+        if browser_type.name == 'chromium':
+            endpoint = browser_server.resolve_endpoint(request.config.getoption('--browser-server'), launch_options)
+        if endpoint:
+            try:
+                browser = browser_type.connect_over_cdp(endpoint)
+                browser_server.mark_connected(browser, endpoint)
+                _browser_startup.append((f"connect {endpoint}", time.perf_counter() - t0))
+                return browser
+            except Exception:
+                pass
+        browser = browser_type.launch(**launch_options)
+        _browser_startup.append((f"launch {browser_type.name}", time.perf_counter() - t0))
+        return browser
+    return launch
+
+
 @pytest.fixture(scope='function')
-def context(browser, request):
-    width = int(request.config.getoption('--viewport-width'))
-    height = int(request.config.getoption('--viewport-height'))
-    context = browser.new_context(viewport={'width': width, 'height': height})
+def viewport(request):
+    profile = getattr(request, 'param', None)
+    if profile is None:
+        width = int(request.config.getoption('--viewport-width'))
+        height = int(request.config.getoption('--viewport-height'))
+        profile = ViewportProfile(width, height)
+    return profile
+
+
+@pytest.fixture(scope='function')
+def context(browser, viewport):
+    context = browser.new_context(**viewport.context_options())
+    page_helpers.install(context)
     yield context
     try:
         context.close()
     except Exception:
         pass
 
+@pytest.fixture(scope='session')
+def trace_retention(request):
+    if request.config.getoption('--trace-failures') in ('0', '', 'false', 'False'):
+        return None
+    max_bytes = int(float(request.config.getoption('--trace-retention-mb')) * 1024 * 1024)
+    return TraceRetention(request.config.getoption('--trace-dir'), max_bytes)
+
+
+@pytest.fixture(scope='function', autouse=True)
+def failure_tracer(request, trace_retention):
+    if trace_retention is None or 'context' not in request.fixturenames:
+        yield None
+        return
+    tracer = FailureTracer(request.getfixturevalue('context'), trace_retention, prefix=request.node.name)
+    try:
+        tracer.start()
+    except Exception:
+        yield None
+        return
+    yield tracer
+    tracer.stop()
+    summary = tracer.summary()
+    _trace_summaries.append(summary)
+    try:
+        allure.attach(json.dumps(summary, ensure_ascii=False, indent=2), name="Tracing cost per step",
+                      attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
+
 @pytest.fixture(scope='function')
 def page(context):
     p = context.new_page()
@@ -71,6 +533,183 @@ def page(context):
     except Exception:
         pass
 
+@pytest.fixture(scope='function')
+def page_capture(page, request):
+    if request.config.getoption('--capture-mode') != 'crop':
+        yield None
+        return
+    capture = PageCapture(page)
+    yield capture
+    capture.close()
+    try:
+        allure.attach(f"{capture.captures} browser captures, {capture.crops} local crops",
+                      name="Capture stats", attachment_type=allure.attachment_type.TEXT)
+    except Exception:
+        pass
+
+
+@pytest.fixture(scope='function')
+def time_budget(request):
+    total = float(request.config.getoption('--time-budget') or 0)
+    budget = TimeBudget(total or None)
+    yield budget
+    if budget.enabled:
+        report = budget.report()
+        _budget_reports.append((request.node.name, report))
+        try:
+            allure.attach(json.dumps(report, ensure_ascii=False, indent=2), name="Time budget",
+                          attachment_type=allure.attachment_type.JSON)
+        except Exception:
+            pass
+
+
+@pytest.fixture(scope='session')
+def run_history(request, base_url):
+    path = request.config.getoption('--history-db')
+    if not path or path == 'off':
+        yield None
+        return
+    history = RunHistory(str(request.config.rootpath / path))
+    history.start_run(base_url=base_url)
+    yield history
+    history.close()
+
+
+@pytest.fixture(scope='function', autouse=True)
+def history_recorder(request, run_history):
+    if run_history is None:
+        yield None
+        return
+    callspec = getattr(request.node, 'callspec', None)
+    recorder = HistoryRecorder(run_history, request.node.originalname or request.node.name,
+                               scope=callspec.id if callspec else "").register()
+    yield recorder
+    recorder.unregister()
+    run_history.flush()
+
+
+@pytest.fixture(scope='function')
+def element_filter(request):
+    return request.config.getoption('--element') or None
+
+
+@pytest.fixture(scope='function')
+def prefetch(page, request):
+    """Starts PrefetchPipelines over the test's context; they are closed and reported at teardown."""
+    depth = int(request.config.getoption('--prefetch') or 0)
+    pipelines = []
+
+    def start(urls):
+        pipeline = PrefetchPipeline(page.context, urls, depth=depth)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield start
+    for pipeline in pipelines:
+        pipeline.close()
+        if not pipeline.depth or not pipeline.urls:
+            continue
+        try:
+            allure.attach(json.dumps(pipeline.report(), ensure_ascii=False, indent=2), name="Prefetch pipeline",
+                          attachment_type=allure.attachment_type.JSON)
+        except Exception:
+            pass
+
+
+@pytest.fixture(scope='function')
+def cta_verify(request):
+    return parse_verify(request.config.getoption('--cta-verify'))
+
+
+@pytest.fixture(scope='function')
+def anchor_verify(request):
+    return parse_verify(request.config.getoption('--anchor-verify'))
+
+
+@pytest.fixture(scope='function')
+def memory_watchdog(page, request):
+    watchdog = MemoryWatchdog(
+        page,
+        rss_mb=float(request.config.getoption('--memory-rss-mb') or 0),
+        heap_mb=float(request.config.getoption('--memory-heap-mb') or 0),
+        recycle_every=int(request.config.getoption('--recycle-every') or 0),
+    )
+    yield watchdog
+    watchdog.close()
+    report = watchdog.report()
+    _memory_reports.append((request.node.name, report))
+    try:
+        allure.attach(json.dumps(report, ensure_ascii=False, indent=2), name="Memory profile",
+                      attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
+
+@pytest.fixture(scope='function')
+def sampler(request, run_history):
+    callspec = getattr(request.node, 'callspec', None)
+    test = request.node.originalname or request.node.name
+    run = request.config.getoption('--sample-run')
+    if not run and run_history is None and getattr(request.config, 'cache', None) is not None:
+        # no history db: a per-test run counter in the pytest cache moves the rotation on every run
+        key = f"sampling/{test}/{callspec.id if callspec else ''}"
+        run = str(request.config.cache.get(key, -1) + 1)
+        request.config.cache.set(key, int(run))
+    sampler = RotatingSampler(
+        k=int(request.config.getoption('--sample') or 0),
+        cycle=int(request.config.getoption('--sample-cycle') or 0),
+        seed=request.config.getoption('--sample-seed'),
+        run_index=int(run) if run else None,
+        history=run_history,
+        test=test,
+        scope=callspec.id if callspec else "",
+    )
+    yield sampler
+    report = sampler.report()
+    if report:
+        _sampling_reports.append((request.node.name, report))
+        try:
+            allure.attach(json.dumps(report, ensure_ascii=False, indent=2), name="Sampling",
+                          attachment_type=allure.attachment_type.JSON)
+        except Exception:
+            pass
+
+
+@pytest.fixture(scope='function')
+def screencast(page, request):
+    mode = request.config.getoption('--screencast')
+    if mode not in ('strip', 'gif'):
+        yield None
+        return
+    try:
+        recorder = TransitionRecorder(page, os.path.join('screenshots', 'transitions'), fmt=mode,
+                                      max_ms=float(request.config.getoption('--transition-max-ms') or 0))
+    except Exception:
+        # no CDP (non-Chromium browser)
+        yield None
+        return
+    yield recorder
+    recorder.close()
+    try:
+        allure.attach(json.dumps(recorder.summary(), ensure_ascii=False, indent=2), name="Transitions",
+                      attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
+
+@pytest.fixture(scope='function')
+def click_probe(page, request):
+    probe = ClickProbe(page, parse_budget(request.config.getoption('--click-budget')))
+    yield probe
+    probe.close()
+    _click_probes.append(probe)
+    try:
+        allure.attach("\n".join(probe.ranking()), name="Most expensive interactions",
+                      attachment_type=allure.attachment_type.TEXT)
+    except Exception:
+        pass
+
+
 @pytest.fixture(scope='session')
 def base_url(request):
     # если опция плагина вернула пустую строку/None — используем DEFAULT_BASE_URL
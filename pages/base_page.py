@@ -1,6 +1,12 @@
 from playwright.sync_api import Page
 from typing import Optional
 from urllib.parse import urljoin
+from weakref import WeakKeyDictionary
+
+from .locator_cache import LocatorCache, cache_for
+
+# page -> URL, навигация на который уже запущена через BasePage.preload
+_preloaded = WeakKeyDictionary()
 
 class BasePage:
     """Minimal base page with common utilities used by Page Objects."""
@@ -9,9 +15,9 @@ class BasePage:
         self.page = page
         self.base_url = base_url
 
-    def goto(self, path: str = '/'):
+    def resolve_url(self, path: str = '/') -> str:
         """
-        Переход на страницу:
+        Строит URL для перехода:
         - если path — абсолютный URL (http:// или https://), используем как есть;
         - иначе объединяем base_url + path; если base_url пуст — используем path as-is (но лучше, если base_url задан).
         """
@@ -20,16 +26,37 @@ class BasePage:
         path = str(path)
         # Если path уже абсолютный URL — используем напрямую
         if path.startswith('http://') or path.startswith('https://') or path.startswith('//'):
-            url = path
-        else:
-            # Используем base_url, если он задан; иначе fallback к DEFAULT_BASE_URL если есть
-            base = getattr(self, "base_url", None) or None
-            if not base:
-                # если base отсутствует — пытаемся перейти по path если это полный путь (но Playwright требует валидный URL)
-                raise RuntimeError("Base URL is not configured; cannot navigate to relative path: '{}'".format(path))
-            url = urljoin(base.rstrip('/') + '/', path.lstrip('/'))
+            return path
+        # Используем base_url, если он задан; иначе fallback к DEFAULT_BASE_URL если есть
+        base = getattr(self, "base_url", None) or None
+        if not base:
+            # если base отсутствует — пытаемся перейти по path если это полный путь (но Playwright требует валидный URL)
+            raise RuntimeError("Base URL is not configured; cannot navigate to relative path: '{}'".format(path))
+        return urljoin(base.rstrip('/') + '/', path.lstrip('/'))
+
+    def goto(self, path: str = '/'):
+        url = self.resolve_url(path)
+        # страница уже была запущена на этот URL заранее (preload) — дожидаемся загрузки вместо повторного перехода
+        if _preloaded.pop(self.page, None) == url:
+            try:
+                self.page.wait_for_load_state('load')
+                return
+            except Exception:
+                pass
         self.page.goto(url)
 
+    def preload(self, url: str):
+        """Starts loading url without waiting for the load event; the next goto(url) picks it up. Returns the response."""
+        url = self.resolve_url(url)
+        response = self.page.goto(url, wait_until='commit')
+        _preloaded[self.page] = url
+        return response
+
+    @property
+    def cache(self) -> LocatorCache:
+        """Locator / handle cache of the page, shared by all page objects and reset on navigation."""
+        return cache_for(self.page)
+
     def current_url(self) -> str:
         return self.page.url
 
@@ -43,7 +70,14 @@ class BasePage:
         return self.page.click(selector, **kwargs)
 
     def find(self, selector: str):
-        return self.page.locator(selector)
+        return self.cache.locator(selector)
+
+    def resolve(self, selector: str, verify: bool = True):
+        """First element matching selector, or None; verify=False trusts a cached match (see LocatorCache)."""
+        return self.cache.resolve(selector, verify)
+
+    def handle(self, selector: str, timeout: float = 2000):
+        return self.cache.handle(selector, timeout)
 
     def execute(self, script: str, *args):
         return self.page.evaluate(script, *args)
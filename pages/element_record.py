@@ -0,0 +1,158 @@
+import hashlib
+from typing import Dict, List, Optional
+
+PREVIEW_CHARS = 300
+
+# Ancestor path of an element up to the nearest ancestor with an id (or body):
+# "#pricing>div:2>button:1". Tells apart repeated elements with the same label
+# and does not depend on the element's position in the whole document.
+PATH_OF = """(el) => {
+    const parts = [];
+    for (let n = el; n && n !== document.body; n = n.parentElement) {
+        if (n.id) { parts.unshift('#' + n.id); return parts.join('>'); }
+        let k = 1;
+        for (let s = n.previousElementSibling; s; s = s.previousElementSibling) if (s.tagName === n.tagName) k++;
+        parts.unshift(n.tagName.toLowerCase() + ':' + k);
+    }
+    return parts.join('>');
+}"""
+
+# One round trip for the whole enumeration; columns instead of per-element objects and a
+# bounded preview + hash instead of the full outerHTML (wrappers with role=button can hold
+# whole cards and inline SVGs).
+ENUMERATE = """
+([selector, previewChars]) => {
+    const fnv = (s) => {
+        let h = 0x811c9dc5;
+        for (let i = 0; i < s.length; i++) { h ^= s.charCodeAt(i); h = Math.imul(h, 0x01000193) >>> 0; }
+        return h.toString(16);
+    };
+    const cols = { text: [], href: [], id: [], cls: [], aria: [], hash: [], size: [], preview: [], path: [] };
+    const pathOf = %s;
+    for (const el of document.querySelectorAll(selector)) {
+        const outer = el.outerHTML || '';
+        cols.text.push(el.innerText || '');
+        cols.href.push(el.getAttribute('href'));
+        cols.id.push(el.getAttribute('id'));
+        cols.cls.push(el.getAttribute('class'));
+        cols.aria.push(el.getAttribute('aria-label'));
+        cols.hash.push(fnv(outer));
+        cols.size.push(outer.length);
+        cols.preview.push(outer.slice(0, previewChars));
+        cols.path.push(pathOf(el));
+    }
+    return cols;
+}
+""" % PATH_OF
+
+# Full outerHTML of one enumerated element, only if it is still the same markup.
+FETCH_OUTER = """
+([selector, index, hash]) => {
+    const el = document.querySelectorAll(selector)[index];
+    if (!el) return null;
+    const outer = el.outerHTML || '';
+    let h = 0x811c9dc5;
+    for (let i = 0; i < outer.length; i++) { h ^= outer.charCodeAt(i); h = Math.imul(h, 0x01000193) >>> 0; }
+    return h.toString(16) === hash ? outer : null;
+}
+"""
+
+# dict-style key -> column name
+_KEYS = {"text": "text", "href": "href", "id": "id", "class": "cls", "aria": "aria",
+         "hash": "hash", "size": "size", "preview": "preview", "path": "path"}
+
+
+class ElementRecord:
+    """
+    One enumerated element: a row of the column snapshot plus the page it came from.
+
+    Holds a hash and a bounded preview of outerHTML; ``outer`` fetches the full markup
+    on demand. ``get`` / ``[]`` keep the old dict interface (``b.get("text")``, ``a["href"]``).
+    """
+
+    __slots__ = ("_columns", "index", "_page", "_selector")
+
+    def __init__(self, columns: Dict[str, List], index: int, page=None, selector: Optional[str] = None):
+        self._columns = columns
+        self.index = index
+        self._page = page
+        self._selector = selector
+
+    @property
+    def columns(self) -> Dict[str, List]:
+        """The shared column snapshot this record is a row of."""
+        return self._columns
+
+    def _col(self, name: str):
+        return self._columns[name][self.index]
+
+    text = property(lambda self: self._col("text"))
+    href = property(lambda self: self._col("href"))
+    id = property(lambda self: self._col("id"))
+    cls = property(lambda self: self._col("cls"))
+    aria = property(lambda self: self._col("aria"))
+    hash = property(lambda self: self._col("hash"))
+    size = property(lambda self: self._col("size"))
+    preview = property(lambda self: self._col("preview"))
+    path = property(lambda self: self._col("path") if "path" in self._columns else None)
+
+    @property
+    def key(self) -> str:
+        """Short stable discriminator of the element (hash of its ancestor path) for step titles / history."""
+        return hashlib.sha1((self.path or "").encode("utf-8")).hexdigest()[:6]
+
+    @property
+    def removed(self) -> bool:
+        """The element left the DOM after enumeration (see utils.mutation_journal)."""
+        return self._col("hash") is None
+
+    @property
+    def outer(self) -> str:
+        """Full outerHTML (one round trip); the preview if the element is gone or changed."""
+        if self.size <= len(self.preview) or self._page is None:
+            return self.preview
+        try:
+            full = self._page.evaluate(FETCH_OUTER, [self._selector, self.index, self.hash])
+        except Exception:
+            full = None
+        return full if full is not None else self.preview
+
+    def get(self, key: str, default=None):
+        if key == "outer":
+            return self.outer
+        name = _KEYS.get(key)
+        if name is None:
+            return default
+        value = self._col(name)
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        if key != "outer" and key not in _KEYS:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __repr__(self):
+        return f"ElementRecord(#{self.index} {self.text[:40]!r} href={self.href!r} {self.size}B)"
+
+
+def enumerate_elements(page, selector: str) -> Dict[str, List]:
+    """Raw column snapshot (JSON-friendly, safe to cache between pages)."""
+    return page.evaluate(ENUMERATE, [selector, PREVIEW_CHARS])
+
+
+def apply_rows(columns: Dict[str, List], rows: Dict, removed: List[int] = ()) -> None:
+    """Updates a column snapshot in place from re-enumerated rows ({index: {column: value}})."""
+    for key, row in rows.items():
+        i = int(key)
+        for name, values in columns.items():
+            if i >= len(values):
+                values.extend([None] * (i + 1 - len(values)))
+            values[i] = row.get(name)
+    for i in removed:
+        if i < len(columns["hash"]):
+            columns["hash"][i] = None
+
+
+def records(columns: Dict[str, List], page, selector: str) -> List[ElementRecord]:
+    return [ElementRecord(columns, i, page, selector) for i in range(len(columns.get("hash") or []))]
+
@@ -0,0 +1,173 @@
+from typing import Dict, List, Optional
+from weakref import WeakKeyDictionary, proxy
+
+
+class CacheStats:
+    """
+    Lookups of every LocatorCache of the session. A hit is a saved count() or
+    element_handle() round trip; verified is a cached match re-checked with
+    count() (resolve(verify=True): no round trip saved); a miss is a fresh lookup.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.verified = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.caches = 0
+
+    def as_dict(self) -> Dict:
+        lookups = self.hits + self.verified + self.misses
+        return {
+            "pages": self.caches,
+            "hits": self.hits,
+            "verified": self.verified,
+            "misses": self.misses,
+            "hit_rate_pct": round(100.0 * self.hits / lookups, 1) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def lines(self) -> List[str]:
+        row = self.as_dict()
+        return [f"{row['hits']} hits / {row['verified']} verified / {row['misses']} misses ({row['hit_rate_pct']}% saved), "
+                f"{row['invalidations']} invalidations over {row['pages']} pages"]
+
+
+STATS = CacheStats()
+
+
+def id_selector(value: str) -> str:
+    """[id="..."] selector for any id (unlike #id, valid for ids starting with a digit or containing dots)."""
+    return '[id="%s"]' % str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+class LocatorCache:
+    """
+    Resolved locators and element handles of one page, keyed by selector.
+
+    resolve() remembers selectors that matched (count() > 0) and returns their
+    .first. By default a remembered match is re-checked with count(), so existence
+    checks always see the current DOM; resolve(verify=False) trusts it without a
+    round trip, for lookups whose entries are invalidated by the mutation journal
+    ([data-pw-idx] tags) or whose caller fails anyway when the element is gone.
+    handle() keeps the ElementHandle of a resolved selector. Misses are not
+    remembered, so elements that appear later are still found. Everything is
+    dropped when the document changes (new document, main frame URL change other
+    than the fragment) or a frame is detached; the mutation journal drops the
+    entries of removed / re-rendered elements (invalidate).
+    """
+
+    def __init__(self, page):
+        # proxy: the cache is the value of a WeakKeyDictionary keyed by the page
+        self.page = proxy(page)
+        self.hits = 0
+        self.verified = 0
+        self.misses = 0
+        self._locators: Dict[str, object] = {}
+        self._resolved: Dict[str, object] = {}
+        self._handles: Dict[str, object] = {}
+        self._document = self._document_of(getattr(page, "url", "") or "")
+        STATS.caches += 1
+        try:
+            page.on("framenavigated", self._on_navigated)
+            page.on("domcontentloaded", lambda _: self.invalidate(dispose=False))
+            page.on("framedetached", lambda _: self.invalidate(dispose=False))
+            page.on("close", lambda _: self.invalidate(dispose=False))
+        except Exception:
+            pass
+
+    @staticmethod
+    def _document_of(url: str) -> str:
+        return url.split("#", 1)[0]
+
+    def _on_navigated(self, frame):
+        try:
+            if frame != self.page.main_frame:
+                return
+            document = self._document_of(frame.url)
+        except Exception:
+            document = None
+        # same-document navigation (anchor clicks) keeps the DOM; pushState to another path does not
+        if document != self._document:
+            self._document = document
+            self.invalidate(dispose=False)
+
+    def locator(self, selector: str):
+        """page.locator(selector), created once (no round trip either way)."""
+        loc = self._locators.get(selector)
+        if loc is None:
+            loc = self._locators[selector] = self.page.locator(selector)
+        return loc
+
+    def resolve(self, selector: str, verify: bool = True):
+        """First match of selector, or None; with verify=False a cached match skips the count() round trip."""
+        if selector in self._resolved:
+            if not verify:
+                self.hits += 1
+                STATS.hits += 1
+                return self._resolved[selector]
+            self.verified += 1
+            STATS.verified += 1
+        else:
+            self.misses += 1
+            STATS.misses += 1
+        loc = None
+        try:
+            candidate = self.locator(selector)
+            if candidate.count() > 0:
+                loc = self._resolved[selector] = candidate.first
+            elif selector in self._resolved:
+                # matched before, gone now (removed by a click)
+                self.invalidate(selector)
+        except Exception:
+            loc = None
+        return loc
+
+    def handle(self, selector: str, timeout: float = 2000):
+        """ElementHandle of the first match, or None."""
+        handle = self._handles.get(selector)
+        if handle is not None:
+            self.hits += 1
+            STATS.hits += 1
+            return handle
+        loc = self.resolve(selector)
+        if loc is None:
+            return None
+        try:
+            handle = self._handles[selector] = loc.element_handle(timeout=timeout)
+        except Exception:
+            handle = None
+        return handle
+
+    def invalidate(self, selector: Optional[str] = None, dispose: bool = True):
+        """
+        Drops one selector, or everything when selector is None. Event handlers pass
+        dispose=False: handles of a replaced document are already dead.
+        """
+        selectors = [selector] if selector is not None else list(set(self._resolved) | set(self._handles))
+        for key in selectors:
+            dropped = self._resolved.pop(key, None) is not None
+            handle = self._handles.pop(key, None)
+            if handle is not None:
+                dropped = True
+            if handle is not None and dispose:
+                try:
+                    handle.dispose()
+                except Exception:
+                    pass
+            if dropped:
+                STATS.invalidations += 1
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "verified": self.verified, "misses": self.misses, "entries": len(self._resolved) + len(self._handles)}
+
+
+# page -> LocatorCache, shared by every page object of the page
+_caches = WeakKeyDictionary()
+
+
+def cache_for(page) -> LocatorCache:
+    cache = _caches.get(page)
+    if cache is None:
+        cache = _caches[page] = LocatorCache(page)
+    return cache
@@ -5,11 +5,24 @@ import uuid
 import datetime
 import allure
 
+from functools import partial
+from urllib.parse import urljoin
+
 from pages.home_page import HomePage
+from pages.locator_cache import id_selector
 from utils.soft_assert import SoftAssert
 from utils.trackers import INJECT_SCROLL_MONKEY, GET_SCROLL_TARGETS, CLEAR_SCROLL_TARGETS
 from utils.locator_utils import take_element_screenshot, get_closest_section_by_scroll
 from utils.helpers import sanitize_href, is_email_or_telegram, wait_for_scroll_finished
+from utils.hash_anchors import HashAnchorCheck
+from utils.dedup import EquivalenceGroups, anchor_signature, member_error, structure_check
+from utils import page_helpers
+from utils.static_check import FAIL, SKIP, precheck
+from utils.screencast import maybe_record
+from utils.element_filter import select_indices
+from utils.link_classifier import (
+    classify_link, collect_link_facts, StrategyStats, STRATEGY_TIMEOUTS, FALLBACK_ORDER,
+)
 from playwright.sync_api import TimeoutError as PWTimeoutError
 
 SCREENSHOT_DIR = "screenshots/anchors"
@@ -21,35 +34,175 @@ def _unique_name(prefix: str, idx: int, ext: str = "png") -> str:
     return f"{prefix}_{idx}_{ts}_{uuid.uuid4().hex[:6]}.{ext}"
 
 
-def _find_anchor_locator(page, href: str):
+def _find_anchor_locator(hp: HomePage, href: str):
+    l = hp.resolve(f'a[href="{href}"]')
+    if l is not None:
+        return l
+    token = href.split("/")[-1]
+    if token:
+        l = hp.resolve(f'a[href*="{token}"]')
+        if l is not None:
+            return l
     try:
-        l = page.locator(f'a[href="{href}"]')
+        l = hp.find('a').filter(has_text=token if token else "")
         if l.count():
             return l.first
     except Exception:
         pass
+    return None
+
+
+def _domain(url: str) -> str:
+    return url.split("//")[-1].split("/")[0] if url else ""
+
+
+def _navigated(new_url: str, original_url: str, original_domain: str) -> bool:
+    new_domain = _domain(new_url)
+    return bool((new_domain and original_domain and original_domain not in new_domain) or (new_url and new_url != original_url))
+
+
+def _verify_prefetched(newp, prefetch, href, original_url, original_domain):
+    # the destination was loaded in a background page while earlier links were checked (utils.prefetch):
+    # the popup is verified against that page instead of clicking and loading it a second time
     try:
-        token = href.split("/")[-1]
-        if token:
-            l = page.locator(f'a[href*="{token}"]')
-            if l.count():
-                return l.first
-    except Exception:
-        pass
+        status = prefetch.status(newp)
+        if status is not None and status >= 400:
+            return False, AssertionError(f"External link returned HTTP {status}: {href}")
+        if _navigated(newp.url or "", original_url, original_domain):
+            return True, None
+        return False, AssertionError(f"External link opened in popup but did not navigate: {href}")
+    finally:
+        try:
+            newp.close()
+        except Exception:
+            pass
+
+
+def _verify_popup(page, locator, href, original_url, original_domain, timeout, prefetch=None):
+    if not locator:
+        return False, AssertionError(f"Anchor locator not found for popup check: {href}")
+    newp = prefetch.take(urljoin(original_url, href), timeout) if prefetch is not None else None
+    if newp is not None:
+        return _verify_prefetched(newp, prefetch, href, original_url, original_domain)
     try:
-        l = page.locator(f'a').filter(has_text=token if token else "")
-        if l.count():
-            return l.first
-    except Exception:
-        pass
-    return None
+        with page.context.expect_page(timeout=timeout) as new_page_info:
+            try:
+                locator.click(timeout=4000)
+            except Exception:
+                locator.click(timeout=4000, force=True)
+        new_page = new_page_info.value
+        try:
+            new_page.wait_for_load_state("networkidle", timeout=10000)
+        except Exception:
+            pass
+        ok = _navigated(new_page.url or "", original_url, original_domain)
+        try:
+            new_page.close()
+        except Exception:
+            pass
+        if ok:
+            return True, None
+        return False, AssertionError(f"External link opened in popup but did not navigate: {href}")
+    except Exception as e:
+        return False, e
+
+
+def _verify_same_tab(page, locator, href, original_url, original_domain, timeout):
+    try:
+        if locator:
+            try:
+                locator.click(timeout=3000)
+            except Exception:
+                locator.click(timeout=3000, force=True)
+        else:
+            try:
+                page.evaluate(
+                    """(h) => {
+                        const el = document.querySelector(`a[href="${h}"]`) || [...document.querySelectorAll('a')].find(x => x.href && x.href.includes(h));
+                        if (el) { el.click(); return true; } return false;
+                    }""",
+                    href,
+                )
+            except Exception:
+                pass
+
+        try:
+            page.wait_for_function("old => location.href !== old", arg=original_url, timeout=timeout)
+        except PWTimeoutError:
+            return False, PWTimeoutError("Same-tab navigation did not change URL in time")
+        if page.url == original_url:
+            return False, AssertionError(f"Link clicked but URL did not change from {original_url}")
+        try:
+            page.goto(original_url)
+            page.wait_for_load_state("networkidle", timeout=10000)
+        except Exception:
+            pass
+        return True, None
+    except Exception as e:
+        return False, e
 
 
-def test_anchors_and_links(page, base_url):
+def _verify_goto(page, locator, href, original_url, original_domain, timeout):
+    newp = None
+    try:
+        newp = page.context.new_page()
+        try:
+            newp.goto(href, wait_until="networkidle", timeout=timeout)
+        except Exception:
+            pass
+        ok = _navigated(newp.url or "", original_url, original_domain)
+        if ok:
+            return True, None
+        return False, AssertionError(f'External link target appears unreachable or stayed same URL: {href}')
+    except Exception as e:
+        return False, e
+    finally:
+        try:
+            if newp:
+                newp.close()
+        except Exception:
+            pass
+
+
+def _verify_request(page, locator, href, original_url, original_domain, timeout):
+    # downloads: no navigation happens, check that the resource is served
+    try:
+        resp = page.context.request.get(urljoin(original_url, href), timeout=timeout)
+        if resp.ok:
+            return True, None
+        return False, AssertionError(f"Download link returned HTTP {resp.status}: {href}")
+    except Exception as e:
+        return False, e
+
+
+STRATEGIES = {
+    "popup": _verify_popup,
+    "same_tab": _verify_same_tab,
+    "goto": _verify_goto,
+    "request": _verify_request,
+}
+
+
+def _anchor_priority(href: str, facts: dict) -> int:
+    # hash anchors are fast and cover the page itself, external links are the slowest and flakiest
+    if href.startswith("#"):
+        return 0
+    if facts.get("same_origin"):
+        return 1
+    return 2
+
+
+def _anchor_title(idx: int, a) -> str:
+    # @key (ancestor path hash) tells apart copies of the same link in run history (utils.run_history)
+    return f'Anchor #{idx} "{(a.get("text") or "").strip()[:120]}" -> {sanitize_href(a.get("href"))} @{a.key}'
+
+
+def test_anchors_and_links(page, base_url, page_capture, time_budget, history_recorder, memory_watchdog,
+                           element_filter, sampler, prefetch, screencast, anchor_verify):
     soft = SoftAssert()
     hp = HomePage(page, base_url)
     hp.goto("/")
-    hp.wait_for_network_idle(timeout=60_000)
+    hp.wait_for_network_idle(timeout=time_budget.timeout(60_000))
 
     try:
         page.evaluate(INJECT_SCROLL_MONKEY)
@@ -57,61 +210,200 @@ def test_anchors_and_links(page, base_url):
         pass
 
     anchors = hp.list_anchors()
+    # navigation facts for every anchor in one evaluate -> one verification strategy per external link
+    link_facts = collect_link_facts(page, anchors)
+    link_stats = StrategyStats()
+
+    # static pre-check: missing #id targets, empty / malformed hrefs and mailto/tg/tel are decided
+    # from the rendered HTML alone; only the remaining anchors go to the browser phase
+    try:
+        static = precheck(page.content())
+    except Exception:
+        static = None
 
+    # crop mode: all hash targets are cropped from one full-page capture in the background
+    crop_futures = {}
+    if page_capture is not None:
+        targets = []
+        for idx, a in enumerate(anchors):
+            href = sanitize_href(a.get("href"))
+            if href and href.startswith("#") and len(href) > 1:
+                if static is not None and static.verdict(idx, a.get("href"))[0] == FAIL:
+                    continue
+                shot = os.path.join(SCREENSHOT_DIR, _unique_name(f"target_{idx}_{href[1:]}", idx))
+                targets.append((idx, f'[id="{href[1:]}"]', shot))
+        try:
+            futures = page_capture.crop_many([(sel, shot) for _, sel, shot in targets])
+            crop_futures = {idx: (fut, shot) for (idx, _, shot), fut in zip(targets, futures)}
+        except Exception:
+            crop_futures = {}
+
+    selected = select_indices(page, HomePage.ANCHOR_SELECTOR, anchors, element_filter)
+
+    queue = []
     for idx, a in enumerate(anchors):
+        if selected is not None and idx not in selected:
+            continue
+        if static is not None:
+            verdict, reason = static.verdict(idx, a.get("href"))
+            if verdict == FAIL:
+                with allure.step(_anchor_title(idx, a)):
+                    soft.add(f'Anchor #{idx} -> {a.get("href")!r}: {reason} (static check)')
+                continue
+            if verdict == SKIP:
+                continue
+        elif not sanitize_href(a.get("href")) or is_email_or_telegram(sanitize_href(a.get("href"))):
+            continue
+        queue.append((idx, a))
+    if static is not None:
+        try:
+            allure.attach(json.dumps({**static.summary(), "failures": static.failures()}, ensure_ascii=False, indent=2),
+                          name="Static pre-check", attachment_type=allure.attachment_type.JSON)
+        except Exception:
+            pass
+
+    # sampling mode: a rotating, section x kind stratified subset; full coverage over --sample-cycle runs
+    if sampler.enabled:
+        try:
+            sections = page_helpers.sections_of(page, HomePage.ANCHOR_SELECTOR)
+        except Exception:
+            sections = []
+        keep = sampler.select([
+            (idx, _anchor_title(idx, a), sections[idx] if idx < len(sections) else "body",
+             "hash" if (sanitize_href(a.get("href")) or "").startswith("#") else classify_link(link_facts[idx])[0])
+            for idx, a in queue
+        ])
+        queue = [item for item in queue if item[0] in keep]
+
+    queue = time_budget.order(queue, lambda item: _anchor_priority(sanitize_href(item[1].get("href")), link_facts[item[0]]))
+
+    # identical links (header / body / footer copies): one full check per group, members get a structural check
+    groups = EquivalenceGroups(
+        [anchor_signature(sanitize_href(a.get("href")) or "", link_facts[i], classify_link(link_facts[i])[0], base_url)
+         for i, a in enumerate(anchors)],
+        order=[idx for idx, _ in queue],
+    )
+    queue = groups.split(queue)
+    member_checks = None
+
+    # --prefetch K: destinations of popup links start loading in background pages K links ahead of their
+    # check, which then verifies the loaded page instead of clicking; the memory watchdog leaves them open
+    prefetch_urls = []
+    for idx, a in queue:
+        url = urljoin(page.url, sanitize_href(a.get("href")) or "")
+        if not groups.is_member(idx) and url.startswith(("http://", "https://")) \
+                and classify_link(link_facts[idx])[0] == "popup":
+            prefetch_urls.append(url)
+    pipeline = prefetch(prefetch_urls)
+    memory_watchdog.keep(pipeline.owns)
+    strategies = dict(STRATEGIES, popup=partial(_verify_popup, prefetch=pipeline))
+
+    # #id anchors: existence, visibility and landing scroll position of all of them in one evaluate;
+    # only anchors with JS click handlers and a verify sample are clicked (an --element run clicks everything)
+    profiling = selected is not None and not (element_filter or "").startswith("shard:")
+    hash_check = HashAnchorCheck.build(
+        page, HomePage.ANCHOR_SELECTOR, link_facts,
+        [idx for idx, a in queue if not groups.is_member(idx) and (sanitize_href(a.get("href")) or "").startswith("#")],
+        verify=None if profiling else anchor_verify,
+    )
+
+    memory_watchdog.on_recycle(lambda: page.evaluate(INJECT_SCROLL_MONKEY))
+
+    for n, (idx, a) in enumerate(queue):
+        memory_watchdog.boundary(f"before Anchor #{idx}")
         href = sanitize_href(a.get("href"))
         text = (a.get("text") or "").strip()[:120]
-        outer_html = a.get("outer", "")
+        outer_preview = a.preview
 
-        if not href or is_email_or_telegram(href):
+        step_title = _anchor_title(idx, a)
+        if not time_budget.begin(step_title, len(queue) - n):
             continue
-
-        step_title = f'Anchor #{idx} "{text}" -> {href}'
+        errors_before = len(soft.errors)
 
         try:
+            rep = groups.representative_of(idx)
+            if groups.is_member(idx) and groups.result(rep) is not None:
+                if member_checks is None:
+                    member_checks = structure_check(page, HomePage.ANCHOR_SELECTOR,
+                                                    [i for i, _ in queue if groups.is_member(i)])
+                with allure.step(step_title):
+                    allure.attach(f"Same link as Anchor #{rep}; verified by its full check plus a structural check",
+                                  name=f"dedup_{idx}", attachment_type=allure.attachment_type.TEXT)
+                    err = member_error(groups, idx, member_checks.get(idx), expected_href=a.get("href"))
+                    if err:
+                        raise AssertionError(err)
+                continue
+
             with allure.step(step_title):
                 try:
                     page.evaluate(CLEAR_SCROLL_TARGETS)
                 except Exception:
                     pass
 
-                if outer_html:
-                    try:
-                        allure.attach(outer_html, name=f"anchor_outer_{idx}", attachment_type=allure.attachment_type.TEXT)
-                    except Exception:
-                        pass
-
+                # full markup is fetched once, only for the element being checked
                 try:
-                    loc = _find_anchor_locator(page, href)
-                    if loc:
-                        try:
-                            evaluated_html = loc.evaluate("el => el.outerHTML")
-                            allure.attach(evaluated_html, name=f"anchor_evaluated_{idx}", attachment_type=allure.attachment_type.TEXT)
-                        except Exception:
-                            pass
+                    outer_html = a.outer
+                    if outer_html:
+                        allure.attach(outer_html, name=f"anchor_outer_{idx}", attachment_type=allure.attachment_type.TEXT)
                 except Exception:
                     pass
 
                 # --- internal anchor handling ---
                 if href.startswith("#"):
                     target_id = href[1:]
-                    exists = False
-                    try:
-                        exists = page.evaluate("id => !!document.getElementById(id)", target_id)
-                    except Exception:
-                        exists = False
-                    if not exists:
+                    if not hash_check.needs_click(idx):
+                        try:
+                            allure.attach(json.dumps(hash_check.entry(idx), ensure_ascii=False, indent=2),
+                                          name=f"hash_check_{idx}", attachment_type=allure.attachment_type.JSON)
+                        except Exception:
+                            pass
+                        err = hash_check.error(idx)
+                        if err:
+                            raise AssertionError(err)
+                        # evidence without a click: the target cropped from the page capture, if crop mode is on
+                        future, shot = crop_futures.get(idx, (None, None))
+                        try:
+                            if future is not None and future.result():
+                                allure.attach.file(shot, name=f'Anchor #{idx} screenshot',
+                                                   attachment_type=allure.attachment_type.PNG)
+                        except Exception:
+                            pass
+                        continue
+
+                    target = hp.resolve(id_selector(target_id))
+                    if target is None:
                         raise AssertionError(f"Target id '{target_id}' not found")
 
                     try:
-                        try:
-                            hp.click_anchor_by_href(href)
-                        except Exception:
-                            hp.click_by_outer(outer_html)
-                        wait_for_scroll_finished(page, timeout=3000)
+                        with maybe_record(screencast, f"anchor_{idx}", time_budget.timeout(3000)) as transition:
+                            try:
+                                hp.click_anchor_by_href(href)
+                            except Exception:
+                                hp.click_by_outer(outer_preview)
+                            wait_for_scroll_finished(page, timeout=time_budget.timeout(3000))
                     except Exception as e:
                         raise AssertionError(f"Clicking anchor failed: {e}")
 
+                    err = hash_check.check_scroll(page, idx)
+                    if err:
+                        soft.add(f'Anchor #{idx} "{text}" -> {href}: {err}')
+
+                    if transition:
+                        try:
+                            if transition.get("path"):
+                                kind = allure.attachment_type.GIF if transition["path"].endswith(".gif") \
+                                    else allure.attachment_type.JPG
+                                allure.attach.file(transition["path"], name=f"Anchor #{idx} scroll",
+                                                   attachment_type=kind)
+                            allure.attach(json.dumps({k: v for k, v in transition.items() if k != "path"},
+                                                     ensure_ascii=False, indent=2),
+                                          name=f"scroll_timing_{idx}", attachment_type=allure.attachment_type.JSON)
+                        except Exception:
+                            pass
+                        err = screencast.violation(transition)
+                        if err:
+                            soft.add(f'Anchor #{idx} "{text}" -> {href}: scroll {err}')
+
                     try:
                         scroll_targets = page.evaluate(GET_SCROLL_TARGETS) or []
                         if scroll_targets:
@@ -128,123 +420,62 @@ def test_anchors_and_links(page, base_url):
                     except Exception:
                         pass
 
-                    try:
-                        locator = page.locator(f"#{target_id}")
-                        shot = os.path.join(SCREENSHOT_DIR, _unique_name(f"target_{idx}_{target_id}", idx))
-                        take_element_screenshot(locator, shot, ensure_visible=True)
-                        # attach only on success
+                    cropped = None
+                    if idx in crop_futures:
+                        future, shot = crop_futures[idx]
+                        try:
+                            cropped = future.result() if future else None
+                        except Exception:
+                            cropped = None
+                    if cropped:
                         try:
                             allure.attach.file(shot, name=f'Anchor #{idx} screenshot', attachment_type=allure.attachment_type.PNG)
+                            allure.attach(json.dumps(cropped, ensure_ascii=False, indent=2),
+                                          name=f"crop_meta_{idx}", attachment_type=allure.attachment_type.JSON)
                         except Exception:
                             pass
-                    except Exception as e:
-                        raise AssertionError(f"Failed to capture target screenshot: {e}")
-
-                else:
-                    # --- external link handling ---
-                    original_url = page.url
-                    original_domain = base_url.split("//")[-1].split("/")[0] if base_url else ""
-                    locator = _find_anchor_locator(page, href)
-                    success = False
-                    last_err = None
-
-                    # strategy A: popup
-                    if locator:
+                    else:
                         try:
-                            with page.context.expect_page(timeout=5000) as new_page_info:
-                                try:
-                                    locator.click(timeout=4000)
-                                except Exception:
-                                    locator.click(timeout=4000, force=True)
-                            new_page = new_page_info.value
+                            shot = os.path.join(SCREENSHOT_DIR, _unique_name(f"target_{idx}_{target_id}", idx))
+                            take_element_screenshot(target, shot, ensure_visible=True)
+                            # attach only on success
                             try:
-                                new_page.wait_for_load_state("networkidle", timeout=10000)
+                                allure.attach.file(shot, name=f'Anchor #{idx} screenshot', attachment_type=allure.attachment_type.PNG)
                             except Exception:
                                 pass
-                            new_url = new_page.url or ""
-                            new_domain = new_url.split("//")[-1].split("/")[0] if new_url else ""
-                            if (new_domain and original_domain and original_domain not in new_domain) or (new_url and new_url != original_url):
-                                success = True
-                                try:
-                                    new_page.close()
-                                except Exception:
-                                    pass
-                            else:
-                                try:
-                                    new_page.close()
-                                except Exception:
-                                    pass
-                                last_err = AssertionError(f"External link opened in popup but did not navigate: {href}")
                         except Exception as e:
-                            last_err = e
+                            raise AssertionError(f"Failed to capture target screenshot: {e}")
 
-                    # strategy B: same-tab click
-                    if not success:
-                        try:
-                            if locator:
-                                try:
-                                    locator.click(timeout=3000)
-                                except Exception:
-                                    locator.click(timeout=3000, force=True)
-                            else:
-                                try:
-                                    page.evaluate(
-                                        """(h) => {
-                                            const el = document.querySelector(`a[href="${h}"]`) || [...document.querySelectorAll('a')].find(x => x.href && x.href.includes(h));
-                                            if (el) { el.click(); return true; } return false;
-                                        }""",
-                                        href,
-                                    )
-                                except Exception:
-                                    pass
-
-                            try:
-                                page.wait_for_function("old => location.href !== old", arg=original_url, timeout=7000)
-                                new_url = page.url
-                                if new_url != original_url:
-                                    success = True
-                                    try:
-                                        page.goto(original_url)
-                                        page.wait_for_load_state("networkidle", timeout=10000)
-                                    except Exception:
-                                        pass
-                                else:
-                                    last_err = AssertionError(f"Link clicked but URL did not change from {original_url}")
-                            except PWTimeoutError:
-                                last_err = PWTimeoutError("Same-tab navigation did not change URL in time")
-                        except Exception as e:
-                            last_err = e
+                else:
+                    # --- external link handling ---
+                    original_url = page.url
+                    original_domain = base_url.split("//")[-1].split("/")[0] if base_url else ""
+                    locator = _find_anchor_locator(hp, href)
+                    strategy, timeout, reason = classify_link(link_facts[idx])
+                    try:
+                        allure.attach(json.dumps({"strategy": strategy, "timeout_ms": timeout, "reason": reason,
+                                                  "facts": link_facts[idx]}, ensure_ascii=False, indent=2),
+                                      name=f"link_strategy_{idx}", attachment_type=allure.attachment_type.JSON)
+                    except Exception:
+                        pass
 
-                    # strategy C: manual goto
+                    success, last_err = strategies[strategy](page, locator, href, original_url, original_domain,
+                                                             time_budget.timeout(timeout))
+                    actual = strategy if success else None
+                    # misprediction: fall back to the remaining strategies to learn what actually works
                     if not success:
-                        newp = None
-                        try:
-                            newp = page.context.new_page()
-                            try:
-                                newp.goto(href, wait_until="networkidle", timeout=15000)
-                            except Exception:
-                                pass
-                            new_url = newp.url or ""
-                            new_domain = new_url.split("//")[-1].split("/")[0] if new_url else ""
-                            if (new_domain and original_domain and original_domain not in new_domain) or (new_url and new_url != original_url):
-                                success = True
-                                try:
-                                    newp.close()
-                                except Exception:
-                                    pass
-                            else:
-                                try:
-                                    newp.close()
-                                except Exception:
-                                    pass
-                                last_err = AssertionError(f'External link target appears unreachable or stayed same URL: {href}')
-                        except Exception as e:
-                            try:
-                                if newp:
-                                    newp.close()
-                            except Exception:
-                                pass
-                            last_err = e
+                        for fallback in FALLBACK_ORDER:
+                            if fallback == strategy:
+                                continue
+                            if history_recorder is not None:
+                                history_recorder.note_retry()
+                            ok, err = strategies[fallback](page, locator, href, original_url, original_domain,
+                                                           time_budget.timeout(STRATEGY_TIMEOUTS[fallback]))
+                            if ok:
+                                success, actual = True, fallback
+                                break
+                            last_err = err
+                    link_stats.record(strategy, actual)
 
                     if not success:
                         raise AssertionError(str(last_err) if last_err else f"External link unknown failure: {href}")
@@ -256,5 +487,27 @@ def test_anchors_and_links(page, base_url):
                 pass
             soft.add(f'Anchor #{idx} "{text}" -> {href}: {ae}')
             continue
+        finally:
+            time_budget.end()
+            if not groups.is_member(idx):
+                groups.record(idx, len(soft.errors) == errors_before, "; ".join(soft.errors[errors_before:]))
+
+    try:
+        allure.attach(json.dumps(groups.summary(), ensure_ascii=False, indent=2),
+                      name="Link deduplication", attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
+    try:
+        allure.attach(json.dumps(hash_check.summary(), ensure_ascii=False, indent=2),
+                      name="Hash anchor bulk check", attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+    if link_stats.predicted:
+        try:
+            allure.attach(json.dumps(link_stats.as_dict(), ensure_ascii=False, indent=2),
+                          name="Link strategy prediction stats", attachment_type=allure.attachment_type.JSON)
+        except Exception:
+            pass
 
     soft.assert_all()
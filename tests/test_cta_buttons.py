@@ -8,11 +8,20 @@ import allure
 
 from typing import Optional, Tuple, Dict, Any
 
+from pages.element_record import ElementRecord
 from pages.home_page import HomePage
+from pages.locator_cache import id_selector
+from utils import page_helpers
 from utils.soft_assert import SoftAssert
 from utils.trackers import INJECT_SCROLL_MONKEY, CLEAR_SCROLL_TARGETS, GET_SCROLL_TARGETS
 from utils.locator_utils import get_closest_section_by_scroll
 from utils.helpers import wait_for_scroll_finished, device_pixel_ratio
+from utils.carousel import CarouselDriver, wait_for_settle
+from utils.mutation_journal import MutationJournal
+from utils.screencast import maybe_record
+from utils.target_map import TargetMap
+from utils.element_filter import select_indices
+from utils.dedup import BUTTON_SIGNATURES, EquivalenceGroups, button_signature, member_error, structure_check
 
 SCREENSHOT_DIR = "screenshots/cta"
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
@@ -202,39 +211,33 @@ def _locator_screenshot_with_fallbacks(page, locator, shot_path: str) -> Tuple[O
         return None, None
 
 
-def _find_button_locator(page, b: dict, idx: Optional[int] = None):
+def _find_button_locator(hp: HomePage, b: ElementRecord, idx: Optional[int] = None):
     """
-    Find a reliable locator for a button dict returned from page object.
+    Find a reliable locator for a button record returned from page object.
     Priority: data-pw-idx -> id -> visible text -> first class token -> outerHTML
+    Selector lookups go through the page's locator cache; index tags are trusted without
+    a round trip (the mutation journal invalidates them).
     """
+    page = hp.page
     # prefer data-pw-idx if present (we sometimes add it)
     if idx is not None:
-        try:
-            l = page.locator(f'[data-pw-idx="{idx}"]')
-            if l.count() > 0:
-                return l.first
-        except Exception:
-            pass
+        l = hp.resolve(f'[data-pw-idx="{idx}"]', verify=False)
+        if l is not None:
+            return l
 
     # by id
     el_id = b.get("id")
     if el_id:
-        try:
-            l = page.locator(f"#{el_id}")
-            if l.count() > 0:
-                return l.first
-        except Exception:
-            pass
+        l = hp.resolve(f"#{el_id}")
+        if l is not None:
+            return l
 
     # by exact visible text (button)
     txt = (b.get("text") or "").strip()
     if txt:
-        try:
-            l = page.locator(f'button:has-text("{txt}")')
-            if l.count() > 0:
-                return l.first
-        except Exception:
-            pass
+        l = hp.resolve(f'button:has-text("{txt}")')
+        if l is not None:
+            return l
 
     # by first class token
     cls = (b.get("class") or "").strip()
@@ -242,33 +245,20 @@ def _find_button_locator(page, b: dict, idx: Optional[int] = None):
         for part in cls.split()[:3]:
             if not part:
                 continue
-            try:
-                l = page.locator(f".{part}")
-                if l.count() > 0:
-                    return l.first
-            except Exception:
-                pass
+            l = hp.resolve(f".{part}")
+            if l is not None:
+                return l
 
     # outerHTML fallback: mark first matching node with data attr then return it
-    outer = (b.get("outer") or "").strip()
+    outer = (b.get("preview") or "").strip()
     if outer:
-        snippet = outer[:240].replace('"', '\\"').replace("\n", " ")
         try:
-            ok = page.evaluate(
-                """(snippet) => {
-                    const nodes = [...document.querySelectorAll('*')].filter(n => n.outerHTML && n.outerHTML.includes(snippet));
-                    if (!nodes.length) return false;
-                    nodes[0].setAttribute('data-pw-found', '1');
-                    return true;
-                }""",
-                snippet,
-            )
-            if ok:
+            if page_helpers.tag_by_outer(page, outer[:240], "data-pw-found"):
                 l = page.locator('[data-pw-found="1"]')
                 if l.count() > 0:
                     # cleanup attribute but return the locator
                     try:
-                        page.evaluate("() => document.querySelectorAll('[data-pw-found]').forEach(n=>n.removeAttribute('data-pw-found'))")
+                        page_helpers.untag(page, "data-pw-found")
                     except Exception:
                         pass
                     return l.first
@@ -284,40 +274,13 @@ def _get_target_id_from_button_locator(btn_locator) -> Optional[Dict[str, str]]:
     Returns dict {'id': id, 'source': source} or None.
     """
     try:
-        info = btn_locator.evaluate(
-            """el => {
-                try {
-                    let n = el;
-                    while (n) {
-                        try {
-                            if (n.tagName && n.tagName.toLowerCase() === 'a') {
-                                const href = n.getAttribute('href');
-                                if (href && href.startsWith('#') && href.length>1) return {id: href.slice(1), source: 'href'};
-                            }
-                            const attrs = ['data-target','data-href','aria-controls','data-bs-target','data-target-id'];
-                            for (const a of attrs) {
-                                try {
-                                    const v = n.getAttribute && n.getAttribute(a);
-                                    if (v) {
-                                        if (v.startsWith('#')) return {id: v.replace(/^#/,'') , source: a};
-                                        const m = String(v).match(/#([A-Za-z0-9-_]+)/);
-                                        if (m) return {id: m[1], source: a};
-                                    }
-                                } catch(e){}
-                            }
-                        } catch(e){}
-                        n = n.parentElement;
-                    }
-                } catch(e){}
-                return null;
-            }"""
-        )
-        return info
+        return page_helpers.target_of(btn_locator)
     except Exception:
         return None
 
 
-def _click_button(hp: HomePage, page, b: dict, btn_locator=None) -> Tuple[bool, Optional[str]]:
+def _click_button(hp: HomePage, page, b: ElementRecord, btn_locator=None, click_timeout: int = 5000,
+                  scroll_timeout: int = 6000) -> Tuple[bool, Optional[str]]:
     """
     Clicks button: prefer btn_locator; fallback by outerHTML via page.evaluate.
     Returns (ok, reason).
@@ -344,25 +307,25 @@ def _click_button(hp: HomePage, page, b: dict, btn_locator=None) -> Tuple[bool,
                     return False, "disabled"
             except Exception:
                 pass
-            btn_locator.click(timeout=5000)
+            btn_locator.click(timeout=click_timeout)
             clicked = True
         except Exception:
             # fallback to outer click
             try:
-                hp.click_by_outer(b.get("outer") or "")
+                hp.click_by_outer(b.get("preview") or "")
                 clicked = True
             except Exception as e:
                 return False, str(e)
     else:
         # fallback: outerHTML click
         try:
-            hp.click_by_outer(b.get("outer") or "")
+            hp.click_by_outer(b.get("preview") or "")
             clicked = True
         except Exception as e:
             return False, str(e)
 
     if clicked:
-        wait_for_scroll_finished(page, timeout=6000)
+        wait_for_scroll_finished(page, timeout=scroll_timeout)
         return True, None
     return False, "not_clicked"
 
@@ -370,66 +333,58 @@ def _click_button(hp: HomePage, page, b: dict, btn_locator=None) -> Tuple[bool,
 # ----------------- helper: wait for element animations / transforms to finish -----------------
 def wait_for_element_animations_and_transform(page, locator, timeout: int = 3000):
     """
-    Wait until element animations (Web Animations API) are not running and computed
-    transform/opacity/filter values stabilize for a short period.
+    Wait until element animations / transitions are finished and the element stops moving.
+    Event-driven (animation finished promises + animation frames), see utils.carousel.wait_for_settle.
     """
+    wait_for_settle(page, locator, timeout=timeout)
+# -----------------------------------------------------------------------------------------------
+
+
+def _record_click_perf(soft: SoftAssert, perf: Dict[str, Any], btn_text: str, idx: int) -> None:
     try:
-        # wait for no running animations (best-effort)
-        try:
-            page.wait_for_function(
-                "(el) => { try { return !(el.getAnimations && el.getAnimations().some(a=>a.playState==='running')); } catch(e){ return true; } }",
-                locator,
-                timeout=timeout,
-            )
-        except Exception:
-            pass
+        allure.attach(json.dumps(perf, ensure_ascii=False, indent=2), name=f"click_perf_{idx}", attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+    for v in perf.get("violations") or []:
+        soft.add(f"CTA '{btn_text}' click over budget: {v}")
 
-        # now wait until transform/opacity/filter stop changing for short period
-        try:
-            page.wait_for_function(
-                """(el) => {
-                    try {
-                        const getState = () => {
-                            const s = getComputedStyle(el);
-                            return s.transform + '|' + s.opacity + '|' + s.filter;
-                        };
-                        let prev = getState();
-                        return new Promise((resolve) => {
-                            let checks = 0;
-                            const id = setInterval(() => {
-                                const cur = getState();
-                                if (cur === prev) {
-                                    checks += 1;
-                                    if (checks >= 3) {
-                                        clearInterval(id);
-                                        resolve(true);
-                                    }
-                                } else {
-                                    checks = 0;
-                                    prev = cur;
-                                }
-                            }, 60);
-                            // safety timeout handled by Playwright wait_for_function timeout
-                        });
-                    } catch(e) { return true; }
-                }""",
-                locator,
-                timeout=timeout,
-            )
-        except Exception:
-            pass
+
+def _record_transition(soft: SoftAssert, recorder, transition: Dict[str, Any], btn_text: str, idx: int) -> None:
+    if not transition:
+        return
+    try:
+        if transition.get("path"):
+            kind = allure.attachment_type.GIF if transition["path"].endswith(".gif") else allure.attachment_type.JPG
+            allure.attach.file(transition["path"], name=f"transition_{idx}", attachment_type=kind)
+        allure.attach(json.dumps({k: v for k, v in transition.items() if k != "path"}, ensure_ascii=False, indent=2),
+                      name=f"transition_timing_{idx}", attachment_type=allure.attachment_type.JSON)
     except Exception:
         pass
-# -----------------------------------------------------------------------------------------------
+    err = recorder.violation(transition)
+    if err:
+        soft.add(f"CTA '{btn_text}' (#{idx}): {err}")
+
+
+def _cta_priority(b: ElementRecord) -> int:
+    # regular CTAs first, carousel controls (many clicks per carousel) last
+    outer = (b.get("preview") or "").lower()
+    return 1 if any(k in outer for k in ("carousel", "swiper", "splide", "slick", "glide")) else 0
+
+
+def _cta_title(idx: int, b: ElementRecord) -> str:
+    btn_text = (b.get("text") or "").strip()[:80] or f"NO_TEXT_{idx}"
+    # @key (ancestor path hash) tells apart repeated CTAs with the same label in run history (utils.run_history)
+    return f'CTA #{idx} "{btn_text}" @{b.key}'
 
 
-def test_cta_buttons_scroll(page, base_url):
+def test_cta_buttons_scroll(page, base_url, click_probe, page_capture, time_budget, memory_watchdog,
+                            element_filter, sampler, cta_verify, screencast):
     soft = SoftAssert()
     hp = HomePage(page, base_url)
 
     # open page
     hp.goto("/")
-    hp.wait_for_network_idle(timeout=60_000)
+    hp.wait_for_network_idle(timeout=time_budget.timeout(60_000))
 
     # inject simple tracker that records scrollIntoView calls
     try:
@@ -440,26 +395,109 @@ def test_cta_buttons_scroll(page, base_url):
     # collect buttons snapshot from page object
     buttons = hp.list_buttons()
 
-    # optionally tag nodes with index attribute to help locate exact node later
+    # tag nodes with index attribute to help locate exact node later; the mutation journal keeps
+    # the tags and the snapshot valid when clicks open modals or re-render sections
+    journal = MutationJournal(page, HomePage.BUTTON_SELECTOR, "data-pw-idx", cache=hp.cache)
     try:
-        page.evaluate(
-            """
-            () => {
-                const nodes = [...document.querySelectorAll("button, [role='button'], a[role='button']")];
-                nodes.forEach((n,i) => { try { n.setAttribute('data-pw-idx', String(i)); } catch(e) {} });
-                return nodes.length;
-            }
-            """
-        )
+        journal.start()
     except Exception:
-        pass
+        try:
+            page_helpers.tag_all(page, HomePage.BUTTON_SELECTOR, "data-pw-idx")
+        except Exception:
+            pass
+
+    # after a memory recycle (page reloaded) the trackers and the tagging are restored
+    memory_watchdog.on_recycle(lambda: page.evaluate(INJECT_SCROLL_MONKEY))
+    memory_watchdog.on_recycle(journal.start)
 
-    for idx, b in enumerate(buttons):
+    # carousel key -> index of the CTA whose click triggered the one-pass slide traversal
+    traversed_carousels: Dict[str, int] = {}
+
+    queue = time_budget.order(list(enumerate(buttons)), lambda item: _cta_priority(item[1]))
+    selected = select_indices(page, HomePage.BUTTON_SELECTOR, buttons, element_filter)
+    if selected is not None:
+        queue = [item for item in queue if item[0] in selected]
+
+    # sampling mode: a rotating, section x kind stratified subset; full coverage over --sample-cycle runs
+    if sampler.enabled:
+        try:
+            sections = page_helpers.sections_of(page, HomePage.BUTTON_SELECTOR)
+        except Exception:
+            sections = []
+        keep = sampler.select([
+            (idx, _cta_title(idx, b), sections[idx] if idx < len(sections) else "body",
+             "carousel" if _cta_priority(b) else "cta")
+            for idx, b in queue
+        ])
+        queue = [item for item in queue if item[0] in keep]
+
+    # static button -> target map (one pass, with target offsets): resolved CTAs are not clicked,
+    # except a verify sample; an --element run clicks everything (a work queue shard is a slice of a full run)
+    profiling = selected is not None and not (element_filter or "").startswith("shard:")
+    targets = TargetMap.build(page, HomePage.BUTTON_SELECTOR, [bool(_cta_priority(b)) for b in buttons],
+                              verify=None if profiling else cta_verify)
+
+    # identical CTAs (same label and target): one full check per group, members get a structural check
+    try:
+        signatures = page.evaluate(BUTTON_SIGNATURES, HomePage.BUTTON_SELECTOR) or []
+    except Exception:
+        signatures = []
+    if len(signatures) != len(buttons):
+        signatures = [None] * len(buttons)
+    groups = EquivalenceGroups([button_signature(sig) for sig in signatures], order=[idx for idx, _ in queue])
+    queue = groups.split(queue)
+    member_checks = None
+
+    for n, (idx, b) in enumerate(queue):
+        memory_watchdog.boundary(f"before CTA #{idx}")
+        # re-enumerate only what earlier clicks removed / re-rendered / added
+        try:
+            changes = journal.refresh(buttons)
+            targets.forget(changes["removed"] + changes["changed"])
+            # CTAs added by earlier clicks (modal buttons, lazy sections) join the end of the queue
+            added = [(i, buttons[i]) for i in changes["added"]
+                     if i < len(buttons) and (selected is None or i in selected)]
+            if added and sampler.enabled:
+                keep = sampler.extend([(i, _cta_title(i, b), "body", "cta") for i, b in added])
+                added = [item for item in added if item[0] in keep]
+            queue.extend(added)
+        except Exception:
+            pass
         btn_text = (b.get("text") or "").strip()[:80] or f"NO_TEXT_{idx}"
-        step_title = f'CTA #{idx} "{btn_text}"'
+        step_title = _cta_title(idx, b)
+        if not time_budget.begin(step_title, len(queue) - n):
+            continue
+        errors_before = len(soft.errors)
+
+        if b.removed:
+            with allure.step(step_title):
+                allure.attach("Element was removed from the DOM by an earlier click",
+                              name=f"removed_{idx}", attachment_type=allure.attachment_type.TEXT)
+            time_budget.end()
+            continue
 
         with allure.step(step_title):
             try:
+                rep = groups.representative_of(idx)
+                if groups.is_member(idx) and groups.result(rep) is not None:
+                    if member_checks is None:
+                        member_checks = structure_check(page, HomePage.BUTTON_SELECTOR,
+                                                        [i for i, _ in queue if groups.is_member(i)],
+                                                        attr="data-pw-idx")
+                    allure.attach(f"Same CTA as CTA #{rep}; verified by its full check plus a structural check",
+                                  name=f"dedup_{idx}", attachment_type=allure.attachment_type.TEXT)
+                    err = member_error(groups, idx, member_checks.get(idx))
+                    if err:
+                        soft.add(f"CTA '{btn_text}': {err}")
+                    continue
+
+                # target resolved statically (exists, button rendered and enabled): no click needed
+                static = targets.skip_click(idx)
+                if static is not None:
+                    allure.attach(json.dumps(static, ensure_ascii=False, indent=2), name=f"static_target_{idx}",
+                                  attachment_type=allure.attachment_type.JSON)
+                    continue
+
                 # clear previous tracked targets
                 try:
                     page.evaluate(CLEAR_SCROLL_TARGETS)
@@ -467,20 +505,13 @@ def test_cta_buttons_scroll(page, base_url):
                     pass
 
                 # find locator for this button (prefer indexed locator)
-                btn_locator = _find_button_locator(page, b, idx=idx)
+                btn_locator = _find_button_locator(hp, b, idx=idx)
 
-                # attach outerHTML for debug
+                # attach outerHTML for debug (full markup fetched once, only for the checked element)
                 try:
-                    outer_html = b.get("outer") or ""
+                    outer_html = b.outer
                     if outer_html:
                         allure.attach(outer_html, name=f"clicked_outer_{idx}", attachment_type=allure.attachment_type.TEXT)
-                    if btn_locator:
-                        # attach the evaluated outerHTML as well if available
-                        try:
-                            val = btn_locator.evaluate("el => el.outerHTML")
-                            allure.attach(val, name=f"clicked_outer_evaluated_{idx}", attachment_type=allure.attachment_type.TEXT)
-                        except Exception:
-                            pass
                 except Exception:
                     pass
 
@@ -491,14 +522,21 @@ def test_cta_buttons_scroll(page, base_url):
                         is_carousel = _is_carousel_button(btn_locator)
                     else:
                         # if no locator but outer mentions carousel slot
-                        outer = (b.get("outer") or "").lower()
+                        outer = (b.get("preview") or "").lower()
                         if "carousel" in outer or "swiper" in outer or "carousel-prev" in outer or "carousel-next" in outer:
                             is_carousel = True
                 except Exception:
                     is_carousel = False
 
                 if is_carousel:
-                    ok, reason = _click_button(hp, page, b, btn_locator=btn_locator)
+                    with maybe_record(screencast, f"carousel_{idx}", time_budget.timeout(5000)) as transition, \
+                            click_probe.measure(step_title) as perf:
+                        ok, reason = _click_button(hp, page, b, btn_locator=btn_locator,
+                                                   click_timeout=time_budget.timeout(5000),
+                                                   scroll_timeout=time_budget.timeout(6000))
+                    if ok:
+                        _record_click_perf(soft, perf, btn_text, idx)
+                        _record_transition(soft, screencast, transition, btn_text, idx)
                     try:
                         tg = page.evaluate(GET_SCROLL_TARGETS) or []
                         allure.attach(json.dumps(tg, ensure_ascii=False, indent=2), name=f"GET_SCROLL_TARGETS_after_click_{idx}", attachment_type=allure.attachment_type.JSON)
@@ -509,6 +547,34 @@ def test_cta_buttons_scroll(page, base_url):
                         soft.add(f"Carousel button '{btn_text}' click failed: {reason}")
                         continue
 
+                    # known library -> walk all slides once, other controls of the same carousel only settle
+                    driver = CarouselDriver(page, btn_locator) if btn_locator else None
+                    info = driver.detect() if driver else None
+                    if info and info.get("key") in traversed_carousels:
+                        driver.settle(timeout=time_budget.timeout(3000))
+                        allure.attach(
+                            f"Slides of carousel ({info.get('library')}) were captured on CTA #{traversed_carousels[info['key']]}",
+                            name=f"carousel_covered_{idx}", attachment_type=allure.attachment_type.TEXT,
+                        )
+                        continue
+                    if info:
+                        traversed_carousels[info["key"]] = idx
+                        prefix = os.path.splitext(_unique_name("carousel", idx))[0]
+                        frames = driver.traverse(SCREENSHOT_DIR, prefix, timeout=time_budget.timeout(3000))
+                        for fr in frames:
+                            if fr.get("path"):
+                                try:
+                                    allure.attach.file(fr["path"], name=f"{step_title} - slide {fr.get('slide')}", attachment_type=allure.attachment_type.PNG)
+                                except Exception:
+                                    pass
+                        try:
+                            allure.attach(json.dumps({"library": info.get("library"), "frames": frames}, ensure_ascii=False, indent=2),
+                                          name=f"carousel_traversal_{idx}", attachment_type=allure.attachment_type.JSON)
+                        except Exception:
+                            pass
+                        if frames:
+                            continue
+
                     # Try to find slider container nearby (heuristic)
                     shot_name = _unique_name("carousel_view", idx)
                     shot_path = os.path.join(SCREENSHOT_DIR, shot_name)
@@ -516,13 +582,7 @@ def test_cta_buttons_scroll(page, base_url):
                     # Prefer the outermost carousel element first
                     carousel = None
                     try:
-                        candidate = page.locator("[data-slot='carousel']").first
-                        try:
-                            if candidate.count() > 0:
-                                carousel = candidate
-                        except Exception:
-                            # in some cases .count may fail; assume candidate exists
-                            carousel = candidate
+                        carousel = hp.resolve("[data-slot='carousel']", verify=False)
                     except Exception:
                         carousel = None
 
@@ -543,12 +603,7 @@ def test_cta_buttons_scroll(page, base_url):
                     # final fallback: generic .carousel class
                     if not carousel:
                         try:
-                            cand3 = page.locator(".carousel").first
-                            try:
-                                if cand3.count() > 0:
-                                    carousel = cand3
-                            except Exception:
-                                carousel = cand3
+                            carousel = hp.resolve(".carousel", verify=False)
                         except Exception:
                             carousel = None
 
@@ -565,7 +620,7 @@ def test_cta_buttons_scroll(page, base_url):
                                     pass
 
                             # wait for animations/transforms to finish on carousel
-                            wait_for_element_animations_and_transform(page, carousel, timeout=3000)
+                            wait_for_element_animations_and_transform(page, carousel, timeout=time_budget.timeout(3000))
 
                             # slight extra pause to let compositing finish
                             try:
@@ -607,7 +662,14 @@ def test_cta_buttons_scroll(page, base_url):
                     continue
 
                 # click the button (normal flow)
-                ok, reason = _click_button(hp, page, b, btn_locator=btn_locator)
+                with maybe_record(screencast, f"cta_{idx}", time_budget.timeout(5000)) as transition, \
+                        click_probe.measure(step_title) as perf:
+                    ok, reason = _click_button(hp, page, b, btn_locator=btn_locator,
+                                               click_timeout=time_budget.timeout(5000),
+                                               scroll_timeout=time_budget.timeout(6000))
+                if ok:
+                    _record_click_perf(soft, perf, btn_text, idx)
+                    _record_transition(soft, screencast, transition, btn_text, idx)
 
                 # attach tracker snapshot right after click
                 try:
@@ -630,23 +692,24 @@ def test_cta_buttons_scroll(page, base_url):
                     soft.add(f"Button '{btn_text}' click failed: {reason}")
                     continue
 
+                # verify sample: the click must scroll where the static map predicts
+                if idx in targets.sample:
+                    err = targets.check_scroll(page, idx)
+                    if err:
+                        soft.add(f"CTA '{btn_text}': {err}")
+
                 # Attempt to resolve target id via several heuristics (priority order)
                 target_locator = None
                 selected_info = None
 
-                # 1) from button attributes / ancestors
+                # 1) from button attributes / ancestors (static map first)
                 if btn_locator:
                     try:
-                        info = _get_target_id_from_button_locator(btn_locator)
+                        info = targets.static(idx) or _get_target_id_from_button_locator(btn_locator)
                         if info and info.get("id"):
                             tid = info.get("id")
-                            exists = False
-                            try:
-                                exists = page.evaluate("id => !!document.getElementById(id)", tid)
-                            except Exception:
-                                exists = False
-                            if exists:
-                                target_locator = page.locator(f"#{tid}")
+                            target_locator = hp.resolve(id_selector(tid))
+                            if target_locator is not None:
                                 selected_info = {"id": tid, "source": info.get("source")}
                     except Exception:
                         pass
@@ -661,13 +724,8 @@ def test_cta_buttons_scroll(page, base_url):
                         first = tg[0]
                         if isinstance(first, dict) and first.get("id"):
                             tid = first.get("id")
-                            exists = False
-                            try:
-                                exists = page.evaluate("id => !!document.getElementById(id)", tid)
-                            except Exception:
-                                exists = False
-                            if exists:
-                                target_locator = page.locator(f"#{tid}")
+                            target_locator = hp.resolve(id_selector(tid))
+                            if target_locator is not None:
                                 selected_info = {"id": tid, "via": "scrollIntoView_tracker", "targets": tg}
 
                 # 3) ancestor section id heuristic
@@ -690,13 +748,8 @@ def test_cta_buttons_scroll(page, base_url):
                             """
                         )
                         if anc:
-                            exists = False
-                            try:
-                                exists = page.evaluate("id => !!document.getElementById(id)", anc)
-                            except Exception:
-                                exists = False
-                            if exists:
-                                target_locator = page.locator(f"#{anc}")
+                            target_locator = hp.resolve(id_selector(anc))
+                            if target_locator is not None:
                                 selected_info = {"id": anc, "via": "ancestor_section"}
                     except Exception:
                         pass
@@ -706,7 +759,7 @@ def test_cta_buttons_scroll(page, base_url):
                     try:
                         nearest = get_closest_section_by_scroll(page)
                         if nearest and nearest.get("id"):
-                            target_locator = page.locator(f'#{nearest.get("id")}')
+                            target_locator = hp.resolve(id_selector(nearest.get("id")))
                             selected_info = nearest
                     except Exception:
                         pass
@@ -719,10 +772,20 @@ def test_cta_buttons_scroll(page, base_url):
                     pass
 
                 # capture screenshot of target or fallback to full-page
-                if target_locator and target_locator.count() > 0:
+                if target_locator is not None:
                     shot_name = _unique_name("btn_target", idx)
                     shot_path = os.path.join(SCREENSHOT_DIR, shot_name)
-                    path, meta = _locator_screenshot_with_fallbacks(page, target_locator.first, shot_path)
+                    path, meta = None, None
+                    # crop mode: cut the target out of the capture of the current page state
+                    tid = (selected_info or {}).get("id")
+                    if page_capture is not None and tid:
+                        try:
+                            meta = page_capture.crop(f'[id="{tid}"]', shot_path)
+                            path = shot_path if meta else None
+                        except Exception:
+                            path, meta = None, None
+                    if not path:
+                        path, meta = _locator_screenshot_with_fallbacks(page, target_locator, shot_path)
                     if path:
                         try:
                             allure.attach.file(path, name=f"{step_title} - target_shot", attachment_type=allure.attachment_type.PNG)
@@ -772,5 +835,28 @@ def test_cta_buttons_scroll(page, base_url):
                     pass
                 soft.add(f"CTA '{btn_text}' unexpected exception: {e}")
 
+            finally:
+                time_budget.end()
+                if not groups.is_member(idx):
+                    groups.record(idx, len(soft.errors) == errors_before, "; ".join(soft.errors[errors_before:]))
+
+    try:
+        allure.attach(json.dumps(groups.summary(), ensure_ascii=False, indent=2),
+                      name="CTA deduplication", attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
+    try:
+        allure.attach(json.dumps(targets.summary(), ensure_ascii=False, indent=2),
+                      name="CTA target map", attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
+    try:
+        allure.attach(json.dumps(journal.totals, ensure_ascii=False, indent=2),
+                      name="CTA mutation journal", attachment_type=allure.attachment_type.JSON)
+    except Exception:
+        pass
+
     # final summary (fail test if any collected errors)
     soft.assert_all()
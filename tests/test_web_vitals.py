@@ -0,0 +1,101 @@
+# tests/test_web_vitals.py
+import os
+import json
+import datetime
+import allure
+
+from pages.home_page import HomePage
+from utils.soft_assert import SoftAssert
+from utils.web_vitals import (
+    WEB_VITALS_COLLECTOR, READ_VITALS, NEUTRAL_POINT, AFTER_INTERACTION, METRICS, TransferCounter, summarize,
+    load_budget, check_budget,
+)
+
+
+def _measure_once(browser, viewport, base_url) -> dict:
+    # новый контекст на каждую итерацию — холодный кэш, как у первого визита
+    context = browser.new_context(**viewport.context_options())
+    try:
+        context.add_init_script(WEB_VITALS_COLLECTOR)
+        page = context.new_page()
+        counter = TransferCounter(page)
+        hp = HomePage(page, base_url)
+        hp.goto("/")
+        hp.wait_for_network_idle(timeout=30_000)
+
+        # одно взаимодействие для INP-подобной задержки: клик в проверенную неинтерактивную точку,
+        # затем ждём доставки Event Timing (после следующей отрисовки)
+        try:
+            point = page.evaluate(NEUTRAL_POINT)
+            if point:
+                page.mouse.click(point["x"], point["y"])
+                page.evaluate(AFTER_INTERACTION)
+        except Exception:
+            pass
+
+        sample = page.evaluate(READ_VITALS) or {}
+        sample["transfer_bytes"] = counter.bytes if counter.available else sample.get("resource_timing_bytes")
+        sample["requests"] = counter.requests
+        return sample
+    finally:
+        try:
+            context.close()
+        except Exception:
+            pass
+
+
+def _write_results(path: str, result: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2, sort_keys=True)
+    history = os.path.splitext(path)[0] + "-history.jsonl"
+    with open(history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def _output_path(path: str, viewport, profiles) -> str:
+    # с --viewports у каждого профиля свой файл: reports/web-vitals-375x812@3.json
+    if not profiles:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}-{viewport.id}{ext or '.json'}"
+
+
+def test_home_page_web_vitals(browser, base_url, viewport, request):
+    soft = SoftAssert()
+    iterations = max(1, int(request.config.getoption("--vitals-iterations")))
+    budget = load_budget(str(request.config.rootpath / request.config.getoption("--vitals-budget")))
+
+    samples = []
+    for i in range(iterations):
+        with allure.step(f"Page load #{i + 1}"):
+            try:
+                sample = _measure_once(browser, viewport, base_url)
+            except Exception as e:
+                soft.add(f"Page load #{i + 1} failed: {e}")
+                continue
+            samples.append(sample)
+            allure.attach(json.dumps(sample, ensure_ascii=False, indent=2), name=f"vitals_{i + 1}",
+                          attachment_type=allure.attachment_type.JSON)
+
+    summary = summarize(samples)
+    violations = check_budget(summary, budget)
+    result = {
+        "schema": 1,
+        "timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "url": HomePage(None, base_url).resolve_url("/"),
+        "viewport": viewport.id,
+        "iterations": iterations,
+        "measured": len(samples),
+        "metrics": {name: summary[name] for name in METRICS},
+        "budget": budget,
+        "violations": violations,
+    }
+    _write_results(_output_path(request.config.getoption("--vitals-output"), viewport,
+                                getattr(request.config, "_viewport_profiles", None)), result)
+    allure.attach(json.dumps(result, ensure_ascii=False, indent=2), name="Web vitals summary",
+                  attachment_type=allure.attachment_type.JSON)
+
+    for v in violations:
+        soft.add(v)
+    soft.assert_all()
@@ -0,0 +1,270 @@
+"""
+Long-lived Chromium with a CDP endpoint, shared by pytest runs.
+
+    python -m utils.browser_server start [--port 9222] [--idle-timeout 900] [--headless 1]
+    python -m utils.browser_server status
+    python -m utils.browser_server stop
+
+`start` spawns a detached supervisor that launches Chromium (the binary Playwright
+installed) with --remote-debugging-port, health-checks it and shuts it down after
+--idle-timeout seconds without open pages or new connections. conftest.py connects
+through connect_over_cdp when the server is healthy and was started with the same
+launch flags (headless, no channel / slowmo), and launches a browser otherwise.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, Optional
+from weakref import WeakKeyDictionary
+
+STATE_FILE = os.getenv("BROWSER_SERVER_STATE", os.path.join(tempfile.gettempdir(), "test-ui-browser-server.json"))
+
+
+def read_state() -> Optional[Dict]:
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(state: Dict):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+
+def touch():
+    """Marks the server as used (resets the idle timer)."""
+    try:
+        os.utime(STATE_FILE, None)
+    except OSError:
+        pass
+
+
+# browser -> chromium pid of the daemon it is connected to (mark_connected)
+_connected = WeakKeyDictionary()
+
+
+def mark_connected(browser, endpoint: str):
+    """Records that browser was connected to endpoint; server_pid(browser) is then the daemon's browser pid."""
+    state = read_state()
+    if state and state.get("endpoint") == endpoint and state.get("chromium_pid"):
+        try:
+            _connected[browser] = state["chromium_pid"]
+        except TypeError:
+            pass
+
+
+def server_pid(browser) -> Optional[int]:
+    """Pid of the daemon's browser process if browser is connected to the local daemon, else None."""
+    try:
+        return _connected.get(browser)
+    except TypeError:
+        return None
+
+
+def _get_json(endpoint: str, path: str, timeout: float = 2.0):
+    with urllib.request.urlopen(endpoint.rstrip("/") + path, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def health(endpoint: Optional[str] = None) -> Optional[Dict]:
+    """/json/version of the running server, or None if it does not answer."""
+    if endpoint is None:
+        state = read_state()
+        endpoint = state.get("endpoint") if state else None
+    if not endpoint:
+        return None
+    try:
+        return _get_json(endpoint, "/json/version")
+    except Exception:
+        return None
+
+
+# launch options that do not change the browser itself
+_NEUTRAL_LAUNCH_OPTIONS = ("timeout", "handle_sigint", "handle_sigterm", "handle_sighup")
+
+
+def matches_launch(state: Dict, launch_options: Dict) -> bool:
+    """Whether the daemon (launched with state['launch']) stands in for browser_type.launch(**launch_options)."""
+    flags = state.get("launch") or {}
+    if bool(launch_options.get("headless", True)) != bool(flags.get("headless", True)):
+        return False
+    # --browser-channel, --slowmo, devtools, extra args, proxy, ...: only a real launch honors them
+    return not any(value for key, value in launch_options.items()
+                   if key != "headless" and key not in _NEUTRAL_LAUNCH_OPTIONS)
+
+
+def resolve_endpoint(mode: Optional[str], launch_options: Optional[Dict] = None) -> Optional[str]:
+    """
+    mode: 'off' -> never connect; 'auto' -> the local daemon if it is healthy and
+    was started with the same launch flags (launch_options, when given);
+    anything else is an explicit CDP endpoint (http://host:port).
+    """
+    mode = (mode or "auto").strip()
+    if mode in ("off", "0", ""):
+        return None
+    if mode == "auto":
+        state = read_state()
+        if state and launch_options is not None and not matches_launch(state, launch_options):
+            return None
+        endpoint = state.get("endpoint") if state else None
+    else:
+        endpoint = mode
+    if endpoint and health(endpoint):
+        touch()
+        return endpoint
+    return None
+
+
+def _chromium_executable() -> str:
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        return p.chromium.executable_path
+
+
+def serve(port: int, idle_timeout: float, headless: bool, poll: float = 5.0):
+    """Supervisor loop: runs Chromium until it is idle for idle_timeout seconds."""
+    profile = tempfile.mkdtemp(prefix="test-ui-chromium-")
+    args = [
+        _chromium_executable(),
+        f"--remote-debugging-port={port}",
+        "--remote-debugging-address=127.0.0.1",
+        f"--user-data-dir={profile}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-dev-shm-usage",
+    ]
+    if headless:
+        args.append("--headless=new")
+    chrome = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    endpoint = f"http://127.0.0.1:{port}"
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+    try:
+        deadline = time.time() + 30
+        while not health(endpoint):
+            if chrome.poll() is not None or time.time() > deadline:
+                return 1
+            time.sleep(0.1)
+        _write_state({"pid": os.getpid(), "chromium_pid": chrome.pid, "endpoint": endpoint,
+                      "port": port, "started": time.time(), "idle_timeout": idle_timeout,
+                      "launch": {"headless": headless}})
+
+        last_active = time.time()
+        last_targets = None
+        while not stopping and chrome.poll() is None:
+            time.sleep(poll)
+            try:
+                targets = [t.get("url") for t in _get_json(endpoint, "/json/list") if t.get("type") == "page"]
+            except Exception:
+                continue
+            if last_targets is None or targets != last_targets or any(u != "about:blank" for u in targets):
+                last_active = time.time()
+            last_targets = targets
+            try:
+                last_active = max(last_active, os.path.getmtime(STATE_FILE))
+            except OSError:
+                pass
+            if time.time() - last_active > idle_timeout:
+                break
+        return 0
+    finally:
+        if chrome.poll() is None:
+            chrome.terminate()
+            try:
+                chrome.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                chrome.kill()
+        state = read_state()
+        if state and state.get("pid") == os.getpid():
+            try:
+                os.remove(STATE_FILE)
+            except OSError:
+                pass
+        shutil.rmtree(profile, ignore_errors=True)
+
+
+def start(port: int, idle_timeout: float, headless: bool, wait: float = 30.0) -> int:
+    if health():
+        print(f"already running: {read_state().get('endpoint')}")
+        return 0
+    cmd = [sys.executable, "-m", "utils.browser_server", "serve", "--port", str(port),
+           "--idle-timeout", str(idle_timeout), "--headless", "1" if headless else "0"]
+    subprocess.Popen(cmd, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if health():
+            print(f"started: {read_state().get('endpoint')}")
+            return 0
+        time.sleep(0.2)
+    print("browser server did not become healthy", file=sys.stderr)
+    return 1
+
+
+def stop() -> int:
+    state = read_state()
+    if not state:
+        print("not running")
+        return 0
+    try:
+        os.kill(state["pid"], signal.SIGTERM)
+    except (OSError, KeyError):
+        try:
+            os.remove(STATE_FILE)
+        except OSError:
+            pass
+    print("stopped")
+    return 0
+
+
+def status() -> int:
+    state = read_state()
+    info = health()
+    if not state or not info:
+        print("not running")
+        return 1
+    idle = time.time() - os.path.getmtime(STATE_FILE)
+    print(f"running: {state['endpoint']} ({info.get('Browser')}), up {time.time() - state['started']:.0f}s, "
+          f"last used {idle:.0f}s ago, idle timeout {state.get('idle_timeout')}s")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.browser_server", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("start", "serve"):
+        p = sub.add_parser(name)
+        p.add_argument("--port", type=int, default=int(os.getenv("BROWSER_SERVER_PORT", "9222")))
+        p.add_argument("--idle-timeout", type=float, default=float(os.getenv("BROWSER_SERVER_IDLE", "900")))
+        p.add_argument("--headless", default=os.getenv("HEADLESS", "1"))
+    sub.add_parser("stop")
+    sub.add_parser("status")
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        return start(args.port, args.idle_timeout, args.headless != "0")
+    if args.command == "serve":
+        return serve(args.port, args.idle_timeout, args.headless != "0")
+    if args.command == "stop":
+        return stop()
+    return status()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import time
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class TimeBudget:
+    """
+    Wall-clock budget for one test run.
+
+    Elements are checked in priority order; each element gets an equal share of
+    the time left (its slice), and every timeout inside the element is capped by
+    what is left of the slice. When the whole budget is spent the remaining
+    elements are skipped and recorded. total_s=None means no limit: timeouts are
+    returned unchanged and nothing is skipped.
+    """
+
+    def __init__(self, total_s: Optional[float] = None, min_timeout_ms: int = 500):
+        self.total_s = total_s
+        self.min_timeout_ms = min_timeout_ms
+        self.started = time.monotonic()
+        self.skipped: List[str] = []
+        self.truncated: List[Dict] = []
+        self._label: Optional[str] = None
+        self._slice_end: Optional[float] = None
+        self._slice_start = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.total_s)
+
+    def remaining(self) -> float:
+        if not self.enabled:
+            return float("inf")
+        return self.total_s - (time.monotonic() - self.started)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining() <= self.min_timeout_ms / 1000.0
+
+    @staticmethod
+    def order(items: Iterable[T], priority: Callable[[T], int]) -> List[T]:
+        """Lower priority value goes first; equal priorities keep the original order."""
+        return sorted(items, key=priority)
+
+    def begin(self, label: str, items_left: int) -> bool:
+        """Opens a slice for an element; returns False (and records a skip) if the budget is spent."""
+        if self.enabled and self.exhausted:
+            self.skipped.append(label)
+            return False
+        self._label = label
+        now = time.monotonic()
+        self._slice_start = now
+        self._slice_end = now + self.remaining() / max(1, items_left) if self.enabled else None
+        return True
+
+    def timeout(self, default_ms: int) -> int:
+        """default_ms capped by the current slice (or by the whole budget outside of a slice)."""
+        if not self.enabled:
+            return default_ms
+        left = (self._slice_end - time.monotonic()) if self._slice_end else self.remaining()
+        return int(max(self.min_timeout_ms, min(default_ms, left * 1000)))
+
+    def end(self):
+        if self.enabled and self._slice_end and time.monotonic() > self._slice_end:
+            self.truncated.append({
+                "element": self._label,
+                "slice_s": round(self._slice_end - self._slice_start, 2),
+                "spent_s": round(time.monotonic() - self._slice_start, 2),
+            })
+        self._label = None
+        self._slice_end = None
+
+    def report(self) -> Dict:
+        return {
+            "budget_s": self.total_s,
+            "spent_s": round(time.monotonic() - self.started, 2),
+            "skipped": self.skipped,
+            "truncated": self.truncated,
+        }
+
@@ -0,0 +1,155 @@
+import io
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# Elements mutated since the last capture (attributes, text, children; our own data-pw-*
+# tags excluded). Only mutations inside a requested target make its crop stale: autoplay
+# carousels, tickers and class toggles elsewhere do not force a new capture.
+TRACK_MUTATIONS = """
+() => {
+    if (window.__pw_capture) return;
+    const s = window.__pw_capture = { touched: new Set(), overflow: false };
+    new MutationObserver(records => {
+        for (const r of records) {
+            if (r.type === 'attributes' && (r.attributeName || '').startsWith('data-pw')) continue;
+            const node = r.type === 'characterData' ? r.target.parentElement : r.target;
+            if (!node) continue;
+            if (s.touched.size < 5000) s.touched.add(node); else s.overflow = true;
+        }
+    }).observe(document.documentElement, { subtree: true, childList: true, attributes: true, characterData: true });
+}
+"""
+
+# Called right before a capture: what the capture shows is the new baseline.
+RESET_MUTATIONS = """
+() => { const s = window.__pw_capture; if (s) { s.touched = new Set(); s.overflow = false; } }
+"""
+
+# Document size, document-coordinate boxes of a list of selectors, and whether any of
+# them changed inside since the last capture, in one round trip.
+TARGET_BOXES = """
+(selectors) => {
+    const d = document.documentElement;
+    const s = window.__pw_capture;
+    let dirty = !s || s.overflow;
+    const boxes = selectors.map(sel => {
+        let el = null;
+        try { el = document.querySelector(sel); } catch (e) { return null; }
+        if (!el) return null;
+        if (!dirty && s.touched.size) {
+            for (const n of s.touched) { if (el.contains(n)) { dirty = true; break; } }
+        }
+        const r = el.getBoundingClientRect();
+        if (!r.width || !r.height) return null;
+        return { x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height };
+    });
+    return { doc: { width: d.scrollWidth, height: d.scrollHeight }, dirty, boxes };
+}
+"""
+
+
+def _moved(a: Optional[Dict], b: Optional[Dict]) -> bool:
+    if a is None or b is None:
+        return a is not b
+    return any(abs(a[k] - b[k]) >= 1 for k in ("x", "y", "width", "height"))
+
+
+class PageCapture:
+    """
+    Capture once, crop many: one full-page (tiled for very tall pages) capture per
+    page state; element images are cropped locally from it in a worker pool.
+
+    The capture is reused until the layout it shows is stale for the requested
+    targets: the document size changed, a target moved or resized against the box
+    it had when first seen after the capture, or something inside a target mutated.
+    """
+
+    def __init__(self, page, workers: int = 4, tile_height: int = 8000, overlap: int = 2000, pad: int = 6):
+        self.page = page
+        self.tile_height = tile_height
+        self.overlap = overlap
+        self.pad = pad
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.captures = 0
+        self.crops = 0
+        self._state = 0
+        self._doc: Optional[Tuple[int, int]] = None
+        self._boxes: Dict[str, Optional[Dict]] = {}
+        self._tiles: List[Tuple[int, Image.Image]] = []
+        self._scale = 1.0
+
+    def _capture(self, doc: Dict):
+        width, height = int(doc["width"]), int(doc["height"])
+        self.page.evaluate(TRACK_MUTATIONS)
+        self.page.evaluate(RESET_MUTATIONS)
+        tiles = []
+        if height <= self.tile_height:
+            png = self.page.screenshot(full_page=True)
+            tiles.append((0, Image.open(io.BytesIO(png))))
+        else:
+            step = self.tile_height - self.overlap
+            for top in range(0, height, step):
+                clip = {"x": 0, "y": top, "width": width, "height": min(self.tile_height, height - top)}
+                png = self.page.screenshot(full_page=True, clip=clip)
+                tiles.append((top, Image.open(io.BytesIO(png))))
+                if top + self.tile_height >= height:
+                    break
+        for _, img in tiles:
+            img.load()
+        self.captures += len(tiles)
+        self._tiles = tiles
+        self._scale = tiles[0][1].width / float(width or 1)
+
+    def boxes(self, selectors: List[str]) -> List[Optional[Dict]]:
+        """Boxes of all targets for the current page state; captures the page if the state changed."""
+        res = self.page.evaluate(TARGET_BOXES, selectors) or {}
+        doc = res.get("doc") or {"width": 0, "height": 0}
+        boxes = res.get("boxes") or [None] * len(selectors)
+        stale = (
+            not self._tiles
+            or res.get("dirty", True)
+            or (int(doc["width"]), int(doc["height"])) != self._doc
+            or any(sel in self._boxes and _moved(box, self._boxes[sel]) for sel, box in zip(selectors, boxes))
+        )
+        if stale:
+            self._capture(doc)
+            self._state += 1
+            self._doc = (int(doc["width"]), int(doc["height"]))
+            self._boxes = {}
+        for sel, box in zip(selectors, boxes):
+            self._boxes.setdefault(sel, box)
+        return boxes
+
+    def _crop(self, box: Dict, path: str, tiles: List, scale: float, state: int) -> Dict:
+        # tiles / scale / state are bound at submit time: a later recapture must not change what a pending job crops
+        # the tile that holds the top edge of the box; boxes taller than the overlap are cut at the tile edge
+        top, img = next(((t, i) for t, i in reversed(tiles) if t <= box["y"]), tiles[0])
+        s = scale
+        left = max(0, int((box["x"] - self.pad) * s))
+        upper = max(0, int((box["y"] - top - self.pad) * s))
+        right = min(img.width, int((box["x"] + box["width"] + self.pad) * s))
+        lower = min(img.height, int((box["y"] - top + box["height"] + self.pad) * s))
+        if right <= left or lower <= upper:
+            raise ValueError(f"empty crop for box {box}")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        img.crop((left, upper, right, lower)).save(path)
+        self.crops += 1
+        return {"method": "crop", "box": box, "state": state, "pixels": [left, upper, right, lower]}
+
+    def crop_many(self, targets: List[Tuple[str, str]]) -> List[Optional[Future]]:
+        """[(selector, path), ...] -> futures resolving to crop meta (None where the target is missing)."""
+        boxes = self.boxes([sel for sel, _ in targets])
+        return [
+            self.pool.submit(self._crop, box, path, self._tiles, self._scale, self._state) if box else None
+            for box, (_, path) in zip(boxes, targets)
+        ]
+
+    def crop(self, selector: str, path: str) -> Optional[Dict]:
+        future = self.crop_many([(selector, path)])[0]
+        return future.result() if future else None
+
+    def close(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,178 @@
+import os
+from typing import Dict, List, Optional
+
+# Library markers: container selector, slide selector (without clones), "next" control.
+# Same family of tokens that _is_carousel_button sniffs in class / data-slot.
+CAROUSEL_LIBRARIES = {
+    "swiper": (".swiper, .swiper-container", ".swiper-slide:not(.swiper-slide-duplicate)", ".swiper-button-next"),
+    "slick": (".slick-slider", ".slick-slide:not(.slick-cloned)", ".slick-next"),
+    "splide": (".splide", ".splide__slide:not(.splide__slide--clone)", ".splide__arrow--next"),
+    "glide": (".glide", ".glide__slide:not(.glide__slide--clone)", "[data-glide-dir='>']"),
+    "embla": ("[data-slot='carousel']", "[data-slot='carousel-item']", "[data-slot='carousel-next']"),
+}
+
+DETECT_CAROUSEL = """
+([el, libs]) => {
+    for (const [name, [container]] of Object.entries(libs)) {
+        const root = el.closest(container);
+        if (root) {
+            if (!root.hasAttribute('data-pw-carousel')) {
+                window.__pw_carousel_seq = (window.__pw_carousel_seq || 0) + 1;
+                root.setAttribute('data-pw-carousel', String(window.__pw_carousel_seq));
+            }
+            return { library: name, key: root.getAttribute('data-pw-carousel') };
+        }
+    }
+    const generic = el.closest("[class*='carousel'], [data-slot*='carousel']");
+    if (!generic) return null;
+    if (!generic.hasAttribute('data-pw-carousel')) {
+        window.__pw_carousel_seq = (window.__pw_carousel_seq || 0) + 1;
+        generic.setAttribute('data-pw-carousel', String(window.__pw_carousel_seq));
+    }
+    return { library: 'generic', key: generic.getAttribute('data-pw-carousel') };
+}
+"""
+
+# Waits on the finished promises of running CSS transitions / Web Animations
+# (what transitionend / animationend report), then on two identical animation
+# frames of the track for script-driven sliders. No fixed-interval polling.
+SETTLE = """
+async ([el, timeout]) => {
+    const deadline = performance.now() + timeout;
+    const frame = () => new Promise(r => requestAnimationFrame(() => r()));
+    const untilDeadline = (p) => Promise.race([p, new Promise(r => setTimeout(r, Math.max(0, deadline - performance.now())))]);
+    const running = () => (el.getAnimations ? el.getAnimations({subtree: true}) : []).filter(a => a.playState === 'running');
+    await frame();
+    let anims = running();
+    while (anims.length && performance.now() < deadline) {
+        await untilDeadline(Promise.all(anims.map(a => a.finished.catch(() => null))));
+        anims = running();
+    }
+    const track = el.querySelector('.swiper-wrapper, .slick-track, .splide__list, .glide__slides, [data-slot="carousel-content"] > *') || el;
+    const state = () => getComputedStyle(track).transform + '|' + track.scrollLeft + '|' + el.scrollLeft;
+    let prev = state(), stable = 0;
+    while (stable < 2 && performance.now() < deadline) {
+        await frame();
+        const cur = state();
+        if (cur === prev) { stable += 1; } else { stable = 0; prev = cur; }
+    }
+    return performance.now() < deadline;
+}
+"""
+
+# One round trip per slide: click "next", wait for settle, report active slide and container box.
+STEP = """
+async ([root, slideSel, nextSel, timeout, advance]) => {
+    const settleFn = """ + SETTLE.strip() + """;
+    if (advance) {
+        const next = root.querySelector(nextSel)
+            || [...root.querySelectorAll('button, [role=button]')].find(b => /next|след|→|›/i.test((b.getAttribute('aria-label') || '') + (b.className || '') + (b.innerText || '')));
+        if (!next) return { ok: false, reason: 'next control not found' };
+        next.click();
+    }
+    const settled = await settleFn([root, timeout]);
+    const slides = [...root.querySelectorAll(slideSel)];
+    const box = root.getBoundingClientRect();
+    let active = -1, best = 1e9;
+    slides.forEach((s, i) => {
+        const r = s.getBoundingClientRect();
+        if (!r.width) return;
+        const d = Math.abs(r.left - box.left);
+        if (d < best) { best = d; active = i; }
+    });
+    return {
+        ok: true, settled, active, count: slides.length,
+        clip: { x: Math.max(0, box.left), y: Math.max(0, box.top), width: Math.max(1, box.width), height: Math.max(1, box.height) },
+    };
+}
+"""
+
+
+def wait_for_settle(page, locator, timeout: int = 3000) -> bool:
+    """Event-driven wait until animations / transitions inside locator are finished."""
+    try:
+        return bool(page.evaluate(SETTLE, [locator.element_handle(timeout=timeout), timeout]))
+    except Exception:
+        return False
+
+
+class CarouselDriver:
+    """
+    Detects the carousel library around a control and walks all slides in one pass,
+    capturing a clip of the carousel for every slide.
+    """
+
+    def __init__(self, page, control_locator):
+        self.page = page
+        self.control = control_locator
+        self.library: Optional[str] = None
+        self.key: Optional[str] = None
+
+    def detect(self) -> Optional[Dict]:
+        try:
+            info = self.control.evaluate(
+                "(el, libs) => (" + DETECT_CAROUSEL + ")([el, libs])",
+                {k: list(v) for k, v in CAROUSEL_LIBRARIES.items()},
+            )
+        except Exception:
+            info = None
+        if info:
+            self.library = info.get("library")
+            self.key = info.get("key")
+        return info
+
+    @property
+    def container(self):
+        return self.page.locator(f'[data-pw-carousel="{self.key}"]').first
+
+    def _selectors(self):
+        if self.library in CAROUSEL_LIBRARIES:
+            _, slides, nxt = CAROUSEL_LIBRARIES[self.library]
+            return slides, nxt
+        return "[class*='slide'], [data-slot='carousel-item']", "[class*='next'], [data-slot='carousel-next']"
+
+    def _step(self, advance: bool, timeout: int) -> Dict:
+        slides, nxt = self._selectors()
+        handle = self.container.element_handle(timeout=timeout)
+        return self.page.evaluate(STEP, [handle, slides, nxt, timeout, advance]) or {}
+
+    def settle(self, timeout: int = 3000) -> bool:
+        if not self.key:
+            return False
+        return wait_for_settle(self.page, self.container, timeout=timeout)
+
+    def traverse(self, shot_dir: str, prefix: str, timeout: int = 3000, max_slides: int = 50) -> List[Dict]:
+        """
+        Captures the current slide, then clicks "next" until the carousel wraps
+        around (or stops moving) and captures every slide on the way.
+        Returns [{'slide': i, 'path': ..., 'settled': bool}, ...].
+        """
+        if not self.key and not self.detect():
+            return []
+        os.makedirs(shot_dir, exist_ok=True)
+        try:
+            self.container.evaluate("el => el.scrollIntoView({block:'center', inline:'nearest'})")
+        except Exception:
+            pass
+
+        frames = []
+        seen = set()
+        state = self._step(False, timeout)
+        count = min(state.get("count") or max_slides, max_slides)
+        for _ in range(count + 1):
+            if not state.get("ok"):
+                break
+            active = state.get("active")
+            if active in seen:
+                break
+            seen.add(active)
+            path = os.path.join(shot_dir, f"{prefix}_slide_{len(frames)}.png")
+            try:
+                self.page.screenshot(path=path, clip=state["clip"])
+            except Exception:
+                path = None
+            frames.append({"slide": active, "path": path, "settled": state.get("settled")})
+            if len(seen) >= count:
+                break
+            state = self._step(True, timeout)
+        return frames
@@ -0,0 +1,152 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+# Behavior-relevant facts of every button in one round trip (same selector/order as HomePage.list_buttons).
+BUTTON_SIGNATURES = """
+(selector) => [...document.querySelectorAll(selector)].map(el => {
+    let target = null;
+    for (let n = el; n && !target; n = n.parentElement) {
+        if (n.tagName === 'A') {
+            const href = n.getAttribute('href');
+            if (href && href.startsWith('#') && href.length > 1) target = href;
+        }
+        for (const a of ['data-target', 'data-href', 'aria-controls', 'data-bs-target', 'data-target-id']) {
+            const v = n.getAttribute && n.getAttribute(a);
+            if (v && !target) target = v;
+        }
+    }
+    const marker = (el.className && typeof el.className === 'string' ? el.className : '') + ' ' + (el.getAttribute('data-slot') || '');
+    return {
+        tag: el.tagName.toLowerCase(),
+        text: (el.innerText || el.getAttribute('aria-label') || '').trim().replace(/\\s+/g, ' ').toLowerCase(),
+        type: el.getAttribute('type'),
+        popup: el.getAttribute('aria-haspopup'),
+        onclick: el.getAttribute('onclick'),
+        target,
+        carousel: /carousel|swiper|splide|slick|glide/i.test(marker),
+    };
+})
+"""
+
+# Cheap structural check for non-representative members: still attached, rendered, same href / enabled.
+# With attr the members are looked up by their index tag ([data-pw-idx="i"]): positions in
+# querySelectorAll shift once a click added or removed nodes.
+STRUCTURE_CHECK = """
+([selector, indices, attr]) => {
+    const nodes = attr ? null : document.querySelectorAll(selector);
+    return indices.map(i => {
+        const el = attr ? document.querySelector(`[${attr}="${i}"]`) : nodes[i];
+        if (!el) return { index: i, exists: false };
+        const r = el.getBoundingClientRect();
+        const s = getComputedStyle(el);
+        return {
+            index: i, exists: true,
+            rendered: !!(r.width && r.height) && s.visibility !== 'hidden' && s.display !== 'none',
+            href: el.getAttribute('href'),
+            disabled: el.hasAttribute('disabled') || el.getAttribute('aria-disabled') === 'true',
+        };
+    });
+}
+"""
+
+
+def normalize_href(href: Optional[str], base_url: Optional[str]) -> str:
+    href = (href or "").strip()
+    if href.startswith("#"):
+        return href
+    parts = urlsplit(urljoin((base_url or "").rstrip("/") + "/", href))
+    netloc = parts.netloc.lower()
+    if (parts.scheme == "http" and netloc.endswith(":80")) or (parts.scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), netloc, path, parts.query, ""))
+
+
+def anchor_signature(href: str, facts: Dict, strategy: str, base_url: Optional[str]) -> Tuple:
+    return ("a", normalize_href(href, base_url), strategy, bool(facts.get("download")), bool(facts.get("has_handler")))
+
+
+def button_signature(sig: Optional[Dict]) -> Optional[Tuple]:
+    """None -> the button is never grouped (carousel controls keep state, unlabeled buttons are ambiguous)."""
+    if not sig or sig.get("carousel") or not (sig.get("text") or sig.get("target")):
+        return None
+    if sig.get("onclick"):
+        return None
+    return ("button", sig.get("tag"), sig.get("text"), sig.get("target"), sig.get("type"), sig.get("popup"))
+
+
+class EquivalenceGroups:
+    """
+    Groups index-aligned elements by signature. The first element of a group (in
+    check order) is the representative and gets the full check; the others only
+    get a structural check and inherit the representative's outcome.
+    """
+
+    def __init__(self, keys: List[Optional[Hashable]], order: Optional[List[int]] = None):
+        self._rep: Dict[int, int] = {}
+        self._members: Dict[int, List[int]] = {}
+        self._results: Dict[int, Tuple[bool, str]] = {}
+        first: Dict[Hashable, int] = {}
+        for idx in (order if order is not None else range(len(keys))):
+            key = keys[idx]
+            if key is None:
+                self._rep[idx] = idx
+                continue
+            rep = first.setdefault(key, idx)
+            self._rep[idx] = rep
+            if rep != idx:
+                self._members.setdefault(rep, []).append(idx)
+
+    def representative_of(self, idx: int) -> int:
+        return self._rep.get(idx, idx)
+
+    def is_member(self, idx: int) -> bool:
+        return self.representative_of(idx) != idx
+
+    def members(self, rep: int) -> List[int]:
+        return self._members.get(rep, [])
+
+    def split(self, queue: List[Tuple[int, object]]) -> List[Tuple[int, object]]:
+        """Representatives in their original order, then all members (they depend on representative results)."""
+        return [item for item in queue if not self.is_member(item[0])] + [item for item in queue if self.is_member(item[0])]
+
+    def record(self, rep: int, ok: bool, detail: str = ""):
+        self._results[rep] = (ok, detail)
+
+    def result(self, rep: int) -> Optional[Tuple[bool, str]]:
+        return self._results.get(rep)
+
+    def summary(self) -> Dict:
+        return {
+            "elements": len(self._rep),
+            "fully_checked": sum(1 for i in self._rep if not self.is_member(i)),
+            "groups": {str(rep): members for rep, members in self._members.items()},
+        }
+
+
+def member_error(groups: EquivalenceGroups, idx: int, check: Optional[Dict], expected_href: Optional[str] = None) -> Optional[str]:
+    """Outcome of a group member: its structural check combined with the representative's result."""
+    rep = groups.representative_of(idx)
+    ok, detail = groups.result(rep) or (True, "")
+    if not check or not check.get("exists"):
+        return "element is no longer in the DOM"
+    if not check.get("rendered"):
+        return "element is not rendered (zero size, display: none or visibility: hidden)"
+    if check.get("disabled"):
+        return "element is disabled"
+    if expected_href is not None and check.get("href") != expected_href:
+        return f"href changed to {check.get('href')!r}"
+    if not ok:
+        return f"same behavior as #{rep}, which failed: {detail}"
+    return None
+
+
+def structure_check(page, selector: str, indices: List[int], attr: Optional[str] = None) -> Dict[int, Dict]:
+    """attr: index tag of the elements (data-pw-idx); None looks them up by position in the selector's matches."""
+    if not indices:
+        return {}
+    try:
+        rows = page.evaluate(STRUCTURE_CHECK, [selector, indices, attr]) or []
+    except Exception:
+        return {}
+    return {row["index"]: row for row in rows}
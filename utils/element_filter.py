@@ -0,0 +1,49 @@
+from typing import Container, List, Optional, Tuple
+
+# index of every node of `selector` that also matches `css`
+_MATCHING = """
+([selector, css]) => [...document.querySelectorAll(selector)].map((n, i) => n.matches(css) ? i : -1).filter(i => i >= 0)
+"""
+
+
+class Shard:
+    """
+    Indices of one work queue slice: "shard:0-19,25" (inclusive ranges and single
+    indices); an open last range "shard:40-" covers everything from 40 on, so
+    elements a worker enumerates beyond the coordinator's count are still checked.
+    """
+
+    def __init__(self, spec: str):
+        self.ranges: List[Tuple[int, Optional[int]]] = []
+        for part in spec.split(","):
+            part = part.strip()
+            start, dash, end = part.partition("-")
+            if not start.isdigit() or (end and not end.isdigit()):
+                continue
+            self.ranges.append((int(start), int(end) if end else (None if dash else int(start))))
+
+    def __contains__(self, index) -> bool:
+        return any(start <= index and (end is None or index <= end) for start, end in self.ranges)
+
+
+def select_indices(page, selector: str, items, spec: Optional[str]) -> Optional[Container[int]]:
+    """
+    Element filter shared by the tests (--element): "12" / "3,7" -> indices,
+    "text:<substring>" -> case-insensitive text match, "css:<selector>" -> nodes
+    matching the CSS selector; any other value is a text match. None -> no filter.
+    "shard:0-19" / "shard:40-" -> one slice of a full run (utils.work_queue, see Shard).
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    if spec.startswith("shard:"):
+        return Shard(spec[6:])
+    if all(part.strip().isdigit() for part in spec.split(",")):
+        return {int(part) for part in spec.split(",")}
+    if spec.startswith("css:"):
+        try:
+            return set(page.evaluate(_MATCHING, [selector, spec[4:].strip()]) or [])
+        except Exception:
+            return set()
+    needle = (spec[5:] if spec.startswith("text:") else spec).strip().lower()
+    return {i for i, item in enumerate(items) if needle in (item.get("text") or "").lower()}
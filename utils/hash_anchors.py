@@ -0,0 +1,87 @@
+import time
+from typing import Dict, List, Optional, Set
+
+from utils import page_helpers
+from utils.target_map import SCROLL_STATE, pick_sample
+
+
+class HashAnchorCheck:
+    """
+    Bulk verification of #id anchors: one evaluate (page_helpers.hash_targets)
+    checks for every anchor that the target exists, is visible, and that the
+    scroll position a jump to it lands on (document offset minus scroll-margin /
+    scroll-padding, clamped to the page) shows the target. The cost is one round
+    trip however many anchors there are.
+
+    Only anchors with a JS click handler (the handler may do something other than
+    the native jump) and a verify sample (one anchor per target first) are still
+    clicked; for those the real scroll position is compared with the expected one.
+    verify=None clicks every anchor (old behavior).
+    """
+
+    def __init__(self, entries: List[Optional[Dict]], handlers: List[bool], indices: List[int],
+                 verify: Optional[float] = 0.2, duration_ms: float = 0.0):
+        self.entries = entries
+        self.handlers = handlers
+        self.duration_ms = duration_ms
+        self.checked = [i for i in indices if i < len(entries) and entries[i]]
+        bulk = [i for i in self.checked if not handlers[i]]
+        self.sample: Set[int] = pick_sample(bulk, {i: entries[i]["id"] for i in bulk}, verify)
+        self.counts: Dict[str, int] = {"bulk": 0, "clicked": 0, "mismatch": 0}
+
+    @classmethod
+    def build(cls, page, selector: str, link_facts: List[Dict], indices: List[int],
+              verify: Optional[float] = 0.2) -> "HashAnchorCheck":
+        started = time.perf_counter()
+        try:
+            entries = page_helpers.hash_targets(page, selector)
+        except Exception:
+            entries = []
+        if len(entries) != len(link_facts):
+            entries = [None] * len(link_facts)
+        handlers = [bool(f.get("has_handler")) for f in link_facts]
+        return cls(entries, handlers, indices, verify, (time.perf_counter() - started) * 1000)
+
+    def entry(self, idx: int) -> Optional[Dict]:
+        return self.entries[idx] if idx in self.checked else None
+
+    def needs_click(self, idx: int) -> bool:
+        return idx not in self.checked or self.handlers[idx] or idx in self.sample
+
+    def error(self, idx: int) -> Optional[str]:
+        """Bulk verdict of an anchor that is not clicked (counted), None if it is fine."""
+        e = self.entries[idx]
+        self.counts["bulk"] += 1
+        if not e["exists"]:
+            return f"Target id '{e['id']}' not found"
+        if not e["visible"]:
+            return f"Target '#{e['id']}' is not visible (zero size or visibility: hidden)"
+        if not e["in_view"]:
+            return f"Target '#{e['id']}' at y={e['top']} is not in view after a jump to y={e['expected']}"
+        return None
+
+    def check_scroll(self, page, idx: int) -> Optional[str]:
+        """After the real click of a sampled anchor: error if the page did not scroll to where the jump should land."""
+        e = self.entry(idx)
+        if not e or not e.get("exists") or self.handlers[idx]:
+            # a JS handler may legitimately scroll elsewhere (offset for a sticky header, in-app routing)
+            return None
+        self.counts["clicked"] += 1
+        try:
+            state = page.evaluate(SCROLL_STATE)
+        except Exception:
+            return None
+        # sticky headers handled in JS (offset scrolling) shift the final position; half a viewport is tolerated
+        if abs(state["y"] - e["expected"]) <= state["vh"] / 2:
+            return None
+        self.counts["mismatch"] += 1
+        return f"scrolled to y={round(state['y'])}, expected y~{e['expected']} for '#{e['id']}'"
+
+    def summary(self) -> Dict:
+        return {
+            "hash_anchors": len(self.checked),
+            "bulk_evaluate_ms": round(self.duration_ms, 1),
+            "with_js_handler": sum(1 for i in self.checked if self.handlers[i]),
+            "verify_sample": len(self.sample),
+            **self.counts,
+        }
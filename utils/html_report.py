@@ -0,0 +1,309 @@
+"""
+Static HTML report written while the tests run (no Java / Allure CLI needed).
+
+    reports/html/
+        index.html          viewer (static, written once)
+        manifest.js         run summary, tests and per-page counters (rewritten after every test)
+        page-0001.js ...    element sections, page_size per file
+        attachments/        screenshots and other attachments, streamed to disk as they arrive
+
+Only the current page of elements is kept in memory, so generation time and
+memory stay flat however many elements a run checks. Data files are plain
+<script> payloads, so the report opens from file:// as well as from any static
+server (python -m http.server -d reports/html). A new run removes only these
+files, so the report can share a directory with other output.
+"""
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+from allure_commons import hookimpl
+
+from utils.step_listener import StepListener
+
+IMAGE_EXTENSIONS = ("png", "jpg", "jpeg", "gif", "webp", "svg")
+
+INDEX_HTML = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Test-UI report</title>
+<style>
+body { font: 14px/1.4 system-ui, sans-serif; margin: 0; color: #222; }
+header { position: sticky; top: 0; background: #fff; border-bottom: 1px solid #ddd; padding: 8px 16px; z-index: 1; }
+main { padding: 8px 16px; }
+.passed { color: #2e7d32; } .failed { color: #c62828; } .skipped { color: #888; }
+.el { border: 1px solid #e0e0e0; border-radius: 4px; margin: 6px 0; }
+.el > summary { cursor: pointer; padding: 4px 8px; }
+.el .body { padding: 4px 12px 8px; }
+.el img { max-width: 480px; display: block; margin: 4px 0; border: 1px solid #eee; }
+.steps td { padding: 0 12px 0 0; color: #555; }
+.error { white-space: pre-wrap; color: #c62828; font-family: monospace; }
+#tests td { padding: 0 12px 0 0; }
+button { margin-right: 4px; }
+</style>
+</head>
+<body>
+<header>
+  <b id="summary">loading…</b>
+  <span id="pager"></span>
+  <label><input type="checkbox" id="only-failed"> failed only</label>
+  <button id="refresh">refresh</button>
+</header>
+<main>
+  <details><summary>tests</summary><table id="tests"></table></details>
+  <div id="elements"></div>
+</main>
+<script>
+(function () {
+  var manifest = null, current = 1;
+  function load(src) {
+    var s = document.createElement('script');
+    s.src = src + '?t=' + Date.now();
+    s.onload = function () { s.remove(); };
+    document.body.appendChild(s);
+  }
+  function el(tag, cls, text) {
+    var e = document.createElement(tag);
+    if (cls) e.className = cls;
+    if (text != null) e.textContent = text;
+    return e;
+  }
+  function onlyFailed() { return document.getElementById('only-failed').checked; }
+  function pages() {
+    return manifest.pages.filter(function (p) { return !onlyFailed() || p.failed; });
+  }
+  function renderPager() {
+    var pager = document.getElementById('pager');
+    pager.textContent = '';
+    pages().forEach(function (p) {
+      var b = el('button', null, p.n + (p.failed ? ' (' + p.failed + ' failed)' : ''));
+      if (p.n === current) b.disabled = true;
+      b.onclick = function () { current = p.n; load('page-' + String(p.n).padStart(4, '0') + '.js'); renderPager(); };
+      pager.appendChild(b);
+    });
+  }
+  window.REPORT_MANIFEST = function (m) {
+    manifest = m;
+    var t = m.totals;
+    document.getElementById('summary').textContent = m.title + ': ' + t.elements + ' elements, ' +
+      t.failed + ' failed, ' + m.tests.length + ' tests' + (m.finished ? '' : ' (running)');
+    var table = document.getElementById('tests');
+    table.textContent = '';
+    m.tests.forEach(function (r) {
+      var tr = el('tr');
+      tr.appendChild(el('td', r.outcome, r.outcome));
+      tr.appendChild(el('td', null, r.nodeid));
+      tr.appendChild(el('td', null, r.duration_s + ' s'));
+      tr.appendChild(el('td', 'error', r.error || ''));
+      table.appendChild(tr);
+    });
+    if (!pages().some(function (p) { return p.n === current; }) && pages().length) current = pages()[0].n;
+    renderPager();
+    if (m.pages.length) load('page-' + String(current).padStart(4, '0') + '.js');
+  };
+  window.REPORT_PAGE = function (n, elements) {
+    if (n !== current) return;
+    var root = document.getElementById('elements');
+    root.textContent = '';
+    elements.forEach(function (r) {
+      if (onlyFailed() && r.status !== 'failed') return;
+      var d = el('details', 'el');
+      if (r.status === 'failed') d.open = true;
+      var s = el('summary');
+      s.appendChild(el('span', r.status, r.status + ' '));
+      s.appendChild(document.createTextNode(r.title + ' — ' + r.duration_ms + ' ms · ' + r.test));
+      d.appendChild(s);
+      var body = el('div', 'body');
+      if (r.error) body.appendChild(el('div', 'error', r.error));
+      if (r.steps.length) {
+        var t = el('table', 'steps');
+        r.steps.forEach(function (st) {
+          var tr = el('tr');
+          tr.appendChild(el('td', null, st[0]));
+          tr.appendChild(el('td', null, st[1] + ' ms'));
+          t.appendChild(tr);
+        });
+        body.appendChild(t);
+      }
+      r.attachments.forEach(function (a) {
+        if (a.image) {
+          body.appendChild(el('div', null, a.name));
+          var img = el('img');
+          img.loading = 'lazy';
+          img.src = a.path;
+          img.alt = a.name;
+          body.appendChild(img);
+        } else {
+          var link = el('a', null, a.name + ' (' + a.size + ' B)');
+          link.href = a.path;
+          link.target = '_blank';
+          body.appendChild(el('div')).appendChild(link);
+        }
+      });
+      d.appendChild(body);
+      root.appendChild(d);
+    });
+  };
+  document.getElementById('only-failed').onchange = function () { window.REPORT_MANIFEST(manifest); };
+  document.getElementById('refresh').onclick = function () { load('manifest.js'); };
+  load('manifest.js');
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def _clear(directory: str):
+    """Removes what a previous report wrote there; other files in the directory are left alone."""
+    shutil.rmtree(os.path.join(directory, "attachments"), ignore_errors=True)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        base = name[:-4] if name.endswith(".tmp") else name
+        if base in ("index.html", "manifest.js") or (base.startswith("page-") and base.endswith(".js")):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _write_js(path: str, callback: str, *args):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"{callback}(")
+        f.write(", ".join(json.dumps(a, ensure_ascii=False) for a in args))
+        f.write(");\n")
+    os.replace(tmp, path)
+
+
+class StreamingReport(StepListener):
+    """Step listener that streams element sections and attachments into a static HTML report."""
+
+    def __init__(self, directory: str, page_size: int = 50, title: str = "Test-UI"):
+        super().__init__()
+        self.directory = directory
+        self.page_size = max(1, page_size)
+        self.title = title
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.pages: List[Dict] = []
+        self.tests: List[Dict] = []
+        self.totals = {"elements": 0, "failed": 0, "attachments": 0, "attachment_bytes": 0}
+        self._page: List[Dict] = []
+        self._record: Optional[Dict] = None
+        self._test = ""
+        self._seq = 0
+
+        _clear(directory)
+        os.makedirs(os.path.join(directory, "attachments"), exist_ok=True)
+        with open(os.path.join(directory, "index.html"), "w", encoding="utf-8") as f:
+            f.write(INDEX_HTML)
+        self._write_manifest()
+
+    # ----- test lifecycle (called from conftest hooks) -----
+    def begin_test(self, nodeid: str):
+        self._test = nodeid
+
+    def end_test(self, nodeid: str, outcome: str, duration: float, error: Optional[str] = None):
+        self.tests.append({"nodeid": nodeid, "outcome": outcome, "duration_s": round(duration, 2),
+                           "error": (error or "")[-2000:]})
+        self._flush_page()
+
+    def close(self):
+        self.finished = time.time()
+        self._flush_page()
+
+    # ----- step listener -----
+    def on_step_start(self, title: str):
+        self._record = {"test": self._test, "title": title, "status": "passed", "duration_ms": 0,
+                        "error": None, "steps": [], "attachments": []}
+
+    def on_substep_stop(self, title: str, duration: float):
+        if self._record is not None:
+            self._record["steps"].append([title, round(duration * 1000, 1)])
+
+    def on_step_stop(self, title: str, failed: bool, duration: float):
+        record, self._record = self._record, None
+        if record is None:
+            return
+        record["status"] = "failed" if failed else "passed"
+        record["duration_ms"] = round(duration * 1000, 1)
+        self._page.append(record)
+        self.totals["elements"] += 1
+        self.totals["failed"] += int(failed)
+        if len(self._page) >= self.page_size:
+            self._flush_page()
+            self._page = []
+
+    @hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        if exc_type is not None and self._record is not None and not self._record["error"]:
+            self._record["error"] = f"{exc_type.__name__}: {exc_val}"[:2000]
+        super().stop_step(uuid, exc_type, exc_val, exc_tb)
+
+    @hookimpl
+    def attach_data(self, body, name, attachment_type, extension):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        try:
+            self._store(name, extension or getattr(attachment_type, "extension", None), data=data)
+        except Exception:
+            pass
+        super().attach_data(body, name, attachment_type, extension)
+
+    @hookimpl
+    def attach_file(self, source, name, attachment_type, extension):
+        ext = extension or getattr(attachment_type, "extension", None) or os.path.splitext(str(source))[1][1:]
+        try:
+            self._store(name, ext, source=source)
+        except Exception:
+            pass
+        super().attach_file(source, name, attachment_type, extension)
+
+    # ----- internals -----
+    def _store(self, name: str, ext: Optional[str], data: Optional[bytes] = None, source=None):
+        if self._record is None:
+            return
+        self._seq += 1
+        ext = (ext or "txt").lower()
+        rel = f"attachments/{self._seq:06d}.{ext}"
+        path = os.path.join(self.directory, rel)
+        if source is not None:
+            shutil.copyfile(source, path)
+            size = os.path.getsize(path)
+        else:
+            with open(path, "wb") as f:
+                f.write(data or b"")
+            size = len(data or b"")
+        self._record["attachments"].append({"name": name, "path": rel, "size": size,
+                                            "image": ext in IMAGE_EXTENSIONS})
+        self.totals["attachments"] += 1
+        self.totals["attachment_bytes"] += size
+
+    def _flush_page(self):
+        """Rewrites the current (possibly partial) page and the manifest; earlier pages are never touched."""
+        if self._page:
+            n = len(self.pages) + 1
+            if self.pages and self.pages[-1].get("open"):
+                n = self.pages[-1]["n"]
+                self.pages.pop()
+            _write_js(os.path.join(self.directory, f"page-{n:04d}.js"), "REPORT_PAGE", n, self._page)
+            self.pages.append({"n": n, "elements": len(self._page),
+                               "failed": sum(1 for r in self._page if r["status"] == "failed"),
+                               "open": len(self._page) < self.page_size})
+        self._write_manifest()
+
+    def _write_manifest(self):
+        _write_js(os.path.join(self.directory, "manifest.js"), "REPORT_MANIFEST", {
+            "title": self.title,
+            "started": self.started,
+            "finished": self.finished,
+            "totals": self.totals,
+            "pages": [{k: v for k, v in p.items() if k != "open"} for p in self.pages],
+            "tests": self.tests,
+        })
@@ -0,0 +1,111 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Facts for every <a> in document order (same order as HomePage.list_anchors) in one round trip.
+LINK_FACTS = """
+() => [...document.querySelectorAll('a')].map(a => {
+    const raw = a.getAttribute('href');
+    let url = null;
+    try { url = raw ? new URL(raw, location.href) : null; } catch (e) {}
+    const reactProps = Object.keys(a).find(k => k.startsWith('__reactProps'));
+    const hasHandler = !!(a.onclick || a.getAttribute('onclick') || a._vei
+        || (reactProps && a[reactProps] && a[reactProps].onClick));
+    return {
+        href: raw,
+        target: (a.getAttribute('target') || '').toLowerCase(),
+        rel: (a.getAttribute('rel') || '').toLowerCase(),
+        download: a.hasAttribute('download'),
+        protocol: url ? url.protocol : null,
+        same_origin: url ? url.origin === location.origin : false,
+        has_handler: hasHandler,
+    };
+})
+"""
+
+# strategy -> timeout (ms) tuned for what the strategy waits on
+STRATEGY_TIMEOUTS = {
+    "popup": 8000,
+    "same_tab": 10000,
+    "goto": 15000,
+    "request": 10000,
+}
+
+# order of fallbacks when the predicted strategy fails
+FALLBACK_ORDER = ("popup", "same_tab", "goto")
+
+
+def facts_from_href(href: Optional[str]) -> Dict:
+    """Facts derivable without the DOM (used when the bulk snapshot is out of sync)."""
+    parsed = urlparse(href or "")
+    return {
+        "href": href, "target": "", "rel": "", "download": False,
+        "protocol": (parsed.scheme + ":") if parsed.scheme else None,
+        "same_origin": not parsed.netloc, "has_handler": False,
+    }
+
+
+def classify_link(facts: Dict) -> Tuple[str, int, str]:
+    """Returns (strategy, timeout_ms, reason)."""
+    href = (facts.get("href") or "").strip()
+    protocol = facts.get("protocol") or ""
+    target = facts.get("target") or ""
+
+    if facts.get("download"):
+        return "request", STRATEGY_TIMEOUTS["request"], "download attribute"
+    if href.lower().startswith("javascript:"):
+        return "same_tab", STRATEGY_TIMEOUTS["same_tab"], "javascript: href"
+    if protocol and protocol not in ("http:", "https:"):
+        return "goto", STRATEGY_TIMEOUTS["goto"], f"protocol {protocol}"
+    if target and target not in ("_self", "_top", "_parent"):
+        return "popup", STRATEGY_TIMEOUTS["popup"], f"target={target}"
+    if facts.get("has_handler"):
+        # a click handler may preventDefault and route in-app — still a same-tab check
+        return "same_tab", STRATEGY_TIMEOUTS["same_tab"], "js click handler"
+    return "same_tab", STRATEGY_TIMEOUTS["same_tab"], "same-tab link" if facts.get("same_origin") else "cross-origin same-tab link"
+
+
+def collect_link_facts(page, anchors: List[Dict]) -> List[Dict]:
+    """Facts aligned with anchors; falls back to href-only facts where the snapshot does not match."""
+    try:
+        facts = page.evaluate(LINK_FACTS) or []
+    except Exception:
+        facts = []
+    out = []
+    for i, a in enumerate(anchors):
+        f = facts[i] if i < len(facts) else None
+        if not f or f.get("href") != a.get("href"):
+            f = facts_from_href(a.get("href"))
+        out.append(f)
+    return out
+
+
+class StrategyStats:
+    """How often each predicted strategy was right, and what actually worked when it was not."""
+
+    def __init__(self):
+        self.predicted = Counter()
+        self.correct = Counter()
+        self.wrong: Counter = Counter()
+        self.failed = Counter()
+
+    def record(self, predicted: str, actual: Optional[str]):
+        self.predicted[predicted] += 1
+        if actual == predicted:
+            self.correct[predicted] += 1
+        elif actual is None:
+            self.failed[predicted] += 1
+        else:
+            self.wrong[(predicted, actual)] += 1
+
+    def as_dict(self) -> Dict:
+        return {
+            strategy: {
+                "predicted": n,
+                "correct": self.correct[strategy],
+                "failed_everywhere": self.failed[strategy],
+                "mispredicted": {a: c for (p, a), c in self.wrong.items() if p == strategy},
+                "misprediction_rate": round(sum(c for (p, _), c in self.wrong.items() if p == strategy) / n, 3),
+            }
+            for strategy, n in self.predicted.items()
+        }
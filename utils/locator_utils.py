@@ -3,10 +3,10 @@ import time
 from playwright.sync_api import Locator
 from typing import Optional, Dict
 
+from utils import page_helpers
+
 def is_element_visible(locator: Locator, fraction: float = 0.1) -> bool:
-    return locator.evaluate(
-        "el => { const rect = el.getBoundingClientRect(); const vh = window.innerHeight || document.documentElement.clientHeight; if (!rect.height) return false; const visibleHeight = Math.min(rect.bottom, vh) - Math.max(rect.top, 0); return visibleHeight > (rect.height * %f); }" % fraction
-    )
+    return page_helpers.is_visible(locator, fraction)
 
 def take_element_screenshot(locator: Locator, path: str, ensure_visible: bool = True):
     os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
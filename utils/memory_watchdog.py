@@ -0,0 +1,217 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils import browser_server
+
+# JS heap of the page: performance.memory (Chromium) when CDP is not available
+JS_HEAP = """
+() => performance.memory ? { used: performance.memory.usedJSHeapSize, total: performance.memory.totalJSHeapSize } : null
+"""
+
+
+def _children_map() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                stat = f.read().decode("latin-1")
+            # "pid (comm) state ppid ..." — comm may contain spaces / parentheses
+            ppid = int(stat[stat.rfind(")") + 2:].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(roots: List[int]) -> Optional[int]:
+    """RSS of the given processes and all their descendants (Linux /proc); None elsewhere."""
+    if not os.path.isdir("/proc"):
+        return None
+    children = _children_map()
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        if pid != os.getpid():
+            total += _rss_bytes(pid)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class MemoryWatchdog:
+    """
+    Samples browser RSS (this process' descendants plus the browser server, if
+    the page's browser is connected to it) and the page's JS heap at step boundaries. Above rss_mb / heap_mb,
+    or every recycle_every steps, it recycles the page: closes other pages of the
+    context (leaked popups), forces a GC and, if still over the limit, reloads the
+    page through about:blank, restores URL and scroll position and runs the
+    registered restore callbacks (trackers, tagging). 0 disables a limit.
+    """
+
+    def __init__(self, page, rss_mb: float = 0, heap_mb: float = 0, recycle_every: int = 0):
+        self.page = page
+        self.rss_mb = rss_mb
+        self.heap_mb = heap_mb
+        self.recycle_every = recycle_every
+        self.samples: List[Dict] = []
+        self.recycles: List[Dict] = []
+        self._restore: List[Callable[[], None]] = []
+        self._keep: List[Callable[[object], bool]] = []
+        self._steps = 0
+        self._since_recycle = 0
+        self._roots = [os.getpid()]
+        try:
+            server = browser_server.server_pid(page.context.browser)
+        except Exception:
+            server = None
+        if server:
+            self._roots.append(server)
+        self._cdp = None
+        try:
+            self._cdp = page.context.new_cdp_session(page)
+        except Exception:
+            self._cdp = None
+
+    def on_recycle(self, callback: Callable[[], None]):
+        """Registers a callback that restores in-page state after the page is reloaded."""
+        self._restore.append(callback)
+
+    def keep(self, predicate: Callable[[object], bool]):
+        """Pages for which predicate(page) is true survive a recycle (e.g. prefetched pages still in use)."""
+        self._keep.append(predicate)
+
+    def _kept(self, page) -> bool:
+        for predicate in self._keep:
+            try:
+                if predicate(page):
+                    return True
+            except Exception:
+                pass
+        return False
+
+    def _heap(self) -> Optional[Dict[str, int]]:
+        if self._cdp is not None:
+            try:
+                usage = self._cdp.send("Runtime.getHeapUsage")
+                return {"used": int(usage["usedSize"]), "total": int(usage["totalSize"])}
+            except Exception:
+                pass
+        try:
+            return self.page.evaluate(JS_HEAP)
+        except Exception:
+            return None
+
+    def sample(self, label: str = "") -> Dict:
+        rss = process_tree_rss(self._roots)
+        heap = self._heap()
+        row = {
+            "step": self._steps,
+            "label": label,
+            "t": round(time.time(), 1),
+            "rss_mb": round(rss / 1e6, 1) if rss is not None else None,
+            "heap_mb": round(heap["used"] / 1e6, 1) if heap else None,
+            "pages": len(self.page.context.pages) if not self.page.is_closed() else 0,
+        }
+        self.samples.append(row)
+        return row
+
+    def _over(self, row: Dict) -> List[str]:
+        reasons = []
+        if self.rss_mb and row["rss_mb"] is not None and row["rss_mb"] > self.rss_mb:
+            reasons.append(f"rss {row['rss_mb']} MB > {self.rss_mb:g} MB")
+        if self.heap_mb and row["heap_mb"] is not None and row["heap_mb"] > self.heap_mb:
+            reasons.append(f"heap {row['heap_mb']} MB > {self.heap_mb:g} MB")
+        return reasons
+
+    def boundary(self, label: str = "") -> Optional[Dict]:
+        """Call between element checks. Returns the recycle record if the page was recycled."""
+        self._steps += 1
+        self._since_recycle += 1
+        row = self.sample(label)
+        reasons = self._over(row)
+        scheduled = bool(self.recycle_every and self._since_recycle >= self.recycle_every)
+        if scheduled:
+            reasons.append(f"{self._since_recycle} steps since last recycle")
+        if not reasons:
+            return None
+        return self.recycle(label, reasons, row, reload=scheduled)
+
+    def recycle(self, label: str, reasons: List[str], before: Dict, reload: bool = False) -> Dict:
+        """Closes extra pages and forces a GC; reloads the page if still over a limit or reload is set."""
+        t0 = time.perf_counter()
+        record = {"step": self._steps, "label": label, "reasons": reasons, "before": before, "actions": []}
+        for other in list(self.page.context.pages):
+            if other != self.page and not self._kept(other):
+                try:
+                    other.close()
+                    record["actions"].append("closed extra page")
+                except Exception:
+                    pass
+        if self._cdp is not None:
+            try:
+                self._cdp.send("HeapProfiler.collectGarbage")
+                record["actions"].append("gc")
+            except Exception:
+                pass
+
+        after = self.sample(label)
+        if reload or self._over(after):
+            url = self.page.url
+            try:
+                scroll_y = self.page.evaluate("() => window.scrollY")
+            except Exception:
+                scroll_y = 0
+            try:
+                self.page.goto("about:blank")
+                self.page.goto(url, wait_until="load")
+                self.page.evaluate("y => window.scrollTo(0, y)", scroll_y)
+                record["actions"].append("reload")
+            except Exception as e:
+                record["actions"].append(f"reload failed: {e}")
+            for callback in self._restore:
+                try:
+                    callback()
+                except Exception:
+                    pass
+            after = self.sample(label)
+        record["after"] = after
+        record["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        self._since_recycle = 0
+        self.recycles.append(record)
+        return record
+
+    def report(self) -> Dict:
+        def peak(key):
+            values = [s[key] for s in self.samples if s.get(key) is not None]
+            return max(values) if values else None
+
+        return {
+            "limits": {"rss_mb": self.rss_mb, "heap_mb": self.heap_mb, "recycle_every": self.recycle_every},
+            "steps": self._steps,
+            "peak_rss_mb": peak("rss_mb"),
+            "peak_heap_mb": peak("heap_mb"),
+            "recycles": self.recycles,
+            "samples": self.samples,
+        }
+
+    def close(self):
+        if self._cdp is not None:
+            try:
+                self._cdp.detach()
+            except Exception:
+                pass
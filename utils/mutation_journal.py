@@ -0,0 +1,60 @@
+from typing import Dict, List
+
+from pages.element_record import PREVIEW_CHARS, ElementRecord, apply_rows
+from utils import page_helpers
+
+
+class MutationJournal:
+    """
+    In-page MutationObserver journal over the enumerated elements of one selector.
+
+    start() tags every element with attr=index (the data-pw-idx tagging) and starts
+    observing; refresh() asks which tagged elements were removed, re-rendered or
+    changed and which matching elements were added since the last call, and
+    re-enumerates only those, updating the records in place (new elements are
+    appended). Re-rendered replacements keep their old index, so index-based
+    locators stay valid; their entries in `cache` (a pages.locator_cache.LocatorCache)
+    are dropped so the next lookup resolves the new node.
+    """
+
+    def __init__(self, page, selector: str, attr: str = "data-pw-idx", cache=None):
+        self.page = page
+        self.selector = selector
+        self.attr = attr
+        self.cache = cache
+        self.active = False
+        self.totals = {"refreshes": 0, "removed": 0, "changed": 0, "added": 0, "rows_fetched": 0, "lost": 0}
+
+    def start(self) -> int:
+        count = page_helpers.call(self.page, "watch", self.selector, self.attr)
+        self.active = True
+        return count
+
+    def refresh(self, items: List[ElementRecord]) -> Dict[str, List[int]]:
+        """Applies the journal to items (a list returned by HomePage.list_*); returns the drained journal."""
+        empty = {"removed": [], "changed": [], "added": []}
+        if not self.active or not items:
+            return empty
+        journal = page_helpers.call(self.page, "drainJournal")
+        if journal is None:
+            # new document (navigation): the journal and the tags are gone
+            self.active = False
+            self.totals["lost"] += 1
+            return empty
+        self.totals["refreshes"] += 1
+        for key in ("removed", "changed", "added"):
+            self.totals[key] += len(journal[key])
+        if self.cache is not None:
+            for i in journal["removed"] + journal["changed"]:
+                self.cache.invalidate(f'[{self.attr}="{i}"]')
+        wanted = journal["changed"] + journal["added"]
+        if not (wanted or journal["removed"]):
+            return journal
+        rows = page_helpers.call(self.page, "rows", self.attr, wanted, PREVIEW_CHARS) if wanted else {}
+        self.totals["rows_fetched"] += len(rows)
+        columns = items[0].columns
+        apply_rows(columns, rows, journal["removed"])
+        for i in journal["added"]:
+            if i >= len(items):
+                items.extend(ElementRecord(columns, j, self.page, self.selector) for j in range(len(items), i + 1))
+        return journal
@@ -0,0 +1,350 @@
+"""
+In-page helper library installed once per context (add_init_script) under a
+namespaced, versioned global; Python wrappers call helpers by name with small
+arguments instead of shipping (and recompiling) the whole JS source on every
+evaluate.
+
+ENABLED = False (--page-helpers off) sends the same function sources inline on
+every call, which is the old behavior; STATS records bytes sent and evaluate
+latency per helper in both modes, so two runs give the before/after numbers.
+"""
+import hashlib
+import json
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from pages.element_record import PATH_OF
+
+NAMESPACE = "__pwHelpers"
+MISSING = "__pwHelpersMissing__"
+
+ENABLED = True
+
+# name -> function source; element helpers take the element as the first argument
+FUNCTIONS = {
+    "tagAll": """(selector, attr) => {
+        const nodes = document.querySelectorAll(selector);
+        nodes.forEach((n, i) => { try { n.setAttribute(attr, String(i)); } catch (e) {} });
+        return nodes.length;
+    }""",
+    "tagByOuter": """(snippet, attr) => {
+        for (const n of document.querySelectorAll('*')) {
+            if (n.outerHTML && n.outerHTML.includes(snippet)) { n.setAttribute(attr, '1'); return true; }
+        }
+        return false;
+    }""",
+    "untag": """(attr) => {
+        document.querySelectorAll('[' + attr + ']').forEach(n => n.removeAttribute(attr));
+        return true;
+    }""",
+    "clickByOuter": """(snippet) => {
+        let el = null;
+        for (const n of document.querySelectorAll('*')) {
+            if (n.outerHTML && n.outerHTML.includes(snippet)) { el = n; break; }
+        }
+        if (!el) return {ok: false, reason: 'not_found'};
+        try { el.scrollIntoView({behavior: 'auto', block: 'center'}); } catch (e) {}
+        try { el.click(); return {ok: true}; } catch (e) {
+            try {
+                el.dispatchEvent(new MouseEvent('click', {bubbles: true, cancelable: true, view: window}));
+                return {ok: true, reason: 'dispatched'};
+            } catch (e2) { return {ok: false, reason: String(e2)}; }
+        }
+    }""",
+    "targetOf": """(el) => {
+        const attrs = ['data-target', 'data-href', 'aria-controls', 'data-bs-target', 'data-target-id'];
+        for (let n = el; n; n = n.parentElement) {
+            try {
+                if (n.tagName && n.tagName.toLowerCase() === 'a') {
+                    const href = n.getAttribute('href');
+                    if (href && href.startsWith('#') && href.length > 1) return {id: href.slice(1), source: 'href'};
+                }
+                for (const a of attrs) {
+                    const v = n.getAttribute && n.getAttribute(a);
+                    if (!v) continue;
+                    if (v.startsWith('#')) return {id: v.replace(/^#/, ''), source: a};
+                    const m = String(v).match(/#([A-Za-z0-9-_]+)/);
+                    if (m) return {id: m[1], source: a};
+                }
+            } catch (e) {}
+        }
+        return null;
+    }""",
+    "isVisible": """(el, fraction) => {
+        const rect = el.getBoundingClientRect();
+        const vh = window.innerHeight || document.documentElement.clientHeight;
+        if (!rect.height) return false;
+        const visibleHeight = Math.min(rect.bottom, vh) - Math.max(rect.top, 0);
+        return visibleHeight > rect.height * fraction;
+    }""",
+    "sectionsOf": """(selector) => [...document.querySelectorAll(selector)].map(n => {
+        const s = n.closest('header, nav, footer, aside, section, main, [role=region]');
+        if (!s) return 'body';
+        return s.tagName.toLowerCase() + (s.id ? '#' + s.id : '');
+    })""",
+    # tags every match with attr=index and journals what later mutations do to the tagged elements;
+    # the journal lives in its own global so it also works inline (--page-helpers off)
+    "watch": """(selector, attr) => {
+        if (window.__pwJournal) window.__pwJournal.observer.disconnect();
+        const key = (n) => n.tagName + '|' + (n.innerText || '').trim().slice(0, 80) + '|' + (n.getAttribute('class') || '');
+        const nodes = document.querySelectorAll(selector);
+        const j = {selector, attr, keys: [], removed: new Set(), changed: new Set(), addedSeen: false, next: nodes.length};
+        nodes.forEach((n, i) => { n.setAttribute(attr, String(i)); j.keys.push(key(n)); });
+        j.key = key;
+        j.observer = new MutationObserver((records) => {
+            for (const r of records) {
+                const t = r.target.nodeType === 1 ? r.target : r.target.parentElement;
+                const host = t && t.closest && t.closest('[' + attr + ']');
+                if (host) j.changed.add(Number(host.getAttribute(attr)));
+                if (r.type !== 'childList') continue;
+                for (const n of r.removedNodes) {
+                    if (n.nodeType !== 1) continue;
+                    if (n.hasAttribute(attr)) j.removed.add(Number(n.getAttribute(attr)));
+                    n.querySelectorAll('[' + attr + ']').forEach(c => j.removed.add(Number(c.getAttribute(attr))));
+                }
+                for (const n of r.addedNodes) {
+                    if (n.nodeType === 1 && (n.matches(selector) || n.querySelector(selector))) j.addedSeen = true;
+                }
+            }
+        });
+        j.observer.observe(document.documentElement, {
+            subtree: true, childList: true, characterData: true, attributes: true,
+            attributeFilter: ['href', 'id', 'role', 'disabled', 'aria-label', 'aria-controls', 'data-target'],
+        });
+        window.__pwJournal = j;
+        return nodes.length;
+    }""",
+    # removed / changed / added indices since the last drain; re-rendered replacements get their old index back
+    "drainJournal": """() => {
+        const j = window.__pwJournal;
+        if (!j) return null;
+        j.observer.takeRecords();
+        const removed = [...j.removed].filter(i => !document.querySelector('[' + j.attr + '="' + i + '"]'));
+        const gone = new Set(removed);
+        const changed = new Set([...j.changed].filter(i => !gone.has(i)));
+        const added = [];
+        if (j.addedSeen) {
+            for (const n of document.querySelectorAll(j.selector)) {
+                if (n.hasAttribute(j.attr)) continue;
+                const k = j.key(n);
+                const same = [...gone].find(i => j.keys[i] === k);
+                if (same !== undefined) {
+                    gone.delete(same);
+                    changed.add(same);
+                    n.setAttribute(j.attr, String(same));
+                } else {
+                    const i = j.next++;
+                    j.keys[i] = k;
+                    n.setAttribute(j.attr, String(i));
+                    added.push(i);
+                }
+            }
+        }
+        j.removed.clear();
+        j.changed.clear();
+        j.addedSeen = false;
+        return {removed: [...gone], changed: [...changed], added};
+    }""",
+    # element record columns for tagged elements (partial re-enumeration)
+    "rows": """(attr, indices, previewChars) => {
+        const pathOf = """ + PATH_OF + """;
+        const fnv = (s) => {
+            let h = 0x811c9dc5;
+            for (let i = 0; i < s.length; i++) { h ^= s.charCodeAt(i); h = Math.imul(h, 0x01000193) >>> 0; }
+            return h.toString(16);
+        };
+        const out = {};
+        for (const i of indices) {
+            const el = document.querySelector('[' + attr + '="' + i + '"]');
+            if (!el) continue;
+            const outer = el.outerHTML || '';
+            out[i] = {
+                text: el.innerText || '', href: el.getAttribute('href'), id: el.getAttribute('id'),
+                cls: el.getAttribute('class'), aria: el.getAttribute('aria-label'),
+                hash: fnv(outer), size: outer.length, preview: outer.slice(0, previewChars), path: pathOf(el),
+            };
+        }
+        return out;
+    }""",
+}
+
+# static target of every match (targetOf), whether it exists and its document offset, in one pass
+FUNCTIONS["targetMap"] = """(selector) => {
+        const targetOf = %s;
+        const y = window.scrollY;
+        return [...document.querySelectorAll(selector)].map(el => {
+            const t = targetOf(el);
+            const r = el.getBoundingClientRect();
+            const entry = {
+                id: t ? t.id : null, source: t ? t.source : null, exists: false, top: null, height: null,
+                margin: 0, rendered: r.width > 0 && r.height > 0, disabled: el.disabled === true || el.hasAttribute('disabled'),
+            };
+            const target = t && document.getElementById(t.id);
+            if (!target) return entry;
+            const tr = target.getBoundingClientRect();
+            entry.exists = true;
+            entry.top = Math.round(tr.top + y);
+            entry.height = Math.round(tr.height);
+            entry.margin = parseFloat(getComputedStyle(target).scrollMarginTop) || 0;
+            return entry;
+        });
+    }""" % FUNCTIONS["targetOf"]
+
+# every #id anchor of selector: target existence, visibility, offset and the scroll position a jump lands on
+FUNCTIONS["hashTargets"] = """(selector) => {
+        const doc = document.scrollingElement || document.documentElement;
+        const vh = window.innerHeight;
+        const maxScroll = Math.max(0, doc.scrollHeight - vh);
+        const padding = parseFloat(getComputedStyle(document.documentElement).scrollPaddingTop) || 0;
+        const y = window.scrollY;
+        return [...document.querySelectorAll(selector)].map(a => {
+            const href = a.getAttribute('href');
+            if (!href || !href.startsWith('#') || href.length < 2) return null;
+            let id = href.slice(1);
+            try { id = decodeURIComponent(id); } catch (e) {}
+            const t = document.getElementById(id);
+            if (!t) return {id, exists: false};
+            const r = t.getBoundingClientRect();
+            const cs = getComputedStyle(t);
+            const top = Math.round(r.top + y);
+            const margin = parseFloat(cs.scrollMarginTop) || 0;
+            const expected = Math.round(Math.min(Math.max(0, top - margin - padding), maxScroll));
+            return {
+                id, exists: true, top, height: Math.round(r.height), margin: margin + padding, expected,
+                visible: r.width > 0 && r.height > 0 && cs.visibility !== 'hidden',
+                in_view: top < expected + vh && top + r.height > expected,
+            };
+        });
+    }"""
+
+ELEMENT_FUNCTIONS = ("targetOf", "isVisible")
+
+# derived from the sources: any change to FUNCTIONS makes an installed library stale
+VERSION = hashlib.sha1(json.dumps(FUNCTIONS, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+INSTALL = "() => {\n    if (window.%s && window.%s.version === '%s') return;\n    window.%s = {\n        version: '%s',\n%s\n    };\n}" % (
+    NAMESPACE, NAMESPACE, VERSION, NAMESPACE, VERSION,
+    ",\n".join(f"        {name}: {source}" for name, source in FUNCTIONS.items()),
+)
+INIT_SCRIPT = f"({INSTALL})();"
+
+# a library of another version (installed by an older init script) counts as missing
+_INSTALLED = f"window.{NAMESPACE} && window.{NAMESPACE}.version === '{VERSION}'"
+_CALL_PAGE = f"([n, a]) => {_INSTALLED} ? window.{NAMESPACE}[n](...a) : '{MISSING}'"
+_CALL_ELEMENT = f"(el, [n, a]) => {_INSTALLED} ? window.{NAMESPACE}[n](el, ...a) : '{MISSING}'"
+
+
+class HelperStats:
+    """Bytes sent over the Playwright channel and evaluate latency per helper."""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.ms: Dict[str, List[float]] = defaultdict(list)
+        self.installs = 0
+
+    def record(self, name: str, sent: int, elapsed_ms: float):
+        self.calls[name] += 1
+        self.bytes[name] += sent
+        self.ms[name].append(elapsed_ms)
+
+    def as_dict(self) -> Dict:
+        return {
+            name: {
+                "calls": n,
+                "bytes_sent": self.bytes[name],
+                "avg_ms": round(sum(self.ms[name]) / n, 2),
+                "max_ms": round(max(self.ms[name]), 2),
+            }
+            for name, n in sorted(self.calls.items())
+        }
+
+    def lines(self) -> List[str]:
+        mode = "library" if ENABLED else "inline"
+        out = [f"mode: {mode}, installs: {self.installs}"]
+        for name, row in self.as_dict().items():
+            out.append(f"{name}: {row['calls']} calls, {row['bytes_sent']} B sent, "
+                       f"avg {row['avg_ms']} ms, max {row['max_ms']} ms")
+        return out
+
+
+STATS = HelperStats()
+
+
+def install(context):
+    """Registers the library for every document of the context (or page)."""
+    if ENABLED:
+        context.add_init_script(INIT_SCRIPT)
+
+
+def _page_of(target):
+    page = getattr(target, "page", None)
+    return page if page is not None else target
+
+
+def call(target, name: str, *args):
+    """Calls a helper on a Page (document helpers) or a Locator (element helpers)."""
+    is_element = name in ELEMENT_FUNCTIONS
+    if not ENABLED:
+        if is_element:
+            expression = f"(el, a) => ({FUNCTIONS[name]})(el, ...a)"
+        else:
+            expression = f"(a) => ({FUNCTIONS[name]})(...a)"
+        t0 = time.perf_counter()
+        result = target.evaluate(expression, list(args))
+        STATS.record(name, len(expression) + len(json.dumps(args)), (time.perf_counter() - t0) * 1000)
+        return result
+
+    expression = _CALL_ELEMENT if is_element else _CALL_PAGE
+    payload = [name, list(args)]
+    sent = len(expression) + len(json.dumps(payload))
+    t0 = time.perf_counter()
+    result = target.evaluate(expression, payload)
+    if result == MISSING:
+        # document loaded before install() (e.g. a preloaded page) or a stale library: inject once, then retry
+        _page_of(target).evaluate(INSTALL)
+        STATS.installs += 1
+        sent = 2 * sent + len(INSTALL)
+        result = target.evaluate(expression, payload)
+    STATS.record(name, sent, (time.perf_counter() - t0) * 1000)
+    return result
+
+
+def tag_all(page, selector: str, attr: str = "data-pw-idx") -> int:
+    return call(page, "tagAll", selector, attr)
+
+
+def tag_by_outer(page, snippet: str, attr: str = "data-pw-found") -> bool:
+    return bool(call(page, "tagByOuter", snippet, attr))
+
+
+def untag(page, attr: str):
+    call(page, "untag", attr)
+
+
+def click_by_outer(page, snippet: str) -> Dict:
+    return call(page, "clickByOuter", snippet) or {"ok": False, "reason": "no result"}
+
+
+def sections_of(page, selector: str) -> List[str]:
+    """Closest landmark / section of every match (section#id, header, footer, body...)."""
+    return call(page, "sectionsOf", selector) or []
+
+
+def target_map(page, selector: str) -> List[Dict]:
+    """targetOf + existence + document offset of the target for every match of selector."""
+    return call(page, "targetMap", selector) or []
+
+
+def hash_targets(page, selector: str) -> List[Optional[Dict]]:
+    """Per match of selector: None (not a #id link) or the target's existence, visibility and expected scroll."""
+    return call(page, "hashTargets", selector) or []
+
+
+def target_of(locator) -> Optional[Dict[str, str]]:
+    return call(locator, "targetOf")
+
+
+def is_visible(locator, fraction: float = 0.1) -> bool:
+    return bool(call(locator, "isVisible", fraction))
@@ -0,0 +1,154 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Buffers long tasks, layout shifts and slow event handlers (Event Timing API) in page.
+INSTALL_PERF_OBSERVERS = """
+() => {
+    if (window.__pw_perf) return true;
+    const buf = window.__pw_perf = { longtask: [], shift: [], event: [] };
+    const observe = (type, opts, sink) => {
+        try {
+            new PerformanceObserver(list => list.getEntries().forEach(sink)).observe(Object.assign({ type }, opts));
+        } catch (e) {}
+    };
+    observe('longtask', {}, e => buf.longtask.push({ start: e.startTime, duration: e.duration }));
+    observe('layout-shift', {}, e => buf.shift.push({ start: e.startTime, value: e.value }));
+    observe('event', { durationThreshold: 16 }, e => buf.event.push({ start: e.startTime, duration: e.duration, name: e.name }));
+    return true;
+}
+"""
+
+# Marks the start of a measured interaction: returns performance.now().
+MARK = "() => performance.now()"
+
+# Collects entries since mark; waits one frame so observer callbacks are delivered.
+COLLECT = """
+async (since) => {
+    await new Promise(r => requestAnimationFrame(() => setTimeout(r, 0)));
+    const buf = window.__pw_perf || { longtask: [], shift: [], event: [] };
+    const lt = buf.longtask.filter(e => e.start >= since);
+    const sh = buf.shift.filter(e => e.start >= since);
+    const ev = buf.event.filter(e => e.start >= since);
+    return {
+        long_tasks: lt.length,
+        long_task_ms: lt.reduce((a, e) => a + e.duration, 0),
+        max_long_task_ms: lt.reduce((a, e) => Math.max(a, e.duration), 0),
+        cls: sh.reduce((a, e) => a + e.value, 0),
+        event_ms: ev.reduce((a, e) => Math.max(a, e.duration), 0),
+    };
+}
+"""
+
+# CDP Performance.getMetrics names -> result keys; *_ms are reported in seconds by CDP
+CDP_METRICS = {
+    "LayoutCount": "layout_count",
+    "RecalcStyleCount": "recalc_style_count",
+    "LayoutDuration": "layout_ms",
+    "RecalcStyleDuration": "recalc_style_ms",
+    "ScriptDuration": "script_ms",
+    "TaskDuration": "task_ms",
+}
+
+
+def parse_budget(spec: Optional[str]) -> Dict[str, float]:
+    """'long_task_ms=200,layout_count=40,cls=0.1' -> {'long_task_ms': 200.0, ...}"""
+    budget = {}
+    for part in (spec or "").split(","):
+        key, sep, value = part.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            budget[key.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid click budget entry '{part}', expected key=number")
+    return budget
+
+
+def interaction_cost(perf: Dict) -> float:
+    return (perf.get("script_ms") or 0) + (perf.get("layout_ms") or 0) + \
+        (perf.get("recalc_style_ms") or 0) + (perf.get("long_task_ms") or 0)
+
+
+def rank_interactions(results: List[Dict], top: int = 15) -> List[str]:
+    """Text table of the most expensive interactions."""
+    rows = sorted(results, key=interaction_cost, reverse=True)[:top]
+    cols = ("script_ms", "layout_ms", "recalc_style_ms", "layout_count", "long_task_ms", "event_ms", "cls")
+    out = [f"{'interaction':<48} " + " ".join(f"{c:>15}" for c in cols)]
+    for r in rows:
+        label = (r.get("label") or "")[:48]
+        out.append(f"{label:<48} " + " ".join(f"{str(r.get(c, '-')):>15}" for c in cols))
+    return out
+
+
+class ClickProbe:
+    """
+    Measures main-thread cost of a single interaction: PerformanceObserver entries
+    (long tasks, layout shifts, event timing) plus CDP Performance.getMetrics deltas.
+    """
+
+    def __init__(self, page, budget: Optional[Dict[str, float]] = None):
+        self.page = page
+        self.budget = budget or {}
+        self.results: List[Dict] = []
+        self._cdp = None
+        try:
+            self._cdp = page.context.new_cdp_session(page)
+            self._cdp.send("Performance.enable")
+        except Exception:
+            self._cdp = None
+
+    def _metrics(self) -> Dict[str, float]:
+        if self._cdp is None:
+            return {}
+        try:
+            raw = self._cdp.send("Performance.getMetrics").get("metrics", [])
+        except Exception:
+            return {}
+        return {m["name"]: m["value"] for m in raw if m.get("name") in CDP_METRICS}
+
+    @contextmanager
+    def measure(self, label: str):
+        """with probe.measure('CTA #3') as perf: click() -> perf is filled on exit"""
+        perf: Dict = {"label": label}
+        try:
+            self.page.evaluate(INSTALL_PERF_OBSERVERS)
+            since = self.page.evaluate(MARK)
+        except Exception:
+            since = None
+        before = self._metrics()
+        t0 = time.perf_counter()
+        try:
+            yield perf
+        finally:
+            perf["wall_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            after = self._metrics()
+            for name, key in CDP_METRICS.items():
+                if name in before and name in after:
+                    delta = after[name] - before[name]
+                    perf[key] = round(delta * 1000, 1) if key.endswith("_ms") else int(delta)
+            if since is not None:
+                try:
+                    observed = self.page.evaluate(COLLECT, since) or {}
+                    perf.update({k: round(v, 4) if k == "cls" else round(v, 1) for k, v in observed.items()})
+                except Exception:
+                    pass
+            perf["violations"] = self.check(perf)
+            self.results.append(perf)
+
+    def check(self, perf: Dict) -> List[str]:
+        return [
+            f"{key}={perf[key]} exceeds budget {limit:g}"
+            for key, limit in self.budget.items()
+            if perf.get(key) is not None and perf[key] > limit
+        ]
+
+    def ranking(self, top: int = 15) -> List[str]:
+        return rank_interactions(self.results, top)
+
+    def close(self):
+        if self._cdp is not None:
+            try:
+                self._cdp.detach()
+            except Exception:
+                pass
@@ -0,0 +1,224 @@
+"""
+Pipelined page loading: the next K URLs load in background pages of the same
+context while the current one is being checked.
+
+    python -m utils.prefetch https://effective-mobile.ru/ https://effective-mobile.ru/about --depth 3
+    python -m utils.prefetch urls.txt --depth 3 --compare
+
+The CLI runs the static anchor pre-check (utils.static_check) on every page of a
+URL list; --compare runs the same list serially first and reports the speedup.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+from pages.base_page import BasePage
+
+# load time of the current document (navigation timing), ms
+LOAD_MS = """
+() => {
+    const n = performance.getEntriesByType('navigation')[0];
+    return n ? (n.loadEventEnd || n.duration || null) : null;
+}
+"""
+
+
+class PrefetchPipeline:
+    """
+    Keeps up to `depth` pages loading ahead (BasePage.preload: navigation started,
+    load not awaited) and hands them over in URL order. take(url) returns the
+    loaded page for url, closing prefetched pages the caller skipped; the caller
+    owns and closes the returned page and must use it instead of loading url
+    again. A page that does not finish loading within take()'s timeout is closed
+    and None is returned. depth=0 disables prefetching (take() -> None).
+
+    Per handoff it records how long the caller still had to wait for the load and
+    how long the load took in the browser; for pages that were handed over the
+    difference is time saved compared with loading after the previous check.
+    """
+
+    def __init__(self, context, urls: List[str], depth: int = 2, timeout: float = 15000):
+        self.context = context
+        self.urls = list(urls)
+        self.depth = max(0, depth)
+        self.timeout = timeout
+        self._next = 0
+        self._window = deque()
+        self.rows: List[Dict] = []
+        self.skipped = 0
+        self.started = time.perf_counter()
+        self._status = WeakKeyDictionary()
+
+    def _fill(self):
+        while len(self._window) < self.depth and self._next < len(self.urls):
+            url = self.urls[self._next]
+            self._next += 1
+            page = None
+            try:
+                page = self.context.new_page()
+                response = BasePage(page).preload(url)
+                self._status[page] = response.status if response is not None else None
+            except Exception:
+                # unreachable / non-http URL: the caller's own navigation reports the error
+                if page is not None:
+                    self._close(page)
+                page = None
+            self._window.append((url, page))
+
+    @staticmethod
+    def _close(page):
+        try:
+            page.close()
+        except Exception:
+            pass
+
+    def take(self, url: str, timeout: Optional[float] = None):
+        """
+        Loaded page for url if it is in the prefetch window and loads within
+        timeout (capped by the pipeline's own), else None (load it yourself).
+        """
+        if not self.depth:
+            return None
+        self._fill()
+        if url not in [u for u, _ in self._window]:
+            return None
+        while self._window:
+            head, page = self._window.popleft()
+            if head == url:
+                break
+            self.skipped += 1
+            if page is not None:
+                self._close(page)
+        # start the following loads before waiting for this one
+        self._fill()
+        if page is None or page.is_closed():
+            return None
+        t0 = time.perf_counter()
+        try:
+            page.wait_for_load_state("load", timeout=min(timeout, self.timeout) if timeout else self.timeout)
+            BasePage(page).goto(url)  # consumes the preload mark without a second navigation
+            loaded = True
+        except Exception:
+            loaded = False
+        wait_ms = (time.perf_counter() - t0) * 1000
+        load_ms = None
+        if loaded:
+            try:
+                load_ms = page.evaluate(LOAD_MS)
+            except Exception:
+                pass
+        self.rows.append({"url": url, "handed_over": loaded, "wait_ms": round(wait_ms, 1),
+                          "load_ms": round(load_ms, 1) if load_ms is not None else None})
+        if not loaded:
+            self._close(page)
+            return None
+        return page
+
+    def status(self, page) -> Optional[int]:
+        """HTTP status of the prefetched document of page (None if unknown)."""
+        return self._status.get(page)
+
+    def owns(self, page) -> bool:
+        """Whether page is a prefetched page still waiting in the window."""
+        return any(p is page for _, p in self._window)
+
+    def close(self):
+        while self._window:
+            _, page = self._window.popleft()
+            if page is not None:
+                self._close(page)
+
+    def report(self) -> Dict:
+        # only pages the caller actually used count: a load that timed out was wasted, not saved
+        reused = [r for r in self.rows if r["handed_over"] and r["load_ms"] is not None]
+        waited = sum(r["wait_ms"] for r in reused)
+        loads = sum(r["load_ms"] for r in reused)
+        return {
+            "depth": self.depth,
+            "urls": len(self.urls),
+            "handed_over": sum(1 for r in self.rows if r["handed_over"]),
+            "timed_out": sum(1 for r in self.rows if not r["handed_over"]),
+            "skipped": self.skipped,
+            "wait_ms": round(sum(r["wait_ms"] for r in self.rows), 1),
+            "load_ms": round(loads, 1),
+            "saved_ms": round(max(0.0, loads - waited), 1) if reused else None,
+            "pages": self.rows,
+        }
+
+
+def _check(page) -> Dict:
+    from utils.static_check import precheck
+
+    return precheck(page.content()).summary()
+
+
+def run(context, urls: List[str], depth: int) -> Dict:
+    """Static pre-check of every URL; depth 0 loads each page after the previous check."""
+    started = time.perf_counter()
+    pipeline = PrefetchPipeline(context, urls, depth=depth)
+    results = []
+    try:
+        for url in urls:
+            page = pipeline.take(url)
+            if page is None:
+                page = context.new_page()
+                try:
+                    page.goto(url, wait_until="load")
+                except Exception as e:
+                    results.append({"url": url, "error": str(e)})
+                    page.close()
+                    continue
+            try:
+                results.append({"url": url, **_check(page)})
+            finally:
+                page.close()
+    finally:
+        pipeline.close()
+    wall = time.perf_counter() - started
+    return {"depth": depth, "wall_s": round(wall, 2), "pages_per_s": round(len(urls) / wall, 2) if wall else None,
+            "pipeline": pipeline.report(), "results": results}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.prefetch", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="+", help="URLs or a file with one URL per line")
+    parser.add_argument("--depth", type=int, default=2, help="pages loading ahead (memory bound)")
+    parser.add_argument("--compare", action="store_true", help="run serially first and report the speedup")
+    parser.add_argument("--headless", default="1")
+    args = parser.parse_args(argv)
+
+    urls: List[str] = []
+    for value in args.urls:
+        if value.startswith(("http://", "https://")):
+            urls.append(value)
+        else:
+            with open(value, "r", encoding="utf-8") as f:
+                urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=args.headless != "0")
+        try:
+            serial: Optional[Dict] = None
+            if args.compare:
+                serial = run(browser.new_context(), urls, 0)
+            piped = run(browser.new_context(), urls, args.depth)
+        finally:
+            browser.close()
+
+    out = {"pipelined": {k: v for k, v in piped.items() if k != "results"}, "results": piped["results"]}
+    if serial:
+        out["serial"] = {k: v for k, v in serial.items() if k not in ("results", "pipeline")}
+        out["speedup"] = round(serial["wall_s"] / piped["wall_s"], 2) if piped["wall_s"] else None
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
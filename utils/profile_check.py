@@ -0,0 +1,195 @@
+"""
+Profile the check of a single anchor or CTA without running the whole loop.
+
+    python -m utils.profile_check cta --element 12
+    python -m utils.profile_check cta --element "text:Оставить заявку" --repeat 5
+    python -m utils.profile_check anchors --element "css:footer a" --top 40
+
+Runs the real test (same fixtures, same per-element logic) restricted to the
+selected elements (--element, see utils.element_filter) under cProfile, times every
+Playwright sync call and splits each element step's wall time into Python,
+IPC and browser time. With --repeat N the run is repeated and latency
+percentiles per element are reported. The .prof file is kept for snakeviz /
+pstats.
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from utils.web_vitals import percentile
+
+TESTS = {
+    "anchors": "tests/test_anchors_and_links.py::test_anchors_and_links",
+    "cta": "tests/test_cta_buttons.py::test_cta_buttons_scroll",
+}
+
+class PlaywrightCallTimer:
+    """Wraps SyncBase._sync: every sync API call is timed by name (e.g. Locator.click)."""
+
+    def __init__(self):
+        self.calls: Dict[str, List[float]] = defaultdict(list)
+        self.wait_total = 0.0
+        self.count = 0
+        self._original = None
+
+    def install(self):
+        from playwright._impl._sync_base import SyncBase
+
+        original = SyncBase._sync
+        timer = self
+
+        def _sync(obj, coro, *args, **kwargs):
+            name = getattr(coro, "__qualname__", None) or type(coro).__name__
+            t0 = time.perf_counter()
+            try:
+                return original(obj, coro, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                timer.calls[name].append(elapsed)
+                timer.wait_total += elapsed
+                timer.count += 1
+
+        self._original = original
+        SyncBase._sync = _sync
+
+    def uninstall(self):
+        if self._original is not None:
+            from playwright._impl._sync_base import SyncBase
+
+            SyncBase._sync = self._original
+            self._original = None
+
+    def ipc_floor(self) -> float:
+        """Round trip of the cheapest calls: an estimate of pure IPC cost per call (seconds)."""
+        fastest = sorted(min(v) for v in self.calls.values() if v)
+        return fastest[0] if fastest else 0.0
+
+    def table(self, top: int = 20) -> List[str]:
+        rows = sorted(self.calls.items(), key=lambda kv: sum(kv[1]), reverse=True)[:top]
+        out = [f"{'call':40} {'n':>6} {'total ms':>10} {'avg ms':>8} {'p90 ms':>8}"]
+        for name, values in rows:
+            out.append(f"{name[:40]:40} {len(values):6d} {sum(values) * 1000:10.1f} "
+                       f"{sum(values) / len(values) * 1000:8.2f} {percentile(values, 90) * 1000:8.2f}")
+        return out
+
+
+def _step_profiler(timer: PlaywrightCallTimer):
+    from utils.step_listener import StepListener
+
+    class StepProfile(StepListener):
+        """Per element step: wall time and the part spent waiting in Playwright calls."""
+
+        def __init__(self):
+            super().__init__()
+            self.steps: List[Dict] = []
+            self._mark = (0.0, 0)
+
+        def on_step_start(self, title: str):
+            self._mark = (timer.wait_total, timer.count)
+
+        def on_step_stop(self, title: str, failed: bool, duration: float):
+            wait = timer.wait_total - self._mark[0]
+            calls = timer.count - self._mark[1]
+            ipc = min(wait, calls * timer.ipc_floor())
+            self.steps.append({
+                "title": title, "failed": failed, "wall_ms": round(duration * 1000, 1), "calls": calls,
+                "python_ms": round((duration - wait) * 1000, 1),
+                "ipc_ms": round(ipc * 1000, 1),
+                "browser_ms": round((wait - ipc) * 1000, 1),
+            })
+
+    return StepProfile()
+
+
+def _distribution(steps: List[Dict]) -> Dict[str, Dict]:
+    by_title: Dict[str, List[Dict]] = defaultdict(list)
+    for s in steps:
+        by_title[s["title"]].append(s)
+    out = {}
+    for title, runs in by_title.items():
+        walls = [r["wall_ms"] for r in runs]
+        out[title] = {
+            "runs": len(runs),
+            "failed": sum(1 for r in runs if r["failed"]),
+            "p50_ms": percentile(walls, 50), "p90_ms": percentile(walls, 90), "max_ms": max(walls),
+            "python_ms": round(sum(r["python_ms"] for r in runs) / len(runs), 1),
+            "ipc_ms": round(sum(r["ipc_ms"] for r in runs) / len(runs), 1),
+            "browser_ms": round(sum(r["browser_ms"] for r in runs) / len(runs), 1),
+            "calls": round(sum(r["calls"] for r in runs) / len(runs), 1),
+        }
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.profile_check", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("test", choices=sorted(TESTS))
+    parser.add_argument("--element", required=True, help='index ("12", "3,7"), "text:<substring>" or "css:<selector>"')
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--top", type=int, default=25, help="rows of the cProfile / Playwright call tables")
+    parser.add_argument("--output", default="reports", help="directory for the .prof and JSON results")
+    args, pytest_args = parser.parse_known_args(argv)
+
+    import pytest
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(root)
+    os.makedirs(args.output, exist_ok=True)
+
+    timer = PlaywrightCallTimer()
+    timer.install()
+    profile = _step_profiler(timer)
+    profiler = cProfile.Profile()
+    exit_codes = []
+    try:
+        profile.register()
+        for _ in range(max(1, args.repeat)):
+            profiler.enable()
+            try:
+                exit_codes.append(int(pytest.main([
+                    TESTS[args.test], "-q", "-p", "no:cacheprovider", f"--element={args.element}",
+                    "--html-report=off", "--history-db=off", *pytest_args,
+                ])))
+            finally:
+                profiler.disable()
+    finally:
+        profile.unregister()
+        timer.uninstall()
+
+    prof_path = os.path.join(args.output, f"profile-{args.test}.prof")
+    profiler.dump_stats(prof_path)
+    buf = io.StringIO()
+    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(args.top)
+
+    result = {
+        "test": TESTS[args.test],
+        "element": args.element,
+        "repeat": args.repeat,
+        "exit_codes": exit_codes,
+        "ipc_floor_ms": round(timer.ipc_floor() * 1000, 3),
+        "elements": _distribution(profile.steps),
+        "steps": profile.steps,
+    }
+    with open(os.path.join(args.output, f"profile-{args.test}.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(buf.getvalue())
+    print("\n".join(timer.table(args.top)))
+    print(f"\nIPC floor per call: {result['ipc_floor_ms']} ms (cheapest observed round trip)")
+    for title, row in result["elements"].items():
+        print(f"{title}: {row['runs']} runs, p50 {row['p50_ms']} ms, p90 {row['p90_ms']} ms, max {row['max_ms']} ms | "
+              f"python {row['python_ms']} / ipc {row['ipc_ms']} / browser {row['browser_ms']} ms, "
+              f"{row['calls']} Playwright calls")
+    print(f"\n{prof_path}")
+    return max(exit_codes) if exit_codes else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Local run history: one row per checked element per run, in SQLite (WAL mode).
+
+    python -m utils.run_history slowest [--runs 20] [--limit 20]
+    python -m utils.run_history flaky [--runs 20] [--limit 20]
+    python -m utils.run_history regressions [--baseline 10] [--factor 1.5]
+    python -m utils.run_history runs [--limit 10]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from utils.step_listener import StepListener
+
+DEFAULT_DB = os.getenv("RUN_HISTORY_DB", "reports/run-history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL,
+    base_url TEXT,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS elements (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    kind TEXT,
+    label TEXT,
+    outcome TEXT NOT NULL,
+    duration_ms REAL NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    artifact_bytes INTEGER NOT NULL DEFAULT 0,
+    steps TEXT
+);
+CREATE INDEX IF NOT EXISTS elements_fp ON elements(fingerprint, run_id);
+CREATE INDEX IF NOT EXISTS elements_run ON elements(run_id);
+"""
+
+
+def element_fingerprint(title: str, scope: str = "") -> str:
+    """
+    Stable id of an element across runs: the step title without its position
+    index (+ viewport etc.). Titles carry an ``@key`` of the element's ancestor
+    path (ElementRecord.key), so repeated elements with one label stay apart.
+    """
+    normalized = scope + "|" + re.sub(r"#\d+\s*", "", title or "").strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def element_kind(title: str) -> str:
+    return (title or "").split(" ", 1)[0].lower()
+
+
+class RunHistory:
+    def __init__(self, path: str = DEFAULT_DB, batch_size: int = 50):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.run_id: Optional[int] = None
+        self._pending: List[tuple] = []
+
+    def start_run(self, base_url: Optional[str] = None, label: Optional[str] = None) -> int:
+        with self.conn:
+            cur = self.conn.execute("INSERT INTO runs (started, base_url, label) VALUES (?, ?, ?)",
+                                    (time.time(), base_url, label))
+        self.run_id = cur.lastrowid
+        return self.run_id
+
+    def add(self, test: str, title: str, outcome: str, duration_ms: float, retries: int = 0,
+            artifact_bytes: int = 0, steps: Optional[Dict[str, float]] = None, scope: str = ""):
+        self._pending.append((
+            self.run_id, test, element_fingerprint(title, scope), element_kind(title), title, outcome,
+            round(duration_ms, 1), retries, artifact_bytes, json.dumps(steps or {}, ensure_ascii=False),
+        ))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO elements (run_id, test, fingerprint, kind, label, outcome, duration_ms, retries,"
+                " artifact_bytes, steps) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending = []
+
+    def finish_run(self):
+        self.flush()
+        if self.run_id is not None:
+            with self.conn:
+                self.conn.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), self.run_id))
+
+    def close(self):
+        self.finish_run()
+        self.conn.close()
+
+    # ----- queries -----
+    def _recent_runs(self, runs: int) -> List[int]:
+        rows = self.conn.execute("SELECT id FROM runs ORDER BY id DESC LIMIT ?", (runs,)).fetchall()
+        return [r[0] for r in rows]
+
+    def run_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def fingerprints(self, runs: int, outcome: Optional[str] = None, test: Optional[str] = None) -> set:
+        """Fingerprints checked in the last `runs` finished or current runs (optionally with an outcome)."""
+        ids = self._recent_runs(runs)
+        if not ids:
+            return set()
+        q = ",".join("?" * len(ids))
+        sql = f"SELECT DISTINCT fingerprint FROM elements WHERE run_id IN ({q})"
+        params: list = list(ids)
+        if outcome is not None:
+            sql += " AND outcome = ?"
+            params.append(outcome)
+        if test is not None:
+            sql += " AND test = ?"
+            params.append(test)
+        return {r[0] for r in self.conn.execute(sql, params)}
+
+    def slowest(self, runs: int = 20, limit: int = 20) -> List[Dict]:
+        ids = self._recent_runs(runs)
+        if not ids:
+            return []
+        q = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"SELECT fingerprint, MAX(label), COUNT(*), AVG(duration_ms), MAX(duration_ms) FROM elements"
+            f" WHERE run_id IN ({q}) GROUP BY fingerprint ORDER BY AVG(duration_ms) DESC LIMIT ?",
+            (*ids, limit),
+        ).fetchall()
+        return [{"fingerprint": r[0], "label": r[1], "samples": r[2], "avg_ms": round(r[3], 1), "max_ms": r[4]}
+                for r in rows]
+
+    def flaky(self, runs: int = 20, limit: int = 20) -> List[Dict]:
+        ids = self._recent_runs(runs)
+        if not ids:
+            return []
+        q = ",".join("?" * len(ids))
+        # one outcome per element per run (failed if any of its rows failed), in run order
+        rows = self.conn.execute(
+            f"SELECT fingerprint, MAX(label), run_id, SUM(outcome != 'passed') FROM elements WHERE run_id IN ({q})"
+            f" GROUP BY fingerprint, run_id ORDER BY run_id",
+            ids,
+        ).fetchall()
+        by_fp: Dict[str, Dict] = {}
+        for fp, label, _, fails in rows:
+            rec = by_fp.setdefault(fp, {"fingerprint": fp, "label": label, "outcomes": []})
+            rec["outcomes"].append("failed" if fails else "passed")
+        out = []
+        for rec in by_fp.values():
+            outcomes = rec.pop("outcomes")
+            fails = sum(1 for o in outcomes if o != "passed")
+            if 0 < fails < len(outcomes):
+                rec["runs"] = len(outcomes)
+                rec["fail_rate"] = round(fails / len(outcomes), 3)
+                rec["flips"] = sum(1 for a, b in zip(outcomes, outcomes[1:]) if a != b)
+                out.append(rec)
+        out.sort(key=lambda r: (r["flips"], r["fail_rate"]), reverse=True)
+        return out[:limit]
+
+    def regressions(self, baseline: int = 10, factor: float = 1.5, min_ms: float = 200.0) -> List[Dict]:
+        """Elements of the latest run that are `factor` times slower than their rolling median."""
+        ids = self._recent_runs(baseline + 1)
+        if len(ids) < 2:
+            return []
+        latest, previous = ids[0], ids[1:]
+        q = ",".join("?" * len(previous))
+        # one duration per element per run (the mean of its rows), median over the baseline runs
+        history: Dict[str, List[float]] = {}
+        for fp, ms in self.conn.execute(
+            f"SELECT fingerprint, AVG(duration_ms) FROM elements WHERE run_id IN ({q}) GROUP BY fingerprint, run_id",
+            previous,
+        ):
+            history.setdefault(fp, []).append(ms)
+        out = []
+        for fp, label, ms, outcome in self.conn.execute(
+            "SELECT fingerprint, MAX(label), ROUND(AVG(duration_ms), 1),"
+            " CASE WHEN SUM(outcome != 'passed') THEN 'failed' ELSE 'passed' END"
+            " FROM elements WHERE run_id = ? GROUP BY fingerprint", (latest,)
+        ):
+            if fp not in history:
+                continue
+            base = statistics.median(history[fp])
+            if ms >= min_ms and base > 0 and ms / base >= factor:
+                out.append({"fingerprint": fp, "label": label, "latest_ms": ms, "baseline_ms": round(base, 1),
+                            "ratio": round(ms / base, 2), "outcome": outcome})
+        out.sort(key=lambda r: r["ratio"], reverse=True)
+        return out
+
+
+class HistoryRecorder(StepListener):
+    """Feeds every element step of a test into RunHistory."""
+
+    def __init__(self, history: RunHistory, test: str, scope: str = ""):
+        super().__init__()
+        self.history = history
+        self.test = test
+        self.scope = scope
+        self._retries = 0
+        self._bytes = 0
+        self._steps: Dict[str, float] = {}
+
+    def note_retry(self):
+        self._retries += 1
+
+    def on_step_start(self, title: str):
+        self._retries = 0
+        self._bytes = 0
+        self._steps = {}
+
+    def on_substep_stop(self, title: str, duration: float):
+        self._steps[title] = round(self._steps.get(title, 0.0) + duration * 1000, 1)
+
+    def on_attachment(self, name: str, size: int):
+        self._bytes += size
+
+    def on_step_stop(self, title: str, failed: bool, duration: float):
+        self.history.add(self.test, title, "failed" if failed else "passed", duration * 1000,
+                         retries=self._retries, artifact_bytes=self._bytes, steps=self._steps, scope=self.scope)
+
+
+def _print_rows(rows: List[Dict]):
+    if not rows:
+        print("no data")
+        return
+    cols = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(str(r.get(c))) for r in rows)) for c in cols}
+    widths["label"] = min(widths.get("label", 0), 60)
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r.get(c))[:widths[c]].ljust(widths[c]) for c in cols))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.run_history", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("slowest")
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("flaky")
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("regressions")
+    p.add_argument("--baseline", type=int, default=10)
+    p.add_argument("--factor", type=float, default=1.5)
+    p = sub.add_parser("runs")
+    p.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"no history database at {args.db}", file=sys.stderr)
+        return 1
+    history = RunHistory(args.db)
+    try:
+        if args.command == "slowest":
+            _print_rows(history.slowest(args.runs, args.limit))
+        elif args.command == "flaky":
+            _print_rows(history.flaky(args.runs, args.limit))
+        elif args.command == "regressions":
+            _print_rows(history.regressions(args.baseline, args.factor))
+        else:
+            rows = history.conn.execute(
+                "SELECT r.id, datetime(r.started, 'unixepoch'), r.finished - r.started, r.base_url, COUNT(e.rowid),"
+                " SUM(e.outcome != 'passed') FROM runs r LEFT JOIN elements e ON e.run_id = r.id"
+                " GROUP BY r.id ORDER BY r.id DESC LIMIT ?", (args.limit,)
+            ).fetchall()
+            _print_rows([{"run": r[0], "started": r[1], "duration_s": round(r[2] or 0, 1), "base_url": r[3],
+                          "elements": r[4], "failed": r[5] or 0} for r in rows])
+    finally:
+        history.conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
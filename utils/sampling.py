@@ -0,0 +1,139 @@
+import hashlib
+import math
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.run_history import RunHistory, element_fingerprint
+
+
+def _rank(seed: str, fingerprint: str) -> str:
+    return hashlib.sha1(f"{seed}|{fingerprint}".encode("utf-8")).hexdigest()
+
+
+class RotatingSampler:
+    """
+    Picks about K elements per run so that every element is checked within
+    `cycle` runs.
+
+    Elements are grouped into strata (section x kind), ordered inside each stratum
+    by a seeded hash of their fingerprint and dealt round-robin into `cycle`
+    slots, so every slot is a proportional cross-section of the page. Run r checks
+    slot r % cycle in full (that is the coverage guarantee) and tops up to K from
+    the following slots. Elements that failed within the last cycle or were never
+    seen (new or changed text/href -> new fingerprint) are added on top, up to half
+    of K, without displacing slot members. With only K given, cycle = ceil(n / K);
+    with only cycle given, K = ceil(n / cycle).
+
+    run_index: position in the rotation; the caller passes a per-run counter
+    (conftest keeps one in the pytest cache), else the history db run count, else
+    the day number.
+    """
+
+    def __init__(self, k: int = 0, cycle: int = 0, seed: str = "", run_index: Optional[int] = None,
+                 history: Optional[RunHistory] = None, test: Optional[str] = None, scope: str = ""):
+        self.k = k
+        self.cycle = cycle
+        self.seed = seed
+        self.history = history
+        self.test = test
+        self.scope = scope
+        if run_index is None:
+            run_index = history.run_count() - 1 if history is not None else int(time.time() // 86400)
+        self.run_index = max(0, run_index)
+        self._report: Dict = {}
+        self._failed: Set[str] = set()
+        self._seen: Set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.k or self.cycle)
+
+    def select(self, items: List[Tuple[int, str, str, str]]) -> Set[int]:
+        """items: (index, step title, section, kind) -> indices to check in this run."""
+        n = len(items)
+        if not self.enabled or not n:
+            return {idx for idx, *_ in items}
+        cycle = self.cycle or max(1, math.ceil(n / self.k))
+        k = self.k or max(1, math.ceil(n / cycle))
+        slot = self.run_index % cycle
+
+        fps = {idx: element_fingerprint(title, self.scope) for idx, title, _, _ in items}
+        strata: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for idx, _, section, kind in items:
+            strata[(section, kind)].append(idx)
+        slots: Dict[int, int] = {}
+        offset = 0
+        for key in sorted(strata):
+            members = sorted(strata[key], key=lambda i: _rank(self.seed, fps[i]))
+            for j, idx in enumerate(members):
+                slots[idx] = (offset + j) % cycle
+            offset += len(members)
+
+        failed: Set[str] = set()
+        seen: Set[str] = set()
+        covered: Set[str] = set()
+        if self.history is not None:
+            try:
+                failed = self.history.fingerprints(cycle, outcome="failed", test=self.test)
+                seen = self.history.fingerprints(10_000, test=self.test)
+                covered = self.history.fingerprints(cycle, test=self.test)
+            except Exception:
+                pass
+
+        self._failed, self._seen = failed, seen
+
+        order = [idx for idx, *_ in items]
+        priority = [i for i in order if fps[i] in failed] + \
+                   [i for i in order if seen and fps[i] not in seen and fps[i] not in failed]
+        # the whole slot, then the following slots up to K, then the priority picks on top
+        chosen: List[int] = [i for i in order if slots[i] == slot]
+        for s in range(1, cycle):
+            for i in order:
+                if len(chosen) >= k:
+                    break
+                if slots[i] == (slot + s) % cycle:
+                    chosen.append(i)
+            if len(chosen) >= k:
+                break
+        taken = set(chosen)
+        extra = [i for i in priority if i not in taken][:max(1, k // 2)]
+
+        selected = taken | set(extra)
+        cycle_covered = {fps[i] for i in selected} | (covered & set(fps.values()))
+        self._report = {
+            "run_index": self.run_index,
+            "cycle": cycle,
+            "slot": slot,
+            "k": k,
+            "elements": n,
+            "selected": len(selected),
+            "prioritized": len(extra),
+            "strata": len(strata),
+            "coverage_this_run_pct": round(100.0 * len(selected) / n, 1),
+            "coverage_cycle_pct": round(100.0 * len(cycle_covered) / len(set(fps.values())), 1),
+        }
+        return selected
+
+    def extend(self, items: List[Tuple[int, str, str, str]]) -> Set[int]:
+        """
+        Elements that appeared during the run (after select()): checked when they
+        failed recently, were never seen, or their fingerprint falls into this run's slot.
+        """
+        if not self.enabled or not self._report:
+            return {idx for idx, *_ in items}
+        cycle, slot = self._report["cycle"], self._report["slot"]
+        keep = set()
+        for idx, title, _, _ in items:
+            fp = element_fingerprint(title, self.scope)
+            if fp in self._failed or (self._seen and fp not in self._seen) or int(_rank(self.seed, fp), 16) % cycle == slot:
+                keep.add(idx)
+        rep = self._report
+        rep["elements"] += len(items)
+        rep["selected"] += len(keep)
+        rep["added_during_run"] = rep.get("added_during_run", 0) + len(items)
+        rep["coverage_this_run_pct"] = round(100.0 * rep["selected"] / rep["elements"], 1)
+        return keep
+
+    def report(self) -> Dict:
+        return self._report
@@ -0,0 +1,174 @@
+import base64
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageStat
+
+
+class TransitionRecorder:
+    """
+    Records what a click does on screen with CDP Page.startScreencast: small JPEG
+    frames arrive only when the page repaints. Frames are decoded and compared
+    with the last kept frame on a background thread (near-identical frames are
+    dropped), so the test thread only acks them. After the click the recorder
+    waits until no frame came for quiet_ms, then measures the transition: from
+    the first frame that differs from the pre-click frame to the last changed
+    frame. The kept frames are written as a strip (JPEG) or an animated GIF.
+    max_ms > 0 turns transitions longer than that into violations.
+    """
+
+    def __init__(self, page, directory: str, fmt: str = "strip", max_ms: float = 0, max_width: int = 480,
+                 quality: int = 50, diff_threshold: float = 1.5, quiet_ms: int = 300, max_frames: int = 12,
+                 frame_height: int = 180):
+        self.page = page
+        self.directory = directory
+        self.fmt = fmt
+        self.max_ms = max_ms
+        self.max_width = max_width
+        self.quality = quality
+        self.diff_threshold = diff_threshold
+        self.quiet_ms = quiet_ms
+        self.max_frames = max_frames
+        self.frame_height = frame_height
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.recordings: List[Dict] = []
+        self._cdp = page.context.new_cdp_session(page)
+        self._cdp.on("Page.screencastFrame", self._on_frame)
+        # frame list of the recording in progress; None between recordings (late frames are dropped)
+        self._frames: Optional[List[Tuple[float, Image.Image, Image.Image]]] = None
+        self._received = 0
+        self._last_frame_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    # ---- background thread: decode + dedup, in arrival order (single worker)
+    def _keep(self, frames: List, ts: float, data: str):
+        img = Image.open(io.BytesIO(base64.b64decode(data))).convert("RGB")
+        thumb = img.convert("L").resize((32, 32))
+        if frames:
+            diff = ImageStat.Stat(ImageChops.difference(thumb, frames[-1][2])).mean[0]
+            if diff < self.diff_threshold:
+                return
+        frames.append((ts, img, thumb))
+
+    def _on_frame(self, params: Dict):
+        try:
+            self._cdp.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+        except Exception:
+            pass
+        frames = self._frames
+        if frames is None:
+            return
+        self._received += 1
+        self._last_frame_at = time.monotonic()
+        ts = float((params.get("metadata") or {}).get("timestamp") or time.time())
+        self.pool.submit(self._keep, frames, ts, params["data"])
+
+    def _pump_until_quiet(self, timeout_ms: float):
+        started = time.monotonic()
+        while (time.monotonic() - started) * 1000 < timeout_ms:
+            # Playwright dispatches CDP events only while the test thread is inside an API call
+            self.page.wait_for_timeout(40)
+            if (time.monotonic() - max(self._last_frame_at, started)) * 1000 >= self.quiet_ms:
+                break
+
+    @contextmanager
+    def record(self, name: str, timeout_ms: float = 5000):
+        """Wrap the click; the yielded dict is filled with the measurement on exit."""
+        result: Dict = {"name": name}
+        frames: List[Tuple[float, Image.Image, Image.Image]] = []
+        self._frames, self._received, self._last_frame_at = frames, 0, 0.0
+        try:
+            self._cdp.send("Page.startScreencast", {"format": "jpeg", "quality": self.quality,
+                                                    "maxWidth": self.max_width, "maxHeight": self.max_width * 2,
+                                                    "everyNthFrame": 1})
+        except Exception as e:
+            # the click still runs, just without a recording
+            self._frames = None
+            result["error"] = str(e)
+            yield result
+            return
+        # the first frame is the pre-click state
+        self._pump_until_quiet(min(self.quiet_ms, timeout_ms))
+        clicked_at = time.time()
+        try:
+            yield result
+        finally:
+            try:
+                self._pump_until_quiet(timeout_ms)
+            finally:
+                # frames arriving from here on belong to no recording
+                self._frames = None
+                try:
+                    self._cdp.send("Page.stopScreencast")
+                except Exception:
+                    pass
+            self.pool.submit(lambda: None).result()
+            result.update(self._measure(frames, clicked_at))
+            if len(frames) > 1:
+                result["path"] = self.pool.submit(self._write, name, frames).result()
+            self.recordings.append({k: v for k, v in result.items() if k != "path"})
+
+    def _measure(self, frames: List, clicked_at: float) -> Dict:
+        out = {"frames": self._received, "unique_frames": len(frames), "duration_ms": 0.0, "start_delay_ms": None}
+        if len(frames) > 1:
+            # frames[0] is the pre-click state; frames[1] the first repaint that differs from it
+            start, end = frames[1][0], frames[-1][0]
+            out["duration_ms"] = round((end - start) * 1000, 1)
+            out["start_delay_ms"] = round(max(0.0, start - clicked_at) * 1000, 1)
+        return out
+
+    def _write(self, name: str, frames: List) -> str:
+        if len(frames) > self.max_frames:
+            step = (len(frames) - 1) / (self.max_frames - 1)
+            frames = [frames[round(i * step)] for i in range(self.max_frames)]
+        images = []
+        for _, img, _ in frames:
+            w = max(1, round(img.width * self.frame_height / img.height))
+            images.append(img.resize((w, self.frame_height)))
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)[:80]
+        if self.fmt == "gif":
+            path = os.path.join(self.directory, f"{safe}.gif")
+            durations = [max(20, round((b[0] - a[0]) * 1000)) for a, b in zip(frames, frames[1:])] + [800]
+            images[0].save(path, save_all=True, append_images=images[1:], duration=durations, loop=0)
+        else:
+            path = os.path.join(self.directory, f"{safe}.jpg")
+            strip = Image.new("RGB", (sum(i.width for i in images) + 4 * (len(images) - 1), self.frame_height), "white")
+            x = 0
+            for img in images:
+                strip.paste(img, (x, 0))
+                x += img.width + 4
+            strip.save(path, quality=70)
+        return path
+
+    def violation(self, result: Dict) -> Optional[str]:
+        if self.max_ms and result.get("duration_ms", 0) > self.max_ms:
+            return f"transition took {result['duration_ms']:.0f} ms (> {self.max_ms:g} ms, {result['unique_frames']} frames)"
+        return None
+
+    def summary(self) -> Dict:
+        durations = sorted(r["duration_ms"] for r in self.recordings if r.get("unique_frames", 0) > 1)
+        return {
+            "recordings": len(self.recordings),
+            "with_transition": len(durations),
+            "max_duration_ms": durations[-1] if durations else None,
+            "frames_received": sum(r["frames"] for r in self.recordings),
+            "frames_kept": sum(r["unique_frames"] for r in self.recordings),
+            "limit_ms": self.max_ms or None,
+            "transitions": self.recordings,
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        try:
+            self._cdp.detach()
+        except Exception:
+            pass
+
+
+def maybe_record(recorder: Optional[TransitionRecorder], name: str, timeout_ms: float = 5000):
+    """recorder.record(...) or a no-op context yielding an empty dict when screencast capture is off."""
+    return recorder.record(name, timeout_ms) if recorder is not None else nullcontext({})
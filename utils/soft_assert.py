@@ -1,5 +1,8 @@
 import allure
 
+# attachment name used for every collected error; step listeners treat it as a step failure
+ERROR_ATTACHMENT = "SoftAssert error"
+
 class SoftAssert:
     def __init__(self):
         self.errors = []
@@ -7,7 +10,7 @@ class SoftAssert:
     def add(self, message: str):
         self.errors.append(message)
         try:
-            allure.attach(message, name="SoftAssert error", attachment_type=allure.attachment_type.TEXT)
+            allure.attach(message, name=ERROR_ATTACHMENT, attachment_type=allure.attachment_type.TEXT)
         except Exception:
             pass
 
@@ -0,0 +1,149 @@
+"""
+Browserless pre-check of anchors: one streaming html.parser pass over the rendered HTML.
+
+Decides what does not need a browser: #id targets missing from the document,
+empty / malformed hrefs and mailto:/tg:/tel: links that are never checked.
+Everything else is left to the browser phase.
+
+    python -m utils.static_check https://effective-mobile.ru/
+    python -m utils.static_check page.html
+"""
+import json
+import re
+import sys
+import time
+import urllib.request
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from utils.helpers import is_email_or_telegram
+
+SKIP = "skip"        # never checked (mailto:/tg:/tel:, <a> without href)
+FAIL = "fail"        # static failure, reported without the browser
+BROWSER = "browser"  # needs the interactive check
+
+_BAD_PERCENT = re.compile(r"%(?![0-9a-fA-F]{2})")
+
+
+class _AnchorParser(HTMLParser):
+    """Collects every id and every <a href> in document order without building a tree."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.ids: Set[str] = set()
+        self.hrefs: List[Optional[str]] = []
+
+    def handle_starttag(self, tag, attrs):
+        href = None
+        has_href = False
+        for name, value in attrs:
+            if name == "id" and value:
+                self.ids.add(value)
+            elif name == "href":
+                has_href = True
+                href = value or ""
+        if tag == "a":
+            self.hrefs.append(href if has_href else None)
+
+    handle_startendtag = handle_starttag
+
+
+def malformed_reason(href: str) -> Optional[str]:
+    """Why an href cannot be a working link, or None."""
+    if re.search(r"[\x00-\x1f]", href):
+        return "control characters in href"
+    if _BAD_PERCENT.search(href):
+        return "broken percent-encoding"
+    try:
+        parts = urlsplit(href)
+    except ValueError as e:
+        return f"unparsable URL: {e}"
+    if parts.scheme in ("http", "https"):
+        if not href.lower().startswith(parts.scheme + "://"):
+            return f"{parts.scheme}: URL without //"
+        if not parts.hostname:
+            return "URL without host"
+    elif href.startswith("//") and not parts.netloc:
+        return "protocol-relative URL without host"
+    return None
+
+
+def classify_href(href: Optional[str], ids: Set[str]) -> Tuple[str, str]:
+    """(verdict, reason) for one raw href attribute value."""
+    if href is None:
+        return SKIP, "no href attribute"
+    href = href.strip()
+    if not href:
+        return FAIL, "empty href"
+    if is_email_or_telegram(href):
+        return SKIP, "mailto/tg/tel link"
+    if href.startswith("#"):
+        target = href[1:]
+        if not target:
+            return FAIL, "bare '#' href (no target)"
+        if target not in ids and unquote(target) not in ids:
+            return FAIL, f"Target id '{target}' not found"
+        return BROWSER, "hash target exists"
+    reason = malformed_reason(href)
+    if reason:
+        return FAIL, reason
+    return BROWSER, "link"
+
+
+class StaticReport:
+    """Verdicts for every <a> of one HTML document, in document order."""
+
+    def __init__(self, hrefs: List[Optional[str]], ids: Set[str], duration_ms: float):
+        self.hrefs = hrefs
+        self.ids = ids
+        self.duration_ms = duration_ms
+        self.verdicts = [classify_href(h, ids) for h in hrefs]
+
+    def verdict(self, idx: int, href: Optional[str]) -> Tuple[str, str]:
+        """Verdict for anchor #idx of the browser enumeration; by href if the documents disagree."""
+        if idx < len(self.hrefs) and self.hrefs[idx] == href:
+            return self.verdicts[idx]
+        return classify_href(href, self.ids)
+
+    def failures(self) -> List[Dict]:
+        return [{"index": i, "href": h, "reason": r}
+                for i, (h, (v, r)) in enumerate(zip(self.hrefs, self.verdicts)) if v == FAIL]
+
+    def summary(self) -> Dict:
+        counts = {SKIP: 0, FAIL: 0, BROWSER: 0}
+        for v, _ in self.verdicts:
+            counts[v] += 1
+        return {"anchors": len(self.hrefs), "ids": len(self.ids), "parse_ms": round(self.duration_ms, 1), **counts}
+
+
+def precheck(html: str, chunk_size: int = 65536) -> StaticReport:
+    started = time.perf_counter()
+    parser = _AnchorParser()
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+    parser.close()
+    return StaticReport(parser.hrefs, parser.ids, (time.perf_counter() - started) * 1000)
+
+
+def fetch_html(source: str, timeout: float = 30.0) -> str:
+    if re.match(r"^https?://", source):
+        req = urllib.request.Request(source, headers={"User-Agent": "Mozilla/5.0 (Test-UI static check)"})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.read().decode(resp.headers.get_content_charset() or "utf-8", errors="replace")
+    with open(source, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__, file=sys.stderr)
+        return 2
+    report = precheck(fetch_html(argv[0]))
+    print(json.dumps({"summary": report.summary(), "failures": report.failures()}, ensure_ascii=False, indent=2))
+    return 1 if report.failures() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
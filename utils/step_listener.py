@@ -0,0 +1,92 @@
+import os
+import time
+from typing import List, Optional
+
+from allure_commons import hookimpl, plugin_manager
+
+from utils.soft_assert import ERROR_ATTACHMENT
+
+
+class StepListener:
+    """
+    Base allure_commons listener: every top-level allure.step of a test is one
+    element check (``Anchor #3 ...``, ``CTA #7 ...``).
+
+    A step counts as failed if an exception left it or a SoftAssert error was
+    attached while it was open. Subclasses override on_step_start / on_step_stop.
+    Works without --alluredir: allure.step / allure.attach always call the hooks.
+    """
+
+    def __init__(self):
+        self._stack: List[tuple] = []
+        self._title: Optional[str] = None
+        self._failed = False
+        self._started = 0.0
+
+    def register(self):
+        if not plugin_manager.is_registered(self):
+            plugin_manager.register(self)
+        return self
+
+    def unregister(self):
+        if plugin_manager.is_registered(self):
+            plugin_manager.unregister(self)
+
+    @property
+    def in_step(self) -> bool:
+        return bool(self._stack)
+
+    def on_step_start(self, title: str):
+        pass
+
+    def on_step_stop(self, title: str, failed: bool, duration: float):
+        pass
+
+    def on_substep_stop(self, title: str, duration: float):
+        pass
+
+    def on_attachment(self, name: str, size: int):
+        pass
+
+    @hookimpl
+    def start_step(self, uuid, title, params):
+        self._stack.append((uuid, title, time.perf_counter()))
+        if len(self._stack) == 1:
+            self._title = title
+            self._failed = False
+            self._started = time.perf_counter()
+            self.on_step_start(title)
+
+    @hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        if not self._stack:
+            return
+        _, title, started = self._stack.pop()
+        if exc_type is not None:
+            self._failed = True
+        if self._stack:
+            self.on_substep_stop(title, time.perf_counter() - started)
+        else:
+            self.on_step_stop(self._title, self._failed, time.perf_counter() - self._started)
+
+    @hookimpl
+    def attach_data(self, body, name, attachment_type, extension):
+        if not self._stack:
+            return
+        if name == ERROR_ATTACHMENT:
+            self._failed = True
+        try:
+            size = len(body.encode("utf-8") if isinstance(body, str) else body)
+        except Exception:
+            size = 0
+        self.on_attachment(name, size)
+
+    @hookimpl
+    def attach_file(self, source, name, attachment_type, extension):
+        if not self._stack:
+            return
+        try:
+            size = os.path.getsize(source)
+        except Exception:
+            size = 0
+        self.on_attachment(name, size)
@@ -0,0 +1,121 @@
+import math
+from typing import Dict, List, Optional, Set
+
+from utils import page_helpers
+
+# scroll position after a click and the largest reachable scrollY
+SCROLL_STATE = """
+() => {
+    const doc = document.scrollingElement || document.documentElement;
+    return {y: window.scrollY, vh: window.innerHeight, max: Math.max(0, doc.scrollHeight - window.innerHeight)};
+}
+"""
+
+
+def parse_verify(value: Optional[str]) -> Optional[float]:
+    """--cta-verify / --anchor-verify: "all" -> None (click every CTA), "0.2" -> fraction, "5" -> count."""
+    value = (value or "").strip().lower()
+    if value in ("", "all"):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def pick_sample(indices: List[int], keys: Dict[int, object], verify: Optional[float]) -> Set[int]:
+    """Verify sample of indices: verify=None -> all; one index per distinct key first, then the rest."""
+    if verify is None:
+        return set(indices)
+    n = int(verify) if verify >= 1 else math.ceil(verify * len(indices))
+    if n <= 0:
+        return set()
+    firsts, rest, seen = [], [], set()
+    for i in indices:
+        (rest if keys[i] in seen else firsts).append(i)
+        seen.add(keys[i])
+    return set((firsts + rest)[:n])
+
+
+class TargetMap:
+    """
+    Static button -> target map of the CTA test, computed by one in-page pass
+    (page_helpers.target_map): the target id found on the button or its
+    ancestors, whether it exists, and the document offset of the target.
+
+    Buttons with an existing target that are rendered, enabled and not carousel
+    controls are resolved statically and are not clicked, except for a verify
+    sample (one button per distinct target first) whose click is checked against
+    the predicted scroll position. verify=None clicks everything (old behavior).
+    """
+
+    def __init__(self, entries: List[Optional[Dict]], carousel: List[bool], verify: Optional[float] = 0.2):
+        self.entries = entries
+        self.verify = verify
+        self.resolved: List[int] = [
+            i for i, e in enumerate(entries)
+            if e and e.get("exists") and e.get("rendered") and not e.get("disabled")
+            and not (carousel[i] if i < len(carousel) else False)
+        ]
+        self.sample: Set[int] = pick_sample(self.resolved, {i: entries[i]["id"] for i in self.resolved}, verify)
+        self.checked: Dict[str, int] = {"static": 0, "verified": 0, "mismatch": 0}
+
+    @classmethod
+    def build(cls, page, selector: str, carousel: List[bool], verify: Optional[float] = 0.2) -> "TargetMap":
+        try:
+            entries = page_helpers.target_map(page, selector)
+        except Exception:
+            entries = []
+        if len(entries) != len(carousel):
+            entries = [None] * len(carousel)
+        return cls(entries, carousel, verify)
+
+    def static(self, idx: int) -> Optional[Dict]:
+        """Map entry of a statically resolved button, or None."""
+        return self.entries[idx] if idx in self.resolved else None
+
+    def needs_click(self, idx: int) -> bool:
+        return idx not in self.resolved or idx in self.sample
+
+    def skip_click(self, idx: int) -> Optional[Dict]:
+        """Entry of a statically resolved button outside the verify sample (counted as checked), else None."""
+        if self.needs_click(idx):
+            return None
+        self.checked["static"] += 1
+        return self.entries[idx]
+
+    def forget(self, indices: List[int]):
+        """Buttons removed / re-rendered since the map was built go back to the click path."""
+        for i in indices:
+            if i in self.resolved:
+                self.resolved.remove(i)
+                self.sample.discard(i)
+
+    def check_scroll(self, page, idx: int) -> Optional[str]:
+        """After the click of a sampled button: error if the page did not scroll to the predicted target."""
+        entry = self.static(idx)
+        if entry is None:
+            return None
+        try:
+            state = page.evaluate(SCROLL_STATE)
+        except Exception:
+            return None
+        expected = min(max(0, entry["top"] - entry.get("margin", 0)), state["max"])
+        self.checked["verified"] += 1
+        # sticky headers / scroll-padding shift the final position; half a viewport is the tolerance
+        if abs(state["y"] - expected) <= state["vh"] / 2:
+            return None
+        self.checked["mismatch"] += 1
+        return (f"scrolled to y={round(state['y'])}, static target #{entry['id']} "
+                f"({entry['source']}) predicts y~{round(expected)}")
+
+    def summary(self) -> Dict:
+        return {
+            "buttons": len(self.entries),
+            "with_target": sum(1 for e in self.entries if e and e.get("id")),
+            "missing_target": sum(1 for e in self.entries if e and e.get("id") and not e.get("exists")),
+            "resolved_statically": len(self.resolved),
+            "verify_sample": len(self.sample),
+            **self.checked,
+            "targets": {i: {k: self.entries[i][k] for k in ("id", "source", "top", "height")} for i in self.resolved},
+        }
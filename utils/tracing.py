@@ -0,0 +1,112 @@
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, List
+
+from utils.step_listener import StepListener
+
+
+class TraceRetention:
+    """Size-capped store of kept trace chunks: the oldest files are evicted first."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.files = deque()
+        self.total_bytes = 0
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, path: str):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self.files.append((path, size))
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.files) > 1:
+            old, old_size = self.files.popleft()
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+            self.total_bytes -= old_size
+            self.evicted += 1
+
+
+class FailureTracer(StepListener):
+    """
+    Records a Playwright trace chunk for every element step and exports it only
+    when the step failed; chunks of green steps are dropped without writing a file.
+    """
+
+    def __init__(self, context, retention: TraceRetention, prefix: str = "trace"):
+        super().__init__()
+        self.context = context
+        self.retention = retention
+        self.prefix = re.sub(r"[^\w.-]+", "_", prefix)[:80]
+        self.steps: List[Dict] = []
+        self._chunk_open = False
+        self._start_cost = 0.0
+
+    def start(self):
+        self.context.tracing.start(screenshots=True, snapshots=True)
+        # tracing.start opens a chunk with page load in it — it is not part of any step
+        self.context.tracing.stop_chunk()
+        self.register()
+        return self
+
+    def stop(self):
+        self.unregister()
+        try:
+            if self._chunk_open:
+                self.context.tracing.stop_chunk()
+            self.context.tracing.stop()
+        except Exception:
+            pass
+
+    def on_step_start(self, title: str):
+        t0 = time.perf_counter()
+        try:
+            self.context.tracing.start_chunk(title=title)
+            self._chunk_open = True
+        except Exception:
+            self._chunk_open = False
+        self._start_cost = time.perf_counter() - t0
+
+    def on_step_stop(self, title: str, failed: bool, duration: float):
+        if not self._chunk_open:
+            return
+        t0 = time.perf_counter()
+        path = None
+        try:
+            if failed:
+                slug = re.sub(r"[^\w.-]+", "_", title or "step")[:80]
+                path = os.path.join(self.retention.directory, f"{self.prefix}_{len(self.steps)}_{slug}.zip")
+                self.context.tracing.stop_chunk(path=path)
+                self.retention.add(path)
+            else:
+                self.context.tracing.stop_chunk()
+        except Exception:
+            path = None
+        self._chunk_open = False
+        self.steps.append({
+            "step": title,
+            "failed": failed,
+            "trace": path,
+            "overhead_ms": round((self._start_cost + time.perf_counter() - t0) * 1000, 1),
+            "step_ms": round(duration * 1000, 1),
+        })
+
+    def summary(self) -> Dict:
+        overheads = [s["overhead_ms"] for s in self.steps]
+        return {
+            "steps": len(self.steps),
+            "kept": sum(1 for s in self.steps if s["trace"]),
+            "overhead_ms_total": round(sum(overheads), 1),
+            "overhead_ms_mean": round(sum(overheads) / len(overheads), 1) if overheads else 0.0,
+            "retained_bytes": self.retention.total_bytes,
+            "evicted": self.retention.evicted,
+            "per_step": self.steps,
+        }
@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class ViewportProfile(NamedTuple):
+    width: int
+    height: int
+    scale: float = 1.0
+
+    @property
+    def id(self) -> str:
+        scale = int(self.scale) if float(self.scale).is_integer() else self.scale
+        return f"{self.width}x{self.height}@{scale}"
+
+    def context_options(self) -> Dict:
+        return {
+            "viewport": {"width": self.width, "height": self.height},
+            "device_scale_factor": self.scale,
+        }
+
+
+def parse_viewports(spec: Optional[str]) -> List[ViewportProfile]:
+    """
+    Разбирает строку вида "1280x800,768x1024,375x812@3" в список профилей.
+    Суффикс @N задаёт device scale factor (по умолчанию 1).
+    """
+    profiles = []
+    for raw in (spec or "").split(","):
+        raw = raw.strip().lower()
+        if not raw:
+            continue
+        size, _, scale = raw.partition("@")
+        try:
+            w, h = size.split("x")
+            profile = ViewportProfile(int(w), int(h), float(scale) if scale else 1.0)
+        except ValueError:
+            raise ValueError(f"Invalid viewport profile '{raw}', expected WIDTHxHEIGHT[@SCALE]")
+        if profile not in profiles:
+            profiles.append(profile)
+    return profiles
+
+
+# set by ViewportMatrix for the profile processes: where to write test reports
+RESULTS_ENV = "VIEWPORT_MATRIX_RESULTS"
+
+
+def child_args(args: List[str], profile: ViewportProfile) -> List[str]:
+    """pytest arguments of one profile process: the original ones, one profile, its own HTML report dir."""
+    out, html = [], os.getenv("HTML_REPORT", "reports/html")
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            html = arg
+            continue
+        if arg == "--html-report":
+            skip = True
+        elif arg.startswith("--html-report="):
+            html = arg.split("=", 1)[1]
+        else:
+            out.append(arg)
+    # the last --viewports wins
+    out.append(f"--viewports={profile.id}")
+    out.append(f"--html-report={html if html in ('', 'off') else os.path.join(html, profile.id)}")
+    return out
+
+
+class ViewportMatrix:
+    """
+    Runs the viewport profiles at the same time: one pytest process per profile
+    (each with its own sync_playwright), started with the original arguments and
+    --viewports=<profile>. With the browser server running (utils.browser_server)
+    all of them connect to the same browser, each profile in its own contexts.
+
+    Each process appends its test reports as JSON lines to its own file; the
+    parent reads them back into MatrixResults. Total time is the slowest profile
+    plus process start-up instead of the sum of all profiles.
+    """
+
+    def __init__(self, profiles: List[ViewportProfile], args: List[str], rootdir: str,
+                 log_dir: Optional[str] = None):
+        self.profiles = list(profiles)
+        self.args = list(args)
+        self.rootdir = rootdir
+        self.log_dir = log_dir or os.path.join(rootdir, "reports", "viewports")
+        self.workdir = tempfile.mkdtemp(prefix="viewport-matrix-")
+        self.exit_codes: Dict[str, int] = {}
+        self.durations: Dict[str, float] = {}
+
+    def _results_path(self, profile: ViewportProfile) -> str:
+        return os.path.join(self.workdir, f"{profile.id}.jsonl")
+
+    def log_path(self, profile: ViewportProfile) -> str:
+        return os.path.join(self.log_dir, f"{profile.id}.log")
+
+    def _spawn(self, profile: ViewportProfile) -> subprocess.Popen:
+        env = dict(os.environ)
+        env[RESULTS_ENV] = self._results_path(profile)
+        cmd = [sys.executable, "-m", "pytest"] + child_args(self.args, profile)
+        log = open(self.log_path(profile), "w", encoding="utf-8")
+        try:
+            return subprocess.Popen(cmd, cwd=self.rootdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        finally:
+            log.close()
+
+    def run(self, on_done: Optional[Callable[[ViewportProfile, int, float], None]] = None) -> Dict[str, int]:
+        """Starts every profile process and waits for all of them; exit code per profile id."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        started = time.time()
+        running = {profile: self._spawn(profile) for profile in self.profiles}
+        try:
+            while running:
+                for profile, proc in list(running.items()):
+                    code = proc.poll()
+                    if code is None:
+                        continue
+                    del running[profile]
+                    self.exit_codes[profile.id] = code
+                    self.durations[profile.id] = time.time() - started
+                    if on_done is not None:
+                        on_done(profile, code, self.durations[profile.id])
+                time.sleep(0.2)
+        finally:
+            for proc in running.values():
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        return self.exit_codes
+
+    def reports(self) -> Iterator[Dict]:
+        """Test reports written by the profile processes ({"nodeid", "when", "outcome", "duration"})."""
+        for profile in self.profiles:
+            try:
+                with open(self._results_path(profile), "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except OSError:
+                continue
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def append_report(path: str, nodeid: str, when: str, outcome: str, duration: float):
+    """Profile process side of ViewportMatrix.reports()."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"nodeid": nodeid, "when": when, "outcome": outcome, "duration": duration}) + "\n")
+
+
+class MatrixResults:
+    """Collects per-test outcomes keyed by viewport for the side-by-side summary."""
+
+    def __init__(self, profiles: List[ViewportProfile]):
+        self.profile_ids = [p.id for p in profiles]
+        self.rows: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self.started = time.time()
+
+    def add(self, nodeid: str, outcome: str, duration: float):
+        base, _, param = nodeid.partition("[")
+        param = param.rstrip("]")
+        vid = next((p for p in self.profile_ids if p in param.split("-")), None)
+        if vid is None:
+            return
+        prev = self.rows.setdefault(base, {}).get(vid)
+        if prev:
+            # setup/call/teardown reports: keep the worst outcome and sum durations
+            worst = prev[0] if prev[0] != "passed" else outcome
+            self.rows[base][vid] = (worst, prev[1] + duration)
+        else:
+            self.rows[base][vid] = (outcome, duration)
+
+    def lines(self) -> List[str]:
+        name_w = max([len(n) for n in self.rows] + [4])
+        col_w = max([len(p) for p in self.profile_ids] + [16])
+        out = ["test".ljust(name_w) + " | " + " | ".join(p.ljust(col_w) for p in self.profile_ids)]
+        out.append("-" * len(out[0]))
+        sums = {p: 0.0 for p in self.profile_ids}
+        for name, cols in self.rows.items():
+            cells = []
+            for p in self.profile_ids:
+                outcome, dur = cols.get(p, ("-", 0.0))
+                sums[p] += dur
+                cells.append(f"{outcome} {dur:.1f}s".ljust(col_w))
+            out.append(name.ljust(name_w) + " | " + " | ".join(cells))
+        wall = time.time() - self.started
+        out.append(
+            f"wall time {wall:.1f}s, sum of viewports {sum(sums.values()):.1f}s, "
+            f"slowest viewport {max(sums.values() or [0.0]):.1f}s"
+        )
+        return out
@@ -0,0 +1,132 @@
+import json
+import math
+import statistics
+from typing import Dict, List, Optional
+
+# Installed with add_init_script before navigation: buffers LCP, CLS session windows,
+# interaction latency (Event Timing with interactionId) and TTFB in window.__pw_vitals.
+WEB_VITALS_COLLECTOR = """
+(() => {
+  if (window.__pw_vitals) return;
+  const v = window.__pw_vitals = { lcp: null, cls: 0, inp: null, ttfb: null };
+  const observe = (type, cb, opts) => {
+    try { new PerformanceObserver(l => l.getEntries().forEach(cb)).observe(Object.assign({ type, buffered: true }, opts || {})); } catch (e) {}
+  };
+  observe('largest-contentful-paint', e => { v.lcp = e.renderTime || e.startTime; });
+  // CLS: largest session window (gap < 1 s, window < 5 s), shifts after input excluded
+  let win = 0, first = 0, last = 0;
+  observe('layout-shift', e => {
+    if (e.hadRecentInput) return;
+    if (win && e.startTime - last < 1000 && e.startTime - first < 5000) { win += e.value; }
+    else { win = e.value; first = e.startTime; }
+    last = e.startTime;
+    v.cls = Math.max(v.cls, win);
+  });
+  observe('event', e => {
+    if (e.interactionId) v.inp = Math.max(v.inp || 0, e.duration);
+  }, { durationThreshold: 16 });
+  observe('first-input', e => { v.inp = Math.max(v.inp || 0, e.duration); });
+  observe('navigation', e => { v.ttfb = Math.max(0, e.responseStart - (e.activationStart || 0)); });
+})();
+"""
+
+READ_VITALS = """
+async () => {
+  await new Promise(r => requestAnimationFrame(() => setTimeout(r, 0)));
+  const v = window.__pw_vitals || {};
+  const transfer = performance.getEntriesByType('resource')
+    .concat(performance.getEntriesByType('navigation'))
+    .reduce((a, e) => a + (e.transferSize || 0), 0);
+  return { lcp_ms: v.lcp, cls: v.cls, inp_ms: v.inp, ttfb_ms: v.ttfb, resource_timing_bytes: transfer };
+}
+"""
+
+# A point of the viewport whose topmost element is not interactive (no link, control,
+# click handler or pointer cursor up its ancestors), so clicking it cannot navigate.
+NEUTRAL_POINT = """
+() => {
+  const interactive = 'a[href], button, input, select, textarea, label, summary, details, video, audio, iframe, ' +
+    '[role=button], [role=link], [role=tab], [role=menuitem], [onclick], [tabindex], [contenteditable=""], [contenteditable=true]';
+  const w = window.innerWidth, h = window.innerHeight;
+  for (const fy of [0.5, 0.35, 0.65, 0.2, 0.8, 0.95]) {
+    for (const fx of [0.02, 0.98, 0.5, 0.25, 0.75]) {
+      const x = Math.round(w * fx), y = Math.round(h * fy);
+      const el = document.elementFromPoint(x, y);
+      if (!el || el.closest(interactive)) continue;
+      let pointer = false;
+      for (let n = el; n && n !== document.documentElement; n = n.parentElement) {
+        if (getComputedStyle(n).cursor === 'pointer') { pointer = true; break; }
+      }
+      if (!pointer) return { x, y };
+    }
+  }
+  return null;
+}
+"""
+
+# Event Timing entries are delivered after the next paint: two frames plus a margin
+AFTER_INTERACTION = """
+() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(() => setTimeout(r, 100))))
+"""
+
+METRICS = ("lcp_ms", "cls", "inp_ms", "ttfb_ms", "transfer_bytes")
+
+
+class TransferCounter:
+    """Sums encoded bytes of finished network requests via CDP Network events."""
+
+    def __init__(self, page):
+        self.bytes = 0
+        self.requests = 0
+        self.available = False
+        try:
+            self._cdp = page.context.new_cdp_session(page)
+            self._cdp.on("Network.loadingFinished", self._on_finished)
+            self._cdp.send("Network.enable")
+            self.available = True
+        except Exception:
+            self._cdp = None
+
+    def _on_finished(self, event):
+        self.bytes += int(event.get("encodedDataLength") or 0)
+        self.requests += 1
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100.0 * len(values)))
+    return values[rank - 1]
+
+
+def summarize(samples: List[Dict]) -> Dict[str, Dict]:
+    out = {}
+    for name in METRICS:
+        values = [s.get(name) for s in samples if s.get(name) is not None]
+        out[name] = {
+            "median": statistics.median(values) if values else None,
+            "p95": percentile(values, 95),
+            "min": min(values) if values else None,
+            "max": max(values) if values else None,
+            "samples": values,
+        }
+    return out
+
+
+def load_budget(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_budget(summary: Dict[str, Dict], budget: Dict[str, Dict[str, float]]) -> List[str]:
+    """budget: {"lcp_ms": {"median": 2500, "p95": 4000}, ...}"""
+    violations = []
+    for name, limits in budget.items():
+        stats = summary.get(name) or {}
+        for stat, limit in limits.items():
+            value = stats.get(stat)
+            if value is not None and value > limit:
+                violations.append(f"{name} {stat}={value:g} exceeds budget {limit:g}")
+    return violations
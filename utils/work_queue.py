@@ -0,0 +1,411 @@
+"""
+File-based work queue: one coordinator, any number of workers on any hosts that
+share the queue directory (NFS, a mounted volume, or a local path).
+
+    python -m utils.work_queue coordinator --queue /shared/q --chunk 20 --workers 4
+    python -m utils.work_queue worker --queue /shared/q --id host-2
+    python -m utils.work_queue status --queue /shared/q
+
+The coordinator opens the page once, counts anchors and CTAs and writes one item
+per test and slice of elements (--chunk). A worker leases an item by renaming
+pending/<item>.json to leased/<item>.json (atomic, so two workers never get the
+same item), runs pytest for it with --element shard:<range> and its own
+--alluredir, and touches the lease file every --heartbeat seconds. Leases not
+touched for --lease-timeout seconds (a dead worker or host) are put back to
+pending by the coordinator or any worker; after --max-attempts an item goes to
+failed/. When everything is done the coordinator copies all Allure results
+into --alluredir and writes summary.json. --workers N also starts N local
+worker processes, which is the way to test the setup on one machine. Arguments
+after "--" are passed to every pytest run (e.g. -- --base-url https://...).
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from utils.profile_check import TESTS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# tests split into element slices -> page object selector; other tests are one item each
+ELEMENT_TESTS = {"anchors": "ANCHOR_SELECTOR", "cta": "BUTTON_SELECTOR"}
+QUEUE_TESTS = dict(TESTS, vitals="tests/test_web_vitals.py")
+
+# pytest exit codes that mean the run itself broke (interrupted, internal / usage error): retried
+RETRY_EXIT_CODES = (2, 3, 4)
+
+
+def _write_json(path: str, data: Dict):
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _names(directory: str) -> List[str]:
+    try:
+        return sorted(n for n in os.listdir(directory) if n.endswith(".json"))
+    except OSError:
+        return []
+
+
+class WorkQueue:
+    """Queue state lives only in the directory layout: pending/, leased/, done/, failed/, results/."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.config = _read_json(os.path.join(root, "queue.json")) or {}
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _path(self, state: str, item_id: str) -> str:
+        return os.path.join(self.root, state, f"{item_id}.json")
+
+    def results_dir(self, item_id: str) -> str:
+        return os.path.join(self.root, "results", item_id)
+
+    def init(self, items: List[Dict], lease_timeout: float, max_attempts: int, meta: Optional[Dict] = None):
+        if os.path.exists(self._dir("pending")):
+            raise RuntimeError(f"queue already exists: {self.root}")
+        for name in ("pending", "leased", "done", "failed", "results"):
+            os.makedirs(self._dir(name), exist_ok=True)
+        for item in items:
+            _write_json(self._path("pending", item["id"]), dict(item, attempts=0))
+        self.config = {"lease_timeout": lease_timeout, "max_attempts": max_attempts, "items": len(items),
+                       "created": time.time(), **(meta or {})}
+        # written last: workers wait for it before leasing
+        _write_json(os.path.join(self.root, "queue.json"), self.config)
+
+    def ready(self) -> bool:
+        if not self.config:
+            self.config = _read_json(os.path.join(self.root, "queue.json")) or {}
+        return bool(self.config)
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        for name in _names(self._dir("pending")):
+            src = os.path.join(self._dir("pending"), name)
+            dst = os.path.join(self._dir("leased"), name)
+            if os.path.exists(os.path.join(self._dir("done"), name)):
+                # finished by a worker whose lease had already been requeued
+                try:
+                    os.remove(src)
+                except OSError:
+                    pass
+                continue
+            try:
+                # touched before the rename: rename keeps the mtime, and an old one would look like an
+                # expired lease to a concurrent requeue_expired()
+                os.utime(src, None)
+                os.rename(src, dst)
+            except OSError:
+                continue  # another worker was faster
+            item = _read_json(dst)
+            if item is None:
+                continue
+            item.update(worker=worker, leased_at=time.time())
+            _write_json(dst, item)
+            return item
+        return None
+
+    def _owned(self, item: Dict) -> bool:
+        current = _read_json(self._path("leased", item["id"]))
+        return bool(current) and current.get("worker") == item.get("worker")
+
+    def heartbeat(self, item: Dict) -> bool:
+        """Extends the lease; False if it was lost (requeued after a timeout)."""
+        if not self._owned(item):
+            return False
+        try:
+            os.utime(self._path("leased", item["id"]), None)
+            return True
+        except OSError:
+            return False
+
+    def complete(self, item: Dict, result: Dict) -> bool:
+        if not self._owned(item):
+            return False
+        if result.get("exit_code") in RETRY_EXIT_CODES:
+            self._requeue(self._path("leased", item["id"]), f"pytest exit code {result['exit_code']}")
+            return True
+        _write_json(self._path("done", item["id"]), dict(item, result=result))
+        try:
+            os.remove(self._path("leased", item["id"]))
+        except OSError:
+            pass
+        return True
+
+    def _requeue(self, leased: str, reason: str):
+        item = _read_json(leased)
+        if item is None:
+            return
+        item["attempts"] = item.get("attempts", 0) + 1
+        item.setdefault("history", []).append({"worker": item.pop("worker", None), "reason": reason, "t": time.time()})
+        item.pop("leased_at", None)
+        state = "failed" if item["attempts"] >= self.config.get("max_attempts", 3) else "pending"
+        _write_json(self._path(state, item["id"]), item)
+        try:
+            os.remove(leased)
+        except OSError:
+            pass
+
+    def requeue_expired(self) -> int:
+        timeout = self.config.get("lease_timeout", 120)
+        count = 0
+        for name in _names(self._dir("leased")):
+            path = os.path.join(self._dir("leased"), name)
+            try:
+                idle = time.time() - os.path.getmtime(path)
+            except OSError:
+                continue
+            if idle > timeout:
+                self._requeue(path, f"lease expired ({idle:.0f}s without heartbeat)")
+                count += 1
+        return count
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(_names(self._dir(state))) for state in ("pending", "leased", "done", "failed")}
+
+    def finished(self) -> bool:
+        counts = self.counts()
+        return self.ready() and counts["pending"] == 0 and counts["leased"] == 0
+
+    def close(self):
+        _write_json(os.path.join(self.root, "closed.json"), {"t": time.time()})
+
+    def closed(self) -> bool:
+        return os.path.exists(os.path.join(self.root, "closed.json"))
+
+    def items(self, state: str) -> List[Dict]:
+        return [i for i in (_read_json(os.path.join(self._dir(state), n)) for n in _names(self._dir(state))) if i]
+
+
+# --------------------------------------------------------------------- coordinator
+
+
+def count_elements(base_url: str, headless: bool = True) -> Dict[str, int]:
+    """Number of anchors / CTAs of the page, enumerated the way the tests do."""
+    from playwright.sync_api import sync_playwright
+
+    from pages.home_page import HomePage
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        try:
+            page = browser.new_page()
+            hp = HomePage(page, base_url)
+            hp.goto("/")
+            hp.wait_for_network_idle(timeout=60_000)
+            return {test: hp.find(getattr(HomePage, attr)).count() for test, attr in ELEMENT_TESTS.items()}
+        finally:
+            browser.close()
+
+
+def make_items(tests: List[str], counts: Dict[str, int], chunk: int) -> List[Dict]:
+    items = []
+    for test in tests:
+        if test not in ELEMENT_TESTS:
+            items.append({"id": test, "test": test, "nodeid": QUEUE_TESTS[test], "element": None})
+            continue
+        n = counts.get(test, 0)
+        chunk = max(1, chunk)
+        starts = list(range(0, max(n, 1), chunk))
+        for start in starts:
+            # the last shard is open-ended: elements a worker finds beyond the coordinator's count
+            # (lazy content, an A/B variant) are checked there instead of silently skipped
+            end = "" if start == starts[-1] else str(start + chunk - 1)
+            items.append({
+                "id": f"{test}-{start:05d}",
+                "test": test,
+                "nodeid": QUEUE_TESTS[test],
+                "element": f"shard:{start}-{end}",
+            })
+    return items
+
+
+def merge_results(queue: WorkQueue, alluredir: str) -> Dict:
+    """Copies every item's Allure files into alluredir (result files have unique names) and writes summary.json."""
+    os.makedirs(alluredir, exist_ok=True)
+    copied = 0
+    for item in queue.items("done"):
+        src = os.path.join(queue.results_dir(item["id"]), "allure")
+        if not os.path.isdir(src):
+            continue
+        for name in os.listdir(src):
+            dst = os.path.join(alluredir, name)
+            if not os.path.exists(dst):
+                shutil.copy2(os.path.join(src, name), dst)
+                copied += 1
+    done = queue.items("done")
+    summary = {
+        "counts": queue.counts(),
+        "allure_files": copied,
+        "alluredir": alluredir,
+        "test_failures": [i["id"] for i in done if i["result"].get("exit_code") not in (0, 5)],
+        "failed_items": [{"id": i["id"], "history": i.get("history", [])} for i in queue.items("failed")],
+        "items": [{"id": i["id"], **i["result"], "attempts": i.get("attempts", 0)} for i in done],
+        "wall_s": round(time.time() - queue.config.get("created", time.time()), 1),
+    }
+    _write_json(os.path.join(queue.root, "summary.json"), summary)
+    return summary
+
+
+def _spawn_worker(queue_dir: str, worker_id: str, heartbeat: float, pytest_args: List[str]) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "utils.work_queue", "worker", "--queue", queue_dir, "--id", worker_id,
+           "--heartbeat", str(heartbeat), "--", *pytest_args]
+    return subprocess.Popen(cmd, cwd=ROOT)
+
+
+def run_coordinator(args, pytest_args: List[str]) -> int:
+    queue = WorkQueue(args.queue)
+    counts = count_elements(args.base_url, headless=args.headless != "0")
+    items = make_items(args.tests, counts, args.chunk)
+    queue.init(items, args.lease_timeout, args.max_attempts, meta={"base_url": args.base_url, "elements": counts})
+    print(f"queue {args.queue}: {len(items)} items ({counts})")
+    pytest_args = [f"--base-url={args.base_url}", *pytest_args]
+
+    workers = [_spawn_worker(args.queue, f"{socket.gethostname()}-{i}", args.heartbeat, pytest_args)
+               for i in range(args.workers)]
+    last = None
+    while not queue.finished():
+        queue.requeue_expired()
+        counts = queue.counts()
+        if counts != last:
+            print(" ".join(f"{k}={v}" for k, v in counts.items()), flush=True)
+            last = counts
+        time.sleep(args.poll)
+
+    summary = merge_results(queue, args.alluredir)
+    queue.close()
+    for proc in workers:
+        try:
+            proc.wait(timeout=args.lease_timeout)
+        except subprocess.TimeoutExpired:
+            proc.terminate()
+    print(f"done in {summary['wall_s']}s: {summary['counts']}, {summary['allure_files']} Allure files -> "
+          f"{args.alluredir}; test failures in {len(summary['test_failures'])} items, "
+          f"{len(summary['failed_items'])} items failed to run")
+    return 1 if summary["test_failures"] or summary["failed_items"] else 0
+
+
+# --------------------------------------------------------------------- worker
+
+
+def run_item(queue: WorkQueue, item: Dict, heartbeat: float, pytest_args: List[str]) -> Optional[Dict]:
+    """Runs pytest for one item, heartbeating the lease; None if the lease was lost (the run is abandoned)."""
+    out_dir = queue.results_dir(item["id"])
+    allure_dir = os.path.join(out_dir, "allure")
+    shutil.rmtree(allure_dir, ignore_errors=True)
+    os.makedirs(allure_dir, exist_ok=True)
+    cmd = [sys.executable, "-m", "pytest", item["nodeid"], "-p", "no:cacheprovider", f"--alluredir={allure_dir}",
+           "--html-report=off", "--history-db=off"]
+    if item.get("element"):
+        cmd.append(f"--element={item['element']}")
+    cmd += pytest_args
+    started = time.time()
+    with open(os.path.join(out_dir, "output.txt"), "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT)
+        while True:
+            try:
+                code = proc.wait(timeout=heartbeat)
+                break
+            except subprocess.TimeoutExpired:
+                if not queue.heartbeat(item):
+                    proc.terminate()
+                    try:
+                        proc.wait(timeout=30)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+                    return None
+    return {"exit_code": code, "worker": item["worker"], "duration_s": round(time.time() - started, 1)}
+
+
+def run_worker(args, pytest_args: List[str]) -> int:
+    queue = WorkQueue(args.queue)
+    deadline = time.time() + args.wait
+    while not queue.ready():
+        if time.time() > deadline:
+            print(f"no queue at {args.queue}", file=sys.stderr)
+            return 1
+        time.sleep(args.poll)
+    processed = 0
+    while not queue.closed():
+        queue.requeue_expired()
+        item = queue.lease(args.id)
+        if item is None:
+            if queue.finished():
+                break
+            time.sleep(args.poll)
+            continue
+        result = run_item(queue, item, args.heartbeat, pytest_args)
+        if result is not None and queue.complete(item, result):
+            processed += 1
+            print(f"[{args.id}] {item['id']}: exit {result['exit_code']} in {result['duration_s']}s", flush=True)
+        else:
+            print(f"[{args.id}] {item['id']}: lease lost, result discarded", flush=True)
+    print(f"[{args.id}] processed {processed} items")
+    return 0
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    pytest_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, pytest_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(prog="python -m utils.work_queue", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    coord = sub.add_parser("coordinator")
+    coord.add_argument("--queue", required=True)
+    coord.add_argument("--base-url", default=os.getenv("BASE_URL", "https://effective-mobile.ru"))
+    coord.add_argument("--tests", nargs="+", default=sorted(QUEUE_TESTS), choices=sorted(QUEUE_TESTS))
+    coord.add_argument("--chunk", type=int, default=20, help="elements per work item")
+    coord.add_argument("--workers", type=int, default=0, help="local worker processes to start")
+    coord.add_argument("--lease-timeout", type=float, default=120.0)
+    coord.add_argument("--max-attempts", type=int, default=3)
+    coord.add_argument("--heartbeat", type=float, default=10.0)
+    coord.add_argument("--alluredir", default="allure-results")
+    coord.add_argument("--headless", default=os.getenv("HEADLESS", "1"))
+    coord.add_argument("--poll", type=float, default=2.0)
+
+    worker = sub.add_parser("worker")
+    worker.add_argument("--queue", required=True)
+    worker.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}")
+    worker.add_argument("--heartbeat", type=float, default=10.0)
+    worker.add_argument("--wait", type=float, default=600.0, help="seconds to wait for the coordinator to create the queue")
+    worker.add_argument("--poll", type=float, default=2.0)
+
+    status = sub.add_parser("status")
+    status.add_argument("--queue", required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == "coordinator":
+        return run_coordinator(args, pytest_args)
+    if args.command == "worker":
+        return run_worker(args, pytest_args)
+    queue = WorkQueue(args.queue)
+    print(json.dumps({"config": queue.config, "counts": queue.counts(), "closed": queue.closed(),
+                      "leased": [{"id": i["id"], "worker": i.get("worker")} for i in queue.items("leased")]},
+                     ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())